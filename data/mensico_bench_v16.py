@@ -0,0 +1,324 @@
+# -*- coding:Utf-8 -*-
+## ----- mensico_bench_v16.py -----
+##
+##  The program measures the speed of the engine.
+##
+##
+##  Every benchmark is a rate (higher is better): the steps and the games per second of every learning
+##  method on several board sizes (and with the other matrix modes on the first one), the error
+##  measurements per second of every error type, and the strategy files saved and loaded per second.
+##  The results are written to a json file, and they can be compared to the results of an earlier run
+##  to find the regressions.
+##
+##
+##  Functions:
+##      - runBenchmarks
+##          Runs the benchmarks, and returns their results.
+##
+##      - compareResults
+##          Compares the results to a baseline.
+##
+##      - main
+##          Command line interface of the benchmarks.
+##
+##
+## Copyright (C) 2012, Fülöp, András, fulibacsi@gmail.com
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <http://www.gnu.org/licenses/>.
+##
+
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import argparse
+import platform
+from timeit import default_timer
+from data.mensico_engine_v16 import *
+from data.mensico_strategy_v16 import strategyCache, TEXTEXTENSION, BINARYEXTENSION
+
+
+# board sizes of the game benchmarks, [size_x, size_y]
+SIZES = [[5, 8], [3, 6], [7, 10]]
+
+# learning methods of the game benchmarks (None: every registered one)
+LEARNERS = None
+
+# names of the matrix modes (see MATRIXMODE) in the names of the game benchmarks
+MODENAMES = ['', 'lazy', 'log']
+
+# minimum time of a benchmark in seconds, and the number of rounds it is divided into (the fastest
+# round is reported, it is the least disturbed by the other programs of the machine)
+BENCHTIME = 1.0
+BENCHROUNDS = 3
+
+# seed of the boards
+BENCHSEED = 2012
+
+# relative slowdown reported as a regression
+THRESHOLD = 0.15
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ----------------------------------------- Benchmark functions ---------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+# repeat a function for a while
+def measure(function, minTime = BENCHTIME, rounds = BENCHROUNDS):
+    """
+    Call the function in rounds of minTime / rounds seconds (at least once in every round). Returns the
+    calls per second and the sum of its results (the work done) per second in the fastest round.
+    """
+
+    best = [0.0, 0.0]
+    for i in range(rounds):
+        calls = 0
+        work = 0
+        start = default_timer()
+        while True:
+            work = work + function()
+            calls = calls + 1
+            elapsed = default_timer() - start
+            if elapsed >= float(minTime) / rounds:
+                break
+        best = max(best, [calls / elapsed, work / elapsed])
+    return best
+
+
+# a board ready for the benchmarks
+def benchBoard(size_x = 5, size_y = 8, matrixMode = 0):
+    """ Returns a seeded board, after some games without learning (the steps of the players are not all the same). """
+
+    game = Board(size_x, size_y, seed = BENCHSEED, matrixMode = matrixMode)
+    for i in range(10):
+        while not game.isGameOver():
+            game.doOneStep(0)
+        game.reset()
+    return game
+
+
+# speed of the games
+def benchGames(typeOfLearning, size_x = 5, size_y = 8, minTime = BENCHTIME, matrixMode = 0):
+    """ Returns the steps and the games played per second with the learning method and the matrix mode (see MATRIXMODE). """
+
+    game = benchBoard(size_x, size_y, matrixMode)
+
+    def play():
+        while not game.isGameOver():
+            game.doOneStep(typeOfLearning)
+        steps = game.round
+        game.reset()
+        return steps
+
+    games, steps = measure(play, minTime)
+    return [steps, games]
+
+
+# speed of the error measuring
+def benchError(typeOfError, minTime = BENCHTIME):
+    """ Returns the error measurements per second, every measurement is computed from scratch. """
+
+    game = benchBoard()
+    for i in range(10):
+        while not game.isGameOver():
+            game.doOneStep(2)
+        game.reset()
+    matrices = game.getMatrices()
+    error = Error(matrices[0], matrices[1], matrices[2], matrices[3], typeOfError)
+
+    def calculate():
+        error.calculateError()
+        return 1
+
+    return measure(calculate, minTime)[0]
+
+
+# speed of the strategy files
+def benchStrategies(extension, directory, minTime = BENCHTIME):
+    """ Returns the strategies saved, loaded and loaded from the cache per second, in the format of the extension. """
+
+    agent = benchBoard().player1
+    filename = os.path.join(directory, 'bench' + extension)
+
+    def save():
+        agent.saveStrategy(filename)
+        return 1
+
+    def load():
+        strategyCache.clear()
+        agent.loadStrategy(filename, 1)
+        return 1
+
+    def loadCached():
+        agent.loadStrategy(filename, 1)
+        return 1
+
+    # saveStrategy reports every file
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        saved = measure(save, minTime)[0]
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    loaded = measure(load, minTime)[0]
+    cached = measure(loadCached, minTime)[0]
+    strategyCache.clear()
+    return [saved, loaded, cached]
+
+
+# run every benchmark
+def runBenchmarks(learners = LEARNERS, sizes = SIZES, minTime = BENCHTIME, log = None):
+    """
+    Run the benchmarks, returns their results in a dictionary: name: [value, unit]. If log is a file,
+    every result is written into it as soon as it is ready.
+    """
+
+    if learners is None:
+        learners = getLearnerTypes()
+    for typeOfLearning in learners:
+        getLearner(typeOfLearning)
+    results = {}
+
+    def add(name, value, unit):
+        results[name] = [value, unit]
+        if log is not None:
+            log.write('%-40s %14.2f %s\n' % (name, value, unit))
+            log.flush()
+
+    for size_x, size_y in sizes:
+        for typeOfLearning in learners:
+            steps, games = benchGames(typeOfLearning, size_x, size_y, minTime)
+            name = 'games %dx%d learner %d' % (size_x, size_y, typeOfLearning)
+            add(name + ' steps', steps, 'steps/s')
+            add(name, games, 'games/s')
+
+    # the other matrix modes on the first size only
+    for matrixMode in range(1, len(MODENAMES)):
+        for typeOfLearning in learners:
+            steps, games = benchGames(typeOfLearning, sizes[0][0], sizes[0][1], minTime, matrixMode)
+            name = 'games %dx%d learner %d %s' % (sizes[0][0], sizes[0][1], typeOfLearning, MODENAMES[matrixMode])
+            add(name + ' steps', steps, 'steps/s')
+            add(name, games, 'games/s')
+
+    for typeOfError in range(5):
+        add('error %d' % typeOfError, benchError(typeOfError, minTime), 'errors/s')
+
+    directory = tempfile.mkdtemp()
+    try:
+        for extension in [TEXTEXTENSION, BINARYEXTENSION]:
+            saved, loaded, cached = benchStrategies(extension, directory, minTime)
+            add('save ' + extension, saved, 'files/s')
+            add('load ' + extension, loaded, 'files/s')
+            add('load cached ' + extension, cached, 'files/s')
+    finally:
+        shutil.rmtree(directory)
+
+    return results
+
+
+# compare to a baseline
+def compareResults(results, baseline, threshold = THRESHOLD):
+    """
+    Returns the comparison of the results measured in both runs: a [name, baseline value, value,
+    relative change, regression] list for each, where regression is True if the value is slower than
+    the baseline by more than the threshold.
+    """
+
+    comparison = []
+    for name in sorted(results):
+        if not name in baseline:
+            continue
+        old = baseline[name][0]
+        new = results[name][0]
+        change = (new - old) / old
+        comparison.append([name, old, new, change, change < -threshold])
+    return comparison
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ------------------------------------------- Main function -------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+# parse the command line
+def parseArguments(args):
+    """ Parse the command line arguments. """
+
+    parser = argparse.ArgumentParser(description = VERSION + ' benchmarks')
+    parser.add_argument('-l', '--learners', type = int, nargs = '+', default = LEARNERS,
+                        help = 'types of learning, registered ones (default: every registered one)')
+    parser.add_argument('--sizes', nargs = '+', default = ['%dx%d' % tuple(size) for size in SIZES],
+                        help = 'board sizes as columns x rows (default: %(default)s)')
+    parser.add_argument('-t', '--time', type = float, default = BENCHTIME,
+                        help = 'minimum time of a benchmark in seconds (default: %(default)s)')
+    parser.add_argument('-f', '--output', default = None,
+                        help = 'json file for the results')
+    parser.add_argument('-c', '--compare', default = None,
+                        help = 'json file of the baseline results, the regressions are reported')
+    parser.add_argument('--threshold', type = float, default = THRESHOLD,
+                        help = 'relative slowdown reported as a regression (default: %(default)s)')
+    return parser.parse_args(args)
+
+
+# load the results of a run
+def loadResults(filename):
+    """ Returns the results of a json file written by main. """
+
+    try:
+        infile = open(filename, 'r')
+    except:
+        print >> sys.stderr, "Can't open", filename, "!"
+        raise
+    try:
+        return json.load(infile)['results']
+    finally:
+        infile.close()
+
+
+# main function
+def main(args = None):
+    """ Run the benchmarks from the command line. Returns 1 if a regression was found, 0 otherwise. """
+
+    options = parseArguments(sys.argv[1:] if args is None else args)
+    sizes = [[int(value) for value in size.split('x')] for size in options.sizes]
+
+    results = runBenchmarks(options.learners, sizes, options.time, sys.stderr)
+
+    if options.output is not None:
+        try:
+            outfile = open(options.output, 'w')
+        except:
+            print >> sys.stderr, "Can't write to", options.output, "!"
+            raise
+        json.dump({'version': VERSION, 'python': platform.python_version(), 'numpy': numpy.__version__,
+                   'machine': platform.machine(), 'time': options.time, 'results': results},
+                  outfile, indent = 1, sort_keys = True)
+        outfile.close()
+
+    if options.compare is None:
+        return 0
+
+    regressions = 0
+    print '%-40s %14s %14s %9s' % ('benchmark', 'baseline', 'actual', 'change')
+    for name, old, new, change, regression in compareResults(results, loadResults(options.compare), options.threshold):
+        print '%-40s %14.2f %14.2f %+8.1f%%%s' % (name, old, new, 100.0 * change, '  REGRESSION' if regression else '')
+        regressions = regressions + regression
+    print str(regressions) + ' regression(s)'
+    return int(regressions > 0)
@@ -9,12 +9,36 @@
 ##      - ProbMat
 ##          Stores a probability matrix of a given size.
 ##
+##      - LazyProbMat
+##          Stores a probability matrix as unnormalized weights, normalized only when it is read.
+##
+##      - LogProbMat
+##          Stores a probability matrix as logarithms, normalized by log-sum-exp.
+##
+##      - UniformStream
+##          Draws uniform random numbers in blocks, for the decisions of the players.
+##
 ##      - Player
 ##          Implements a MensIco player.
 ##
+##      - MarkovAgent
+##          Implements a MensIco player compiled into a Markov chain.
+##
+##      - Learner
+##          Implements a learning method, the built-in ones are its subclasses (see registerLearner).
+##
 ##      - Board
 ##          Implements the game's board, players, the actions, and the learning methods as well.
 ##
+##      - BatchBoard
+##          Implements many independent boards, playing in lockstep.
+##
+##      - BatchSteps
+##          Stores the steps of a BatchBoard's lanes, for the batch learning.
+##
+##      - Evaluator
+##          Implements the exact evaluation of a game between two players.
+##
 ##      - Error
 ##          Implements error measuring.
 ##
@@ -38,13 +62,49 @@
 
 import random
 import math
+import struct
+import hashlib
 from fractions import Fraction
 import itertools
+import numpy
+from data.mensico_strategy_v16 import Strategy, readCachedStrategy, writeStrategy, strategyName, NAMESIZE
+from data.mensico_stats_v16 import Stats
 
 
 # smallest float value to use
 MINFLOAT = math.ldexp(1.0, -30)
 
+# version stamps of the modified matrix rows
+stamps = itertools.count(1)
+
+# column offsets of the reachable tiles
+NEIGHBOURS = numpy.array([-1, 0, 1])
+
+# number of uniform random numbers drawn at once by an UniformStream: the first block after seeding,
+# and the largest one (the blocks double up to it)
+UNIFORMFIRSTBLOCK = 64
+UNIFORMBLOCK = 4096
+
+# data type of the probability matrices
+# possible values:
+#    numpy.float64 - double precision
+#    numpy.float32 - single precision, half the memory
+MATRIXTYPE = numpy.float64
+
+# storage of the players' matrices
+# possible values:
+#    0 - probabilities, every learned row is rescaled at once (ProbMat)
+#    1 - lazy: the rows are stored as weights, and normalized when they are read (LazyProbMat)
+#    2 - logarithms of the probabilities, normalized by log-sum-exp (LogProbMat)
+MATRIXMODE = 0
+
+# range of the total weight of a LazyProbMat row, the row is rescaled if it gets out of it
+LAZYRANGE = math.ldexp(1.0, 64)
+
+# smallest logarithm of a probability in a LogProbMat, the walls are -inf
+LOGMINIMUM = math.log(numpy.finfo(MATRIXTYPE).tiny)
+NEGATIVEINFINITY = float('-inf')
+
 
 
 # probability of exploring instead of exploiting
@@ -66,8 +126,23 @@ LEARNINGCONSTANT = 0.5
 #    3 - neural learning v2
 #    4 - adaboost learning
 #    5 - naive bayes learning
+#    6 - gradient learning
 LEARNINGTYPE = 2
 
+# naive bayes learning: computing with
+# possible values:
+#    0 - the numerators and denominators of the floats (see NaiveBayesLearner)
+#    1 - fractions, the reference implementation
+BAYESFRACTIONS = 0
+
+# gradient learning: step size, number of games between two updates, and number of steps in an update
+GRADIENTSTEP = 1.0
+GRADIENTBATCH = 10
+GRADIENTITERATIONS = 5
+
+# gradient learning: number of iterations fitting a row of the opponent's model
+FITTINGITERATIONS = 5
+
 
 # type of error measuring
 # possible values:
@@ -75,8 +150,12 @@ LEARNINGTYPE = 2
 #    1 - Kullback - Leibler Divergence
 #    2 - Chi - Squared Divergence
 #    3 - Greatest Difference
+#    4 - all of the above, in a list
 ERRORTYPE = 1
 
+# names of the error types, in the order of the list of type 4
+ERRORNAMES = ['RMSE', 'KLDiv', 'ChiSquareDiv', 'GreatestDifference']
+
 # version number
 VERSION = 'MensIco2 v1.6 beta'
 
@@ -90,48 +169,71 @@ class ProbMat:
     """Storing and managing probability matrices."""
     
     # init a probability matrix - create the matrix itself
-    def __init__(self, x = 5, y = 8):
+    def __init__(self, x = 5, y = 8, dtype = MATRIXTYPE):
         """ Init a matrix with the given dimensions. """
         
-        self.matrix = [[0.0 for col in range(x+2)] for row in range(y)]
-        for i in range(2,len(self.matrix)):
-            for j in range(1,len(self.matrix[i])-1):
-                self.matrix[i][j] = 1.0/x
-        self.matrix[0][(x+2)/2] = 1.0
-        for i in range((x+2)/2-1, (x+2)/2+2, 1):
-            self.matrix[1][i] = 0.3               
+        self.dtype = dtype
+        self(x, y)
 
 
     # reset a probability matrix to the initial state
     def __call__(self, x = 5, y = 8):
         """ Reset a matrix with the given dimensions to the initial state. """
         
-        self.matrix = [[0.0 for col in range(x+2)] for row in range(y)]
-        for i in range(2,len(self.matrix)):
-            for j in range(1,len(self.matrix[i])-1):
-                self.matrix[i][j] = 1.0/x
-        self.matrix[0][(x+2)/2] = 1.0
-        for i in range((x+2)/2-1, (x+2)/2+2, 1):
-            self.matrix[1][i] = 0.3               
+        self.matrix = numpy.zeros((y, x+2), dtype = self.dtype)
+        self.matrix[2:, 1:-1] = 1.0/x
+        self.matrix[0, (x+2)/2] = 1.0
+        self.matrix[1, (x+2)/2-1:(x+2)/2+2] = 0.3
+        self.shared = False
+        self.touch()
  
  
 # setters, getters            
                 
-    # get the matrix            
+    # get the matrix - modify it only through the setters, they keep the sampling tables valid
     def getMatrix(self):
         return self.matrix
         
     # set the matrix to a specified matrix - NOT CHECKING!!!    
     def setMatrix(self, preset_matrix):
-        self.matrix = preset_matrix[:]
+        self.matrix = numpy.array(preset_matrix, dtype = self.dtype, order = 'C')
+        self.shared = False
+        self.touch()
+        
+    # set the matrix to a read-only matrix without copying, it is copied before the first modification
+    def shareMatrix(self, preset_matrix):
+        if preset_matrix.flags.writeable or not preset_matrix.dtype == self.dtype or not preset_matrix.flags.c_contiguous:
+            self.setMatrix(preset_matrix)
+            return
+        self.matrix = preset_matrix
+        self.shared = True
+        self.touch()
 
     # get a specified matrix item
     def getMatrixItem(self, x, y):
-        return self.matrix[x][y]
+        return self.matrix.item(x, y)
 
     # set a specified matrix item to a value
     def setMatrixItem(self, x, y, value):
-        self.matrix[x][y] = value
+        if self.shared:
+            self.unshare()
+        self.matrix[x, y] = value
+        self.samplers[x] = None
+        self.versions[x] = next(stamps)
+        
+    # multiply a specified matrix item by exp(exponent)
+    def scaleMatrixItem(self, x, y, exponent):
+        self.setMatrixItem(x, y, self.getMatrixItem(x, y) * math.exp(exponent))
+        
+    # get the sampling table of the steps from a tile
+    def getSampler(self, x, y):
+        samplers = self.samplers[x + 1]
+        if samplers is None:
+            samplers = self.samplers[x + 1] = [None] * self.matrix.shape[1]
+        sampler = samplers[y]
+        if sampler is None:
+            sampler = samplers[y] = self.createSampler(x, y)
+        return sampler
         
 # end of setters, getters        
         
@@ -140,34 +242,62 @@ class ProbMat:
     def rescale(self, line = -1):
         """ Rescale the whole matrix, or one of the rows."""
     
+        if self.shared:
+            self.unshare()
         if line == -1:
             # we rescale the whole matrix
-            for act in self.matrix:
-                # get the minimum value of the current row and add a small value to it
-                minimum = abs(min(act)) + MINFLOAT
-                # add this to every element in the act. row
-                for i in range(1,len(act)-1):
-                    if not act[i] == 0.0:
-                        act[i] = act[i] + minimum
-                # get the total value in the row...
-                summa = sum(act)
-                # and divide every element by this total value
-                for i in range(1,len(act)-1):
-                    act[i] = act[i]/summa
+            rescaleRows(self.matrix)
+            self.touch()
         else:
             # we rescale a row
-            act = self.matrix[line]
-            # get the minimum value of the row and add a small value to it
-            minimum = abs(min(act)) + MINFLOAT
-            # add this to every element in the row
-            for i in range(1,len(act)-1):
-                if not act[i] == 0.0:
-                    act[i] = act[i] + minimum
-            # get the total value in the row...
-            summa = sum(act)
-            # and divide every element by this total value
-            for i in range(1,len(act)-1):
-                act[i] = act[i]/summa
+            rescaleRows(self.matrix[line])
+            self.samplers[line] = None
+            self.versions[line] = next(stamps)
+            
+    
+    # copy the shared matrix before modifying it
+    def unshare(self):
+        """ Replace the shared, read-only matrix with an own copy. The values do not change. """
+        
+        self.matrix = numpy.array(self.matrix, order = 'C')
+        self.shared = False
+            
+            
+    # mark the whole matrix, or one of the rows as modified
+    def touch(self, line = -1):
+        """
+        Drop the sampling tables of the modified rows, and give them a new version stamp.
+        
+        Whoever computes something from the matrix can store the versions of the rows, and recompute
+        only the rows whose version is different later.
+        """
+        
+        if line == -1:
+            self.samplers = [None] * self.matrix.shape[0]
+            self.versions = [next(stamps)] * self.matrix.shape[0]
+        else:
+            self.samplers[line] = None
+            self.versions[line] = next(stamps)
+            
+            
+    # create the sampling table of the steps from a tile
+    def createSampler(self, x, y):
+        """
+        Create a Walker alias table for the possible steps from the (x, y) tile.
+        
+        The possible steps are the tiles of the next row with positive probability. The table is a
+        (number of steps, steps, thresholds, aliases) tuple, see sampleAlias.
+        
+        """
+        
+        steps = []
+        weights = []
+        for j, weight in enumerate(self.matrix[x + 1, y - 1:y + 2].tolist(), y - 1):
+            if weight > 0.0:
+                steps.append([x + 1, j])
+                weights.append(weight)
+        
+        return createAlias(steps, weights)
                 
              
     # log the matrix in a useable form            
@@ -180,20 +310,452 @@ class ProbMat:
             print "Can't write to", logFileName, "!"
             raise
         logFile.write("x; y; value\n")    
-        for i in range(0, len(self.matrix)):
-            for j in range(0, len(self.matrix[i])):
-                logFile.write(str(i) + '; ' + str(j) + '; ' + str(self.matrix[i][j]) + '\n')
+        for i, act in enumerate(self.getMatrix().tolist()):
+            for j, value in enumerate(act):
+                logFile.write(str(i) + '; ' + str(j) + '; ' + str(value) + '\n')
         logFile.close()
         
 
 
+# -----------------------------------------------------------------------------------------------------  
+# ----------------------------------------- LazyProbMat class -----------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class LazyProbMat(ProbMat):
+    """
+    Storing probability matrices as unnormalized weights.
+    
+    Every row is stored as non-negative weights and a scale, the probabilities are the weights divided
+    by the scale of their row. The total weight of every row is kept up to date by the setters, so
+    rescaling a row only sets its scale to its total, and learning from a step is O(1). The getters
+    and the setters work on probabilities, like the ones of ProbMat, and the matrix of the
+    probabilities is computed only when it is asked for (only its modified rows).
+    
+    A row is rescaled like in ProbMat only if one of its tiles is set to a non-positive value, or if
+    its total gets out of LAZYRANGE. Otherwise MINFLOAT is not added to the tiles at every rescaling:
+    the positive tiles are raised to MINFLOAT instead, when they are set and when the scale of their
+    row grows. So the probabilities are close to the ones of ProbMat, but not equal, and the learning
+    goes differently where a learner is sensitive to the last bits - e.g. the ADABoost learner (4)
+    multiplies by 1/3 or by about 1e-8 depending on whether its epsilon rounded to 1.0.
+    
+    """
+    
+# setters, getters
+
+    # get the matrix of probabilities - modify it only through the setters
+    def getMatrix(self):
+        if self.view is None:
+            self.view = numpy.zeros_like(self.matrix)
+            self.viewVersions = [None] * len(self.versions)
+        for x, version in enumerate(self.versions):
+            if not version == self.viewVersions[x]:
+                numpy.divide(self.matrix[x], self.scales[x], out = self.view[x])
+                self.viewVersions[x] = version
+        return self.view
+        
+    # get a specified matrix item
+    def getMatrixItem(self, x, y):
+        return self.matrix.item(x, y) / self.scales[x]
+
+    # set a specified matrix item to a value
+    def setMatrixItem(self, x, y, value):
+        if self.shared:
+            self.unshare()
+        scale = self.scales[x]
+        weight = value * scale
+        if weight > 0.0:
+            weight = max(weight, MINFLOAT * scale)
+        else:
+            self.exact[x] = True
+        old = self.matrix.item(x, y)
+        self.matrix[x, y] = weight
+        self.totals[x] += self.matrix.item(x, y) - old
+        self.samplers[x] = None
+        self.versions[x] = next(stamps)
+        
+# end of setters, getters
+
+
+    # rescale the probability matrix    
+    def rescale(self, line = -1):
+        """ Rescale the whole matrix, or one of the rows."""
+        
+        if self.shared:
+            self.unshare()
+        if line == -1:
+            # we rescale the probabilities of the whole matrix
+            self.matrix /= numpy.array(self.scales, dtype = self.dtype)[:, numpy.newaxis]
+            ProbMat.rescale(self)
+            return
+        
+        total = self.totals[line]
+        if self.exact[line] or not 1.0 / LAZYRANGE < total < LAZYRANGE:
+            # we rescale the probabilities of the row
+            row = self.matrix[line]
+            row /= self.scales[line]
+            rescaleRows(row)
+            self.scales[line] = self.totals[line] = self.summed[line] = float(row.sum())
+            self.exact[line] = False
+            self.samplers[line] = None
+        else:
+            # the total is summed again if most of it was subtracted since it was summed, it is not
+            # exact enough
+            if total < 0.5 * self.summed[line]:
+                total = self.totals[line] = self.summed[line] = float(self.matrix[line].sum())
+            # the probabilities of the other tiles decrease if the scale grows, the positive ones are
+            # raised to MINFLOAT
+            if total > self.scales[line]:
+                floor = MINFLOAT * total
+                for y, weight in enumerate(self.matrix[line].tolist()):
+                    if 0.0 < weight < floor:
+                        self.matrix[line, y] = floor
+                        total = total + floor - weight
+                        self.samplers[line] = None
+                self.totals[line] = total
+            # otherwise the weights do not change, the sampling tables stay valid
+            self.scales[line] = total
+        self.versions[line] = next(stamps)
+        
+        
+    # mark the whole matrix, or one of the rows as modified
+    def touch(self, line = -1):
+        """ See ProbMat.touch. If the whole matrix is modified, its totals are summed again, and the scales are reset. """
+        
+        ProbMat.touch(self, line)
+        if line == -1:
+            self.totals = self.matrix.sum(axis = 1, dtype = numpy.float64).tolist()
+            self.summed = list(self.totals)
+            self.scales = [1.0] * len(self.totals)
+            self.exact = [False] * len(self.totals)
+            self.view = None
+            
+
+
+# -----------------------------------------------------------------------------------------------------  
+# ------------------------------------------ LogProbMat class -----------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class LogProbMat(ProbMat):
+    """
+    Storing probability matrices as logarithms.
+    
+    Every row is stored as the logarithms of its probabilities (in lists, the walls are -inf), and
+    normalized by subtracting its log-sum-exp. Multiplying a tile (scaleMatrixItem, the ADABoost
+    learner) is an addition, and a probability never underflows: the logarithms are kept above
+    LOGMINIMUM, the smallest normal number of the matrix type instead of MINFLOAT. The getters and the
+    setters work on probabilities, like the ones of ProbMat, and the matrix of the probabilities is
+    computed only when it is asked for (only its modified rows).
+    
+    A row is rescaled like in ProbMat if one of its tiles is set to a negative value. Reading a tile
+    set to a negative value gives 0.0 until its row is rescaled.
+    
+    """
+    
+# setters, getters
+
+    # get the matrix of probabilities - modify it only through the setters
+    def getMatrix(self):
+        for x, version in enumerate(self.versions):
+            if not version == self.matrixVersions[x]:
+                if self.shared:
+                    self.unshare()
+                self.matrix[x] = [math.exp(value) for value in self.logs[x]]
+                self.matrixVersions[x] = version
+        return self.matrix
+        
+    # get a specified matrix item
+    def getMatrixItem(self, x, y):
+        return math.exp(self.logs[x][y])
+
+    # set a specified matrix item to a value
+    def setMatrixItem(self, x, y, value):
+        if value > 0.0:
+            self.logs[x][y] = math.log(value)
+        else:
+            self.logs[x][y] = NEGATIVEINFINITY
+        if value < 0.0:
+            self.negatives.setdefault(x, {})[y] = value
+        elif x in self.negatives:
+            self.negatives[x].pop(y, None)
+        self.samplers[x] = None
+        self.versions[x] = next(stamps)
+        
+    # multiply a specified matrix item by exp(exponent)
+    def scaleMatrixItem(self, x, y, exponent):
+        self.logs[x][y] += exponent
+        self.samplers[x] = None
+        self.versions[x] = next(stamps)
+        
+# end of setters, getters
+
+
+    # rescale the probability matrix    
+    def rescale(self, line = -1):
+        """ Rescale the whole matrix, or one of the rows."""
+        
+        if line == -1:
+            # we rescale every row
+            for x in range(len(self.logs)):
+                self.rescale(x)
+            return
+        
+        logs = self.logs[line]
+        if self.negatives.get(line):
+            # we rescale the probabilities of the row like ProbMat does
+            row = numpy.array([math.exp(value) for value in logs])
+            for y, value in self.negatives.pop(line).items():
+                row[y] = value
+            rescaleRows(row)
+            self.logs[line] = [math.log(value) if value > 0.0 else NEGATIVEINFINITY for value in row.tolist()]
+        else:
+            # we subtract the log-sum-exp of the row
+            top = max(logs)
+            total = top + math.log(sum([math.exp(value - top) for value in logs]))
+            self.logs[line] = [max(value - total, LOGMINIMUM) if value > NEGATIVEINFINITY else value for value in logs]
+        self.samplers[line] = None
+        self.versions[line] = next(stamps)
+        
+        
+    # mark the whole matrix, or one of the rows as modified
+    def touch(self, line = -1):
+        """ See ProbMat.touch. If the whole matrix is modified, its logarithms are computed again. """
+        
+        ProbMat.touch(self, line)
+        if line == -1:
+            self.logs = [[math.log(value) if value > 0.0 else NEGATIVEINFINITY for value in row] for row in self.matrix.tolist()]
+            self.negatives = {}
+            self.matrixVersions = list(self.versions)
+            
+            
+    # create the sampling table of the steps from a tile
+    def createSampler(self, x, y):
+        """ See ProbMat.createSampler. """
+        
+        steps = []
+        weights = []
+        for j, value in enumerate(self.logs[x + 1][y - 1:y + 2], y - 1):
+            if value > NEGATIVEINFINITY:
+                steps.append([x + 1, j])
+                weights.append(math.exp(value))
+        
+        return createAlias(steps, weights)
+        
+        
+
+
+# create a Walker alias table
+def createAlias(outcomes, weights):
+    """
+    Create a Walker alias table for drawing the outcomes with probabilities proportional to the weights.
+    
+    The table is a (number of outcomes, outcomes, thresholds, aliases) tuple, see sampleAlias.
+    """
+    
+    # scale the weights to an average of 1.0
+    n = len(weights)
+    summa = sum(weights)
+    scaled = [weight * n / summa for weight in weights]
+    thresholds = [1.0] * n
+    aliases = outcomes[:]
+    
+    # pair every outcome under the average with one above the average
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+        thresholds[less] = scaled[less]
+        aliases[less] = outcomes[more]
+        scaled[more] = scaled[more] + scaled[less] - 1.0
+        if scaled[more] < 1.0:
+            small.append(more)
+        else:
+            large.append(more)
+            
+    return (n, outcomes, thresholds, aliases)
+
+
+# draw from a Walker alias table
+def sampleAlias(sampler, rnd):
+    """ Returns an outcome from the alias table of createAlias, rnd is uniform on [0, 1). """
+    
+    n, outcomes, thresholds, aliases = sampler
+    rnd = rnd * n
+    i = int(rnd)
+    if rnd - i < thresholds[i]:
+        return outcomes[i]
+    return aliases[i]
+
+
+# the probabilities of Agent.decide's steps
+def stepProbabilities(matrix, prob, rows = None):
+    """
+    Returns the probabilities of the steps of Agent.decide from the tiles of the given rows.
+    
+    With probability prob the step is chosen by the matrix, otherwise uniformly from the possible
+    steps. The result is indexed by [row, column - 1, step]: the step goes to the column - 1, column,
+    column + 1 tiles of the next row. By default every row but the last is computed.
+    
+    """
+    
+    if rows is None:
+        rows = range(len(matrix) - 1)
+    size_x = matrix.shape[1] - 2
+    
+    # the three reachable tiles of every tile
+    nextRows = matrix[numpy.asarray(rows, dtype = int) + 1]
+    weights = numpy.concatenate([nextRows[:, i:i + size_x, numpy.newaxis] for i in range(3)], axis = 2)
+    
+    # remove the impossible steps
+    possible = weights > 0.0
+    weights = numpy.where(possible, weights, 0.0)
+    summa = weights.sum(axis = 2, keepdims = True)
+    count = possible.sum(axis = 2)[..., numpy.newaxis]
+    
+    # decide based on probabilities, or explore
+    with numpy.errstate(invalid = 'ignore', divide = 'ignore'):
+        steps = prob * weights / summa + (1.0 - prob) * possible / count
+    return numpy.where(summa > 0.0, steps, 0.0)
+    
+    
+# rescale the rows of a probability array in place
+def rescaleRows(rows):
+    """
+    Rescale every row of the array (along its last axis) to a probability distribution.
+    
+    Works on a single row, on a whole matrix, or on a stack of matrices. The first and last columns
+    are the walls of the board, they are left untouched.
+    """
+    
+    # get the minimum value of every row and add a small value to it
+    minimum = numpy.abs(rows.min(axis = -1, keepdims = True)) + MINFLOAT
+    # add this to every non-zero element of the rows
+    inner = rows[..., 1:-1]
+    numpy.add(inner, minimum, out = inner, where = inner != 0.0)
+    # and divide every element by the total value of its row
+    inner /= rows.sum(axis = -1, keepdims = True)
+    
+    
+# the ADABoost learner's multipliers
+def adaBoostFactor(epsilon):
+    """ Returns the multipliers of the ADABoost learning (4) for an array of epsilon values. """
+    
+    epsilon = numpy.where(epsilon < 0.5, 0.6, numpy.where(epsilon >= 1.0, 0.9, epsilon))
+    return numpy.exp((1.0/2.0) * numpy.log(((1.0 - epsilon) / epsilon)))
+    
+    
+# seed of an independent random stream
+def deriveSeed(*keys):
+    """
+    Returns a 64 bit seed derived from the keys (e.g. the seed of a run, a job and a game): the same
+    keys always give the same seed, different keys give independent ones.
+    """
+    
+    digest = hashlib.sha1('/'.join([str(key) for key in keys])).digest()
+    return struct.unpack('<Q', digest[:8])[0]
+    
+    
+# a row of a matrix as a list
+def toList(row):
+    """ Returns the row of a numpy array, or of a list of lists as a list. """
+    
+    if isinstance(row, numpy.ndarray):
+        return row.tolist()
+    return list(row)
+    
+    
+# project a vector onto the probability simplex
+def projectSimplex(values, floor = MINFLOAT):
+    """
+    Returns the nearest (in euclidean distance) probability distribution to the values, in which every
+    element is at least floor.
+    """
+    
+    n = len(values)
+    total = 1.0 - n * floor
+    # the threshold is found on the sorted values
+    ordered = numpy.sort(values - floor)[::-1]
+    cumulative = numpy.cumsum(ordered) - total
+    index = numpy.arange(1, n + 1)
+    count = index[ordered - cumulative / index > 0.0][-1]
+    threshold = cumulative[count - 1] / count
+    return numpy.maximum(values - floor - threshold, 0.0) + floor
+
+
+
+# -----------------------------------------------------------------------------------------------------  
+# ---------------------------------------- UniformStream class ----------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class UniformStream:
+    """
+    A random generator for the decisions of the players.
+    
+    The uniform numbers are drawn in blocks by numpy, and consumed one by one: random is the next
+    method of an iterator chaining the blocks, so a number is taken without calling any python code,
+    and the next block is drawn only when the actual one is used up. The first block after seeding is
+    small (a game uses only a few numbers, and the boards reseed the streams in every game), the next
+    ones double up to blockSize.
+    
+    """
+    
+    # init the stream
+    def __init__(self, seed = None, blockSize = UNIFORMBLOCK):
+        self.blockSize = blockSize
+        self.seed(seed)
+        
+        
+    # restart the stream
+    def seed(self, seed = None):
+        """ Restart the stream from the seed (any non-negative integer), or from the system's random source if None. """
+        
+        if seed is None:
+            self.generator = numpy.random.RandomState()
+        elif seed <= 0xffffffff:
+            self.generator = numpy.random.RandomState(seed)
+        else:
+            # numpy takes the larger seeds in 32 bit words
+            words = []
+            while seed > 0:
+                words.append(seed & 0xffffffff)
+                seed = seed >> 32
+            self.generator = numpy.random.RandomState(words)
+        self.size = UNIFORMFIRSTBLOCK / 2
+        self.random = itertools.chain.from_iterable(iter(self.nextBlock, None)).next
+        
+        
+    # draw the next block
+    def nextBlock(self):
+        self.size = min(2 * self.size, self.blockSize)
+        return self.generator.random_sample(self.size).tolist()
+        
+        
+    # a random element of a sequence
+    def choice(self, seq):
+        return seq[int(self.random() * len(seq))]
+
+
+
 # -----------------------------------------------------------------------------------------------------  
 # -------------------------------------------- Agent class --------------------------------------------
 # -----------------------------------------------------------------------------------------------------
 
 
-class Agent:
-    """A gaming agent."""
+class Agent(object):
+    """
+    A gaming agent.
+    
+    The attributes of the agents are slots, and the tiles of every decision are copied into the agent's
+    own [step, prediction] lists, so the steps don't allocate new objects for them, and the sampling
+    tables are never handed out.
+    
+    """
+    
+    __slots__ = ['x', 'y', 'wins', 'oppX', 'oppY', 'position_matrix', 'opponent_matrix', 'learnerStates',
+                 'random', 'learners', 'decision']
 
     # init the agent
     def __init__(self, x_koord = 0, y_koord = 0, opp_x = 0, opp_y = 0, pos_mat = ProbMat(5,8), opp_mat = ProbMat(5,8)):
@@ -204,6 +766,14 @@ class Agent:
         self.oppY = opp_y
         self.position_matrix = pos_mat
         self.opponent_matrix = opp_mat
+        # the states of the learners learning more than the matrices (e.g. 6), by learner
+        self.learnerStates = {}
+        # the random generator of the decisions, the random module by default
+        self.random = random
+        # the learning methods of the types of learning, the registered ones by default
+        self.learners = learners
+        # the last decision, its lists are overwritten by the next one
+        self.decision = [[0, 0], [0, 0]]
 
 
 # setters, getters
@@ -242,6 +812,10 @@ class Agent:
     def setPosMatItem(self, x, y, value):
         self.position_matrix.setMatrixItem(x, y, value)
 
+    # multiply the position matrix specified element by exp(exponent)
+    def scalePosMatItem(self, x, y, exponent):
+        self.position_matrix.scaleMatrixItem(x, y, exponent)
+
     # rescale position matrix
     def rescalePosMat(self, line = - 1):
         self.position_matrix.rescale(line)
@@ -262,6 +836,10 @@ class Agent:
     def setOppMatItem(self, x, y, value):
         self.opponent_matrix.setMatrixItem(x, y, value)
         
+    # multiply the opponent's matrix specified element by exp(exponent)
+    def scaleOppMatItem(self, x, y, exponent):
+        self.opponent_matrix.scaleMatrixItem(x, y, exponent)
+        
     # rescale opponent's matrix
     def rescaleOppMat(self, line = - 1):
         self.opponent_matrix.rescale(line)
@@ -285,30 +863,37 @@ class Agent:
     # increase the number of wins
     def incWins(self):
         self.wins = self.wins + 1
+        
+    # get the random generator
+    def getRandom(self):
+        return self.random
+    
+    # set the random generator (UniformStream, random.Random instance, or anything with random() and choice())
+    def setRandom(self, generator):
+        self.random = generator
+        
+    # get the learning methods, a type of learning: Learner dictionary
+    def getLearners(self):
+        return self.learners
+    
+    # set the learning methods (see registerLearner)
+    def setLearners(self, learners):
+        self.learners = learners
 
 # end of setters, getters        
     
     
     # Save strategy to a file
-    def saveStrategy(self, filename):
-        """ Save probability matrices to a file. """
+    def saveStrategy(self, filename, learner = -1):
+        """
+        Save probability matrices to a file.
+        
+        The format is selected by the extension: .mbin files are binary, and store the type of
+        learning, the number of wins and the name of the file (cut to NAMESIZE characters) too,
+        every other file is a text (.mstr) file.
+        """
         try:
-            outfile = open(filename,'w')
-            outfile.write("# player move\n")
-            for line in self.getPosMat():
-                for i, elem in enumerate(line):
-                    if i < len(line) - 1:
-                        outfile.write(str(elem) + ', ')
-                    else:
-                        outfile.write(str(elem) + '\n')
-            outfile.write("# player pred\n")
-            for line in self.getOppMat():
-                for i, elem in enumerate(line):
-                    if i < len(line) - 1:
-                        outfile.write(str(elem) + ', ')
-                    else:
-                        outfile.write(str(elem) + '\n')
-            outfile.close()
+            writeStrategy(filename, Strategy(self.getPosMat(), self.getOppMat(), learner, self.getWins(), strategyName(filename)[:NAMESIZE]))
             print "Saved to " + filename
         except:
             print "Could not save strategy!"
@@ -317,23 +902,12 @@ class Agent:
       
     # Load strategy from a file    
     def loadStrategy(self, filename, nolog = 0):
-        """ Load probability matrices from a file. """
+        """ Load probability matrices from a file (.mstr, .mbin or archive.mlib#name), through the strategy cache. """
         try:
-            infile = open(filename, 'r')
-            problist = infile.readlines()
-            infile.close()
-            temp = [[], []]
-            current = -1
-            actlist = temp[current]
-            for line in problist:
-                if line[0] == '#':
-                    current += 1  
-                    actlist = temp[current]
-                else:
-                    actlist.append(map(float, line.rstrip().split(', ')))
-                    
-            self.setPosMat(temp[0])
-            self.setOppMat(temp[1])
+            # the cached matrices are shared, the ProbMats copy them only if they are modified
+            strategy = readCachedStrategy(filename)
+            self.position_matrix.shareMatrix(strategy.getPosMat())
+            self.opponent_matrix.shareMatrix(strategy.getOppMat())
             if nolog == 0:
                 print "Loaded from " + filename
         except:
@@ -344,7 +918,7 @@ class Agent:
     # special thanks to Eli Bendersky for the Weighted random generation benchmarks!
     # http://eli.thegreenplace.net/2010/01/22/weighted-random-generation-in-python/
     def weighted_choice_sub(self, weights):
-        rnd = random.random() * sum(weights)
+        rnd = self.random.random() * sum(weights)
         for i, w in enumerate(weights):
             rnd -= w
             if rnd < 0:
@@ -354,63 +928,43 @@ class Agent:
     
     # where should I step? Where would the opponent step?   
     def decide(self, prob = 1.0):
-        """ Make a decision based on probabilities. """
-        
-        # create an empty decision
-        dec = []
+        """ Make a decision based on probabilities. The returned list is overwritten by the next decision. """
         
         try:
-            # create a list for the possible step's probability
-            pos_list = [self.position_matrix.getMatrixItem(self.x + 1, self.y - 1) * 100, self.position_matrix.getMatrixItem(self.x + 1, self.y) * 100,\
-            self.position_matrix.getMatrixItem(self.x + 1, self.y + 1) * 100]
-            # and for the positions
-            pos_l = [[self.x + 1, self.y - 1], [self.x + 1, self.y], [self.x + 1, self.y + 1]]
-            # remove the impossible steps
-            for i in range(len(pos_list) - 1, -1, -1):
-                if pos_list[i] <= 0.0:
-                    del pos_l[i]
-                    del pos_list[i]
-           
-            # create a list for the opponent's step's probability
-            opp_list = [self.opponent_matrix.getMatrixItem(self.oppX + 1, self.oppY - 1) * 100, self.opponent_matrix.getMatrixItem(self.oppX + 1, self.oppY) * 100,\
-            self.opponent_matrix.getMatrixItem(self.oppX + 1, self.oppY + 1) * 100]
-            # and for the positions
-            opp_l = [[self.oppX + 1, self.oppY - 1], [self.oppX + 1, self.oppY], [self.oppX + 1, self.oppY + 1]]
-            # remove the impossible steps
-            for i in range(len(opp_list) - 1, -1, -1):
-                if opp_list[i] <= 0.0:
-                    del opp_l[i]
-                    del opp_list[i]
-           
+            # get the sampling tables of the possible steps
+            pos_sampler = self.position_matrix.getSampler(self.x, self.y)
+            # and of the opponent's possible steps
+            opp_sampler = self.opponent_matrix.getSampler(self.oppX, self.oppY)
         except:
             print self.x, self.y, self.oppX, self.oppY
-            self.position_matrix.setMatrixItem(self.x, self.y, 'x')
             for act in self.position_matrix.getMatrix():
                 print act
-            self.opponent_matrix.setMatrixItem(self.oppX, self.oppY, 'x')
             for act in self.opponent_matrix.getMatrix():
                 print act
             raise
     
-        # if we don't explore the gamespace
-        if(random.random() < prob):
+        # if we don't explore the gamespace (with prob = 1.0 we never do, no number is drawn for it)
+        uniform = self.random.random
+        if(prob >= 1.0 or uniform() < prob):
             # create the next step based on probabilities
-            dec.append(pos_l[self.weighted_choice_sub(pos_list)])
+            pos = sampleAlias(pos_sampler, uniform())
         else:
             # choose randomly
-            decision = random.choice(pos_l)
-            dec.append(decision)
+            pos = self.random.choice(pos_sampler[1])
     
         # if we don't explore the gamespace
-        if(random.random() < prob):
+        if(prob >= 1.0 or uniform() < prob):
             # create the opponent's next step based on probabilities
-            dec.append(opp_l[self.weighted_choice_sub(opp_list)])
+            opp = sampleAlias(opp_sampler, uniform())
         else:
             # choose randomly
-            decision = random.choice(opp_l)
-            dec.append(decision)
+            opp = self.random.choice(opp_sampler[1])
                        
-        return dec
+        # copied, the tiles of the sampling tables are not handed out
+        decision = self.decision
+        decision[0][0], decision[0][1] = pos
+        decision[1][0], decision[1][1] = opp
+        return decision
   
   
     # manually set the decision, if the setup is valid
@@ -445,513 +999,1021 @@ class Agent:
     def learn(self, iCanStep, oppCanStep, myMove, oppMove, learningConstant, typeOfLearning):
         """ Learning from the actual step. 
         
-        Modifies the corresponding probabilities based on different learning algorithms. To maintain the
-        probabilistic nature of the game's matrix, rescale the modified row.
+        Modifies the corresponding probabilities with the learner of the type of learning (see
+        registerLearner). To maintain the probabilistic nature of the game's matrix, the learners
+        rescale the modified rows.
         
         """
-
-        # - 0 -        
-        # Learning method NULL
-        # Do not learn anything!
-        if typeOfLearning == 0:
-            pass
-        
         
-        # - 1 -
-        # Learning method v1
-        # lame learning: modify the probability matrix by increasing / decreasing the
-        # corresponding probability by 10 %
-        elif typeOfLearning == 1:
-            if iCanStep == 1 and oppCanStep == 1:
-                # inc p1 dest, dec p1 pred
-                temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) * 1.1
-                self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-                
-                temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) * 0.9
-                self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-            
-            elif iCanStep == 1 and oppCanStep == 0:
-                # inc p1 dest, inc p1 pred
-                temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) * 1.1
-                self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-                
-                temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) * 1.1
-                self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
+        try:
+            learner = self.learners[typeOfLearning]
+        except KeyError:
+            learner = getLearner(typeOfLearning, self.learners)
+        try:
+            learner.learn(self, iCanStep, oppCanStep, myMove, oppMove, learningConstant)
+        except:
+            print myMove
+            raise
             
-            elif iCanStep == 0 and oppCanStep == 1:
-                # dec p1 dest, dec p1 pred
-                temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) * 0.9
-                self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-                
-                temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) * 0.9
-                self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
             
-            elif iCanStep == 0 and oppCanStep == 0:
-                # dec p1 dest, inc p1 pred
-                temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) * 0.9
-                self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-                
-                temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) * 1.1
-                self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-
-            # rescaling to get probabilities instead of weights
-            try:
-                actline = myMove[0][0]
-                self.rescalePosMat(actline)
-                actline = myMove[1][0]
-                self.rescaleOppMat(actline)    
-            except:
-                print myMove[0][0], myMove[1][0]
-                raise    
-        
-        
-        # Learning method v2
-        # neural learning: modify the probability matrix according to the backpropagation
-        # learning rule -> w(k) = w(k-1) + alpha * error * SUM(x_i)
-        # in this case:
-        # x_i = predecessors probability
-        # error = -1 if wrong, 1 in other case
-        # alpha = learningConstant
-        # temp = alpha * error * SUM(x_i)
-        elif typeOfLearning == 2:
-            try:
-                if iCanStep == 1 and oppCanStep == 1:
-                    # p1 dest inc, dec p1 pred
-                    temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) + learningConstant * (1) * \
-                                (self.getPosMatItem(myMove[0][0] - 1, myMove[0][1] - 1) + \
-                                 self.getPosMatItem(myMove[0][0] - 1, myMove[0][1]) + \
-                                 self.getPosMatItem(myMove[0][0] - 1, myMove[0][1] + 1))
-                    self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-                    
-                    temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) + learningConstant * (-1) * \
-                                (self.getOppMatItem(myMove[1][0] - 1, myMove[1][1] - 1) + \
-                                 self.getOppMatItem(myMove[1][0] - 1, myMove[1][1]) + \
-                                 self.getOppMatItem(myMove[1][0] - 1, myMove[1][1] + 1))
-                    self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-                
-                elif iCanStep == 1 and oppCanStep == 0:
-                    # p1 dest inc, p1 pred inc
-                    temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) + learningConstant * (1) * \
-                                (self.getPosMatItem(myMove[0][0] - 1, myMove[0][1] - 1) + \
-                                 self.getPosMatItem(myMove[0][0] - 1, myMove[0][1]) + \
-                                 self.getPosMatItem(myMove[0][0] - 1, myMove[0][1] + 1))
-                    self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-                
-                    temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) + learningConstant * (1) * \
-                                (self.getOppMatItem(myMove[1][0] - 1, myMove[1][1] - 1) + \
-                                 self.getOppMatItem(myMove[1][0] - 1, myMove[1][1]) + \
-                                 self.getOppMatItem(myMove[1][0] - 1, myMove[1][1] + 1))
-                    self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-                
-                elif iCanStep == 0 and oppCanStep == 1:
-                    # dec p1 dest, dec p1 pred
-                    temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) + learningConstant * (-1) * \
-                                (self.getPosMatItem(myMove[0][0] - 1, myMove[0][1] - 1) + \
-                                 self.getPosMatItem(myMove[0][0] - 1, myMove[0][1]) + \
-                                 self.getPosMatItem(myMove[0][0] - 1, myMove[0][1] + 1))
-                    self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-
-                    temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) + learningConstant * (-1) * \
-                                (self.getOppMatItem(myMove[1][0] - 1, myMove[1][1] - 1) + \
-                                 self.getOppMatItem(myMove[1][0] - 1, myMove[1][1]) + \
-                                 self.getOppMatItem(myMove[1][0] - 1, myMove[1][1] + 1))
-                    self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-                    
-                elif iCanStep == 0 and oppCanStep == 0:
-                    # dec p1 dest, p1 pred inc 
-                    temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) + learningConstant * (-1) * \
-                                (self.getPosMatItem(myMove[0][0] - 1, myMove[0][1] - 1) + \
-                                 self.getPosMatItem(myMove[0][0] - 1, myMove[0][1]) + \
-                                 self.getPosMatItem(myMove[0][0] - 1, myMove[0][1] + 1))
-                    self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-
-                    temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) + learningConstant * (1) * \
-                                (self.getOppMatItem(myMove[1][0] - 1, myMove[1][1] - 1) + \
-                                 self.getOppMatItem(myMove[1][0] - 1, myMove[1][1]) + \
-                                 self.getOppMatItem(myMove[1][0] - 1, myMove[1][1] + 1))
-                    self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-
-                # rescaling to get probabilities instead of weights
-                try:
-                    actline = myMove[0][0]
-                    self.rescalePosMat(actline)
-                    actline = myMove[1][0]
-                    self.rescaleOppMat(actline)    
-                except:
-                    print myMove[0][0], myMove[1][0]
-                    raise    
-
-            except:
-                print myMove
-                raise
-        
-        
-        # - 3 -
-        # Learning method v3
-        # neural learning v2: modify the probability matrix according to the backpropagation
-        # learning rule -> w(k) = w(k-1) + alpha * error * x_previous
-        # in this case:
-        # x_previous = predecessor's probability
-        # error = -1 if wrong, 0 in other case
-        # alpha = learningConstant
-        # temp = alpha * error * x_previous        
-        elif typeOfLearning == 3:
-            try:
-                if iCanStep == 1 and oppCanStep == 1:
-                    # p1 dest inc, dec p1 pred
-                    temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) + learningConstant * (1) * \
-                                self.getPosMatItem(self.getOwnCoord()[0],self.getOwnCoord()[1])
-                    self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-                    
-                    temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) + learningConstant * (-1) * \
-                                self.getOppMatItem(self.getOppCoord()[0],self.getOppCoord()[1])
-                    self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-                
-                elif iCanStep == 1 and oppCanStep == 0:
-                    # p1 dest inc, p1 pred inc
-                    temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) + learningConstant * (1) * \
-                                self.getPosMatItem(self.getOwnCoord()[0],self.getOwnCoord()[1])
-                    self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-                    
-                    temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) + learningConstant * (1) * \
-                                self.getOppMatItem(self.getOppCoord()[0],self.getOppCoord()[1])
-                    self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-                
-                elif iCanStep == 0 and oppCanStep == 1:
-                    # dec p1 dest, dec p1 pred
-                    temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) + learningConstant * (-1) * \
-                                self.getPosMatItem(self.getOwnCoord()[0],self.getOwnCoord()[1])
-                    self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-
-                    temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) + learningConstant * (-1) * \
-                                self.getOppMatItem(self.getOppCoord()[0],self.getOppCoord()[1])
-                    self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-                    
-                elif iCanStep == 0 and oppCanStep == 0:
-                    # dec p1 dest, p1 pred inc 
-                    temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) + learningConstant * (-1) * \
-                                self.getPosMatItem(self.getOwnCoord()[0],self.getOwnCoord()[1])
-                    self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-                    
-                    temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) + learningConstant * (1) * \
-                                self.getOppMatItem(self.getOppCoord()[0],self.getOppCoord()[1])
-                    self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-                
-                
-                # rescaling to get probabilities instead of weights    
-                try:
-                    actline = myMove[0][0]
-                    self.rescalePosMat(actline)
-                    actline = myMove[1][0]
-                    self.rescaleOppMat(actline)    
-                except:
-                    print myMove[0][0], myMove[1][0]
-                    raise    
-                        
-            except:
-                print myMove
-                raise
-                
+    # learn from the finished game
+    def learnFromGame(self, typeOfLearning):
+        """ Learning from the finished game, with the learner of the type of learning (see registerLearner). """
+        
+        getLearner(typeOfLearning, self.learners).learnFromGame(self)
         
-        # - 4 -        
-        # Learning method v4
-        # ADABoost weighting - Use a weight modification similar to ADABoost weight modification
-        # To work appropriately, we have to invert the rule: If the step went well, inrease probability
-        # if not, decrease probability. So we will remove the (-1) multiplicator from the equation.
-        #
-        # ADABoost terminology:
-        # h_t(x_i) - decision
-        # y(i) - real outcome
-        # D_t(i) - actual weight
-        # D_t+1(i) - next weight
-        # epsilon_t - weighted error rate
-        # Z_t - normalization factor
-        # I - indicator function
-        # epsilon_t = SUM_i=1^m (D_t(i) * I(y(i) = h_t(x_i)))
-        # alpha_t = (1 / 2) * ln((1 - epsilon_t) / epsilon_t)
-        # Z_t = SUM_i (D_t(i) * exp(-1 * alpha_t * y_i * h_t(x_i)))
-        # D_t+1(i) = (D_t(i) * exp(-1 * alpha_t * y_i * h_t(x_i))) / Z_t
-        #
-        # implemented method:
-        # - if my step was predicted:
-        #       epsilon = SUM_i=1^3 (w(i))
-        # - if my prediction was wrong:
-        #       epsilon = w(my_pred) + w(opp_step)
-        # - if epsilon < 0.5, add 0.5 to epsilon
-        #       epsilon = epsilon + 0.5
-        #
-        # - instead of the y_i - h_t(x_i) pair, we only care about wrong elements:
-        #       indicator = +1
-        #
-        # rescale with the same method as the other learning methods, instead of the division of Z_t
-        #
-        # learning rule -> w(k+1) = w(k) * exp(indicator * (1/2) * ln ((1 - epsilon) / epsilon))
-        elif typeOfLearning == 4:
-            try:
-                if iCanStep == 1 and oppCanStep == 1:
-                    # p1 dest does not change, dec p1 pred
-                    epsilon = self.getOppMatItem(myMove[1][0], myMove[1][1]) + self.getOppMatItem(oppMove[0][0], oppMove[0][1])
-                    if epsilon < 0.5:
-                        epsilon = 0.6
-                    elif epsilon >= 1.0:
-                        epsilon = 0.9
-                    temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) * math.exp((1.0/2.0) * math.log(((1.0 - epsilon) / epsilon)))
-                    self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-                    # rescale
-                    actline = myMove[1][0]
-                    self.rescaleOppMat(actline)
-                    
-                elif iCanStep == 1 and oppCanStep == 0:
-                    # p1 dest does not change, p1 pred does not change
-                    pass
-
-                elif iCanStep == 0 and oppCanStep == 1:
-                    # dec p1 dest, dec p1 pred
-                    weights = [self.getPosMatItem(self.getOwnCoord()[0] + 1, self.getOwnCoord()[1] - 1), \
-                               self.getPosMatItem(self.getOwnCoord()[0] + 1, self.getOwnCoord()[1]), \
-                               self.getPosMatItem(self.getOwnCoord()[0] + 1, self.getOwnCoord()[1] + 1)]
-                    epsilon = sum(weights)  
-                    if epsilon < 0.5:
-                        epsilon = 0.6
-                    elif epsilon >= 1.0:
-                        epsilon = 0.9
-                    temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) * math.exp((1.0/2.0) * math.log(((1.0 - epsilon) / epsilon)))
-                    self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-
-                    epsilon = self.getOppMatItem(myMove[1][0], myMove[1][1]) + self.getOppMatItem(oppMove[0][0], oppMove[0][1])
-                    if epsilon < 0.5:
-                        epsilon = 0.6
-                    elif epsilon >= 1.0:
-                        epsilon = 0.9
-                    temp = self.getOppMatItem(myMove[1][0], myMove[1][1]) * math.exp((1.0/2.0) * math.log(((1.0 - epsilon) / epsilon)))
-                    self.setOppMatItem(myMove[1][0], myMove[1][1], temp)
-                    # rescale
-                    actline = myMove[0][0]
-                    self.rescalePosMat(actline)
-                    actline = myMove[1][0]
-                    self.rescaleOppMat(actline)
-                    
-                elif iCanStep == 0 and oppCanStep == 0:
-                    # dec p1 dest, p1 pred does not change  
-                    weights = [self.getPosMatItem(self.getOwnCoord()[0] + 1, self.getOwnCoord()[1] - 1), \
-                               self.getPosMatItem(self.getOwnCoord()[0] + 1, self.getOwnCoord()[1]), \
-                               self.getPosMatItem(self.getOwnCoord()[0] + 1, self.getOwnCoord()[1] + 1)]
-                    epsilon = sum(weights)
-                    if epsilon < 0.5:
-                        epsilon = 0.6
-                    elif epsilon >= 1.0:
-                        epsilon = 0.9
-                    temp = self.getPosMatItem(myMove[0][0], myMove[0][1]) * math.exp((1.0/2.0) * math.log(((1.0 - epsilon) / epsilon)))
-                    self.setPosMatItem(myMove[0][0], myMove[0][1], temp)
-                    # rescale
-                    actline = myMove[0][0]
-                    self.rescalePosMat(actline)
-                        
-            except:
-                print myMove
-                raise
-                
         
-        # - 5 -
-        # Learning method v5
-        # Naive Bayes method based method - Estimate the probabilities based on the observations. In the beginning we assume that 
-        # each line is a random variable which have 5 different value, and the probability of these values follows the universal 
-        # distribution. During the steps we observe the outcome of our decisions, and modify our assumption.
-        # 
-        # Naive Bayes terminology:
-        #   P = N_i / N
-        #   N_i - number of occurence of the i^th value
-        #   N   - number of the occurences of all values
-        #
-        # Implemented method:
-        # Initial state:
-        #   All of the N_i = 1
-        #   Compute the probabilities for all of the values.
-        # 
-        # After each step:
-        #   Compute the N_i, N values for the actual lines from the probabilities:
-        #       From every decimal, get the fractal values
-        #       Get the least common multiple to get the common denominator (N)
-        #       From common denominator, get the numerators (N_i)
-        #
-        #   If we can step:
-        #       increase the N_i for the value, where we stepped to.
-        #   If we predicted the opponent's step:
-        #       increase the N_i for the value, which we predicted.
-        #
-        #   If we couldn't step:
-        #       increase the N, but only for the value, where we stepped to.
-        #   If we missed the opponent's step:
-        #       increase the N, but only for the value, which we predicted.
-        #
-        # def learn(self, iCanStep, oppCanStep, myMove, oppMove, learningConstant, typeOfLearning)
-        elif typeOfLearning == 5:
-            try:
-            
-            # create lists
-                # create a list for the possible steps
-                steps = []
-                steps_index = []
-                # first element: actual step
-                steps.append(self.getPosMatItem(myMove[0][0], myMove[0][1]))
-                steps_index.append(0)
-                # if existst, add the element on the left
-                if not self.getPosMatItem(myMove[0][0], myMove[0][1] - 1) == 0.0:
-                    steps.append(self.getPosMatItem(myMove[0][0], myMove[0][1] - 1))
-                    steps_index.append(-1)
-                # if exists, add the element on the right
-                if not self.getPosMatItem(myMove[0][0], myMove[0][1] + 1) == 0.0:
-                    steps.append(self.getPosMatItem(myMove[0][0], myMove[0][1] + 1))
-                    steps_index.append(+1)
-                    
-                # create a list for the possible preds
-                preds = []
-                preds_index = []
-                # first element: actual pred
-                preds.append(self.getOppMatItem(myMove[1][0], myMove[1][1]))
-                preds_index.append(0)
-                # if existst, add the element on the left
-                if not self.getOppMatItem(myMove[1][0], myMove[1][1] - 1) == 0.0:
-                    preds.append(self.getOppMatItem(myMove[1][0], myMove[1][1] - 1))
-                    preds_index.append(-1)
-                # if exists, add the element on the right
-                if not self.getOppMatItem(myMove[1][0], myMove[1][1] + 1) == 0.0:
-                    preds.append(self.getOppMatItem(myMove[1][0], myMove[1][1] + 1))
-                    preds_index.append(+1)
-                    
-            # get the fractal values
-                # create two temporary list for steps and for pred
-                temp_step = []
-                temp_pred = []                
-                
-                # get the fractions, and put them into the temp. lists
-                for elem in steps:
-                    temp_step.append(Fraction(elem))
-                    
-                for elem in preds:
-                    temp_pred.append(Fraction(elem))
-                    
-                # get least common multiples
-                lcm_step = temp_step[0].denominator
-                if len(temp_step) == 3:
-                    lcm_step = self.lcm(lcm_step, self.lcm(temp_step[1].denominator, temp_step[2].denominator))
-                elif len(temp_step) == 2:
-                    lcm_step = self.lcm(lcm_step, temp_step[1].denominator)
-
-                lcm_pred = temp_pred[0].denominator
-                if len(temp_pred) == 3:
-                    lcm_pred = self.lcm(lcm_pred, self.lcm(temp_pred[1].denominator, temp_pred[2].denominator))
-                elif len(temp_pred) == 2:
-                    lcm_pred = self.lcm(lcm_pred, temp_pred[1].denominator)
-
-            # modify values according the outcome
-                if iCanStep == 1 and oppCanStep == 1:
-                    # inc p1 step, dec p1 pred
-                    temp_step[0] = Fraction(int(temp_step[0].numerator * 1.1), temp_step[0].denominator)
-                    temp_pred[0] = Fraction(temp_pred[0].numerator, int(temp_pred[0].denominator * 1.1))
-    
-                elif iCanStep == 1 and oppCanStep == 0:
-                    # inc p1 step, inc p1 pred
-                    temp_step[0] = Fraction(int(temp_step[0].numerator * 1.1), temp_step[0].denominator)
-                    temp_pred[0] = Fraction(int(temp_pred[0].numerator * 1.1), temp_pred[0].denominator)
-                    
-                elif iCanStep == 0 and oppCanStep == 1:
-                    # dec p1 step, dec p1 pred
-                    temp_step[0] = Fraction(temp_step[0].numerator, int(temp_step[0].denominator * 1.1))
-                    temp_pred[0] = Fraction(temp_pred[0].numerator, int(temp_pred[0].denominator * 1.1))
-                 
-                elif iCanStep == 0 and oppCanStep == 0:
-                    # dec p1 step, inc p1 pred
-                    temp_step[0] = Fraction(temp_step[0].numerator, int(temp_step[0].denominator * 1.1))
-                    temp_pred[0] = Fraction(int(temp_pred[0].numerator * 1.1), temp_pred[0].denominator)                    
-                
-
-            # convert fractions back
-                steps = []
-                for elem in temp_step:
-                    steps.append((float(elem.numerator) * float(lcm_step)/float(elem.denominator))/float(lcm_step))   
-
-                preds = []
-                for elem in temp_pred:
-                    preds.append((float(elem.numerator) * float(lcm_pred)/float(elem.denominator))/float(lcm_pred)) 
-                
-
-
-
-                # setposmatitems
-                for id, elem in enumerate(steps):
-                    self.setPosMatItem(myMove[0][0], myMove[0][1] + steps_index[id], elem)
-                # setoppmatitems
-                for id, elem in enumerate(preds):
-                    self.setOppMatItem(myMove[1][0], myMove[1][1] + preds_index[id], elem)
-                
-                # rescale
-                actline = myMove[0][0]
-                self.rescalePosMat(actline)
-                actline = myMove[1][0]
-                self.rescaleOppMat(actline)
-                   
-            except:
-                print myMove
-                raise
-                
-                
-        # gradient descent method     
-        # based on KLDiv: KLDiv(P, Q) = p_i * ln(p_i / q_i)   
-        # from here we get: F(x) = x * ln(x / y)
-        # so the learning rule is:
-        #   w(k+1) = w(k) - gamma * (ln(w(k) / y) + 1)
-        elif typeOfLearning == 6:
-            try:
-                pass
-                
-            
-            except:
-                print myMove
-                raise
-            
-        else:
-            print 'There\'s no such learning method!\nRead the documentation for details!'
-            raise
-  
-
 # -----------------------------------------------------------------------------------------------------  
 # ----------------------------------------- MarkovAgent class -----------------------------------------
 # -----------------------------------------------------------------------------------------------------
 
 class MarkovAgent(Agent):
+    """
+    A gaming agent compiled into a Markov chain.
+    
+    The agent's two matrices are compiled into the transition matrix of the game over the board states
+    (own tile, opponent's tile). In the agent's model the opponent steps by the opponent's matrix, and
+    every step is predicted by the same distribution it is drawn from: the agent blocks the opponent if
+    its prediction is right, and the opponent blocks the agent the same way. Every state has at most
+    16 successors, so the matrix is stored in a sparse form: a [state, successor] table of target states
+    and one of probabilities. The successors are:
+        0 .. 8   - both players step (own step * 3 + opponent's step)
+        9 .. 11  - only the agent steps
+        12 .. 14 - only the opponent steps
+        15       - nobody steps
+    
+    Decisions are drawn from the compiled form with one table lookup and one random number. When the
+    agent learns, only the states of the modified rows are compiled again.
     
+    """
+    
+    __slots__ = ['compiledProb', 'compiledShape', 'posVersions', 'oppVersions', 'sizeX', 'sizeY', 'numberOfTiles',
+                 'stateX', 'stateY', 'stateOppX', 'stateOppY', 'final', 'targets', 'transitions', 'stages',
+                 'posSteps', 'oppSteps', 'samplers']
+    
+    # init the agent
     def __init__(self, x_koord = 0, y_koord = 0, opp_x = 0, opp_y = 0, pos_mat = ProbMat(5,8), opp_mat = ProbMat(5,8)):
-        Agent.__init__(self, x_koord = x_koord, y_koord = x_koord, opp_x = opp_x, opp_y = opp_y, pos_mat = pos_mat, opp_mat = pos_mat)
+        Agent.__init__(self, x_koord = x_koord, y_koord = y_koord, opp_x = opp_x, opp_y = opp_y, pos_mat = pos_mat, opp_mat = opp_mat)
+        self.compiledProb = None
+        self.compiledShape = None
         
+        
+# setters, getters
 
-
-
-
-
-
-  
-
-# -----------------------------------------------------------------------------------------------------  
-# -------------------------------------------- Board class --------------------------------------------
-# -----------------------------------------------------------------------------------------------------
-
-
-
-class Board:
-    """GameBoard - Plays the game."""
+    # get the index of a state
+    def getStateIndex(self, x, y, opp_x, opp_y):
+        return (x * self.sizeX + y - 1) * self.numberOfTiles + opp_x * self.sizeX + opp_y - 1
     
+    # get the transition matrix: the target states and the probabilities of every state's successors
+    def getTransitionMatrix(self, prob = 1.0):
+        self.compile(prob)
+        return self.targets, self.transitions
     
-    # init the game
-    def __init__(self, size_x = 5, size_y = 8, beta = 0.5, human = 0):
-        self.beta = beta
-        self.sizeX = size_x
-        self.sizeY = size_y
+# end of setters, getters
+    
+    
+    # compile the matrices into the transition matrix
+    def compile(self, prob = 1.0):
+        """
+        Compile the modified rows of the matrices into the transition matrix.
+        
+        Everything is compiled, if the exploring probability or the size of the matrices has changed.
+        """
+        
+        pos = self.position_matrix
+        opp = self.opponent_matrix
+        shape = pos.getMatrix().shape
+        
+        if not prob == self.compiledProb or not shape == self.compiledShape:
+            self.compileStates(shape)
+            self.compiledProb = prob
+            posRows = oppRows = range(shape[0] - 1)
+        else:
+            # the tiles of a row step into the next row
+            posRows = [i - 1 for i in range(1, shape[0]) if not pos.versions[i] == self.posVersions[i]]
+            oppRows = [i - 1 for i in range(1, shape[0]) if not opp.versions[i] == self.oppVersions[i]]
+            if len(posRows) == 0 and len(oppRows) == 0:
+                return
+        self.posVersions = list(pos.versions)
+        self.oppVersions = list(opp.versions)
+        
+        # the probabilities of the steps from the modified rows
+        if len(posRows) > 0:
+            self.posSteps[posRows] = stepProbabilities(pos.getMatrix(), prob, posRows)
+        if len(oppRows) > 0:
+            self.oppSteps[oppRows] = stepProbabilities(opp.getMatrix(), prob, oppRows)
+        
+        # the states affected by the modified rows, without the game over states
+        affected = (numpy.in1d(self.stateX, posRows) | numpy.in1d(self.stateOppX, oppRows)) & ~self.final
+        states = numpy.flatnonzero(affected)
+        
+        # the player steps to a tile if it's not predicted, or stays
+        own = self.posSteps[self.stateX[states], self.stateY[states] - 1]
+        other = self.oppSteps[self.stateOppX[states], self.stateOppY[states] - 1]
+        ownMove = own * (1.0 - own)
+        ownStay = (own * own).sum(axis = 1)
+        otherMove = other * (1.0 - other)
+        otherStay = (other * other).sum(axis = 1)
+        
+        self.transitions[states, 0:9] = (ownMove[:, :, numpy.newaxis] * otherMove[:, numpy.newaxis, :]).reshape(-1, 9)
+        self.transitions[states, 9:12] = ownMove * otherStay[:, numpy.newaxis]
+        self.transitions[states, 12:15] = ownStay[:, numpy.newaxis] * otherMove
+        self.transitions[states, 15] = ownStay * otherStay
+        
+        # the decisions of the affected states must be sampled again
+        for state in states.tolist():
+            self.samplers[state] = None
+            
+            
+    # compile the states of the board
+    def compileStates(self, shape):
+        """ Create the states of the board, and their possible successors. """
+        
+        self.compiledShape = shape
+        self.sizeY = shape[0]
+        self.sizeX = shape[1] - 2
+        self.numberOfTiles = self.sizeX * self.sizeY
+        numberOfStates = self.numberOfTiles * self.numberOfTiles
+        last = self.sizeY - 1
+        
+        # coordinates of the states
+        tiles = numpy.arange(numberOfStates)
+        self.stateX = (tiles / self.numberOfTiles) / self.sizeX
+        self.stateY = (tiles / self.numberOfTiles) % self.sizeX + 1
+        self.stateOppX = (tiles % self.numberOfTiles) / self.sizeX
+        self.stateOppY = (tiles % self.numberOfTiles) % self.sizeX + 1
+        self.final = (self.stateX == last) | (self.stateOppX == last)
+        
+        # coordinates of the successors
+        steps = NEIGHBOURS[numpy.newaxis, :]
+        x = numpy.minimum(self.stateX + 1, last)[:, numpy.newaxis]
+        y = self.stateY[:, numpy.newaxis] + steps
+        oppX = numpy.minimum(self.stateOppX + 1, last)[:, numpy.newaxis]
+        oppY = self.stateOppY[:, numpy.newaxis] + steps
+        stayX = self.stateX[:, numpy.newaxis]
+        stayY = self.stateY[:, numpy.newaxis]
+        stayOppX = self.stateOppX[:, numpy.newaxis]
+        stayOppY = self.stateOppY[:, numpy.newaxis]
+        
+        successors = [(numpy.repeat(x, 9, axis = 1), numpy.repeat(y, 3, axis = 1), numpy.tile(oppX, 9), numpy.tile(oppY, 3)),
+                      (numpy.tile(x, 3), y, numpy.tile(stayOppX, 3), numpy.tile(stayOppY, 3)),
+                      (numpy.tile(stayX, 3), numpy.tile(stayY, 3), numpy.tile(oppX, 3), oppY),
+                      (stayX, stayY, stayOppX, stayOppY)]
+        self.targets = numpy.concatenate([self.getStateIndex(*numpy.broadcast_arrays(*successor)) for successor in successors], axis = 1)
+        # steps to the walls are impossible, point them to the state itself
+        walls = numpy.concatenate([numpy.broadcast_to(successor[1] % (self.sizeX + 1) == 0, successor[1].shape) | \
+                                   numpy.broadcast_to(successor[3] % (self.sizeX + 1) == 0, successor[3].shape) \
+                                   for successor in successors], axis = 1)
+        self.targets = numpy.where(walls, tiles[:, numpy.newaxis], self.targets)
+        
+        # the game over states are absorbing
+        self.transitions = numpy.zeros((numberOfStates, 16))
+        self.transitions[self.final, 15] = 1.0
+        self.targets[self.final] = tiles[self.final, numpy.newaxis]
+        
+        # the states in the order of the game: the sum of the rows never decreases
+        progress = self.stateX + self.stateOppX
+        self.stages = [numpy.flatnonzero((progress == i) & ~self.final) for i in range(2 * last)]
+        
+        self.posSteps = numpy.zeros((self.sizeY, self.sizeX, 3))
+        self.oppSteps = numpy.zeros((self.sizeY, self.sizeX, 3))
+        self.samplers = [None] * numberOfStates
+        
+        
+    # where should I step? Where would the opponent step?
+    def decide(self, prob = 1.0):
+        """ Make a decision based on the compiled probabilities. The returned list is overwritten by the next decision. """
+        
+        if not prob == self.compiledProb or not self.position_matrix.versions == self.posVersions or \
+           not self.opponent_matrix.versions == self.oppVersions:
+            self.compile(prob)
+        
+        state = self.getStateIndex(self.x, self.y, self.oppX, self.oppY)
+        sampler = self.samplers[state]
+        if sampler is None:
+            sampler = self.samplers[state] = self.createSampler(state)
+        pos, opp = sampleAlias(sampler, self.random.random())
+        
+        # copied, the tiles of the sampling tables are not handed out
+        decision = self.decision
+        decision[0][0], decision[0][1] = pos
+        decision[1][0], decision[1][1] = opp
+        return decision
+        
+        
+    # create the sampling table of the decisions in a state
+    def createSampler(self, state):
+        """ Create a Walker alias table for the (step, prediction) pairs of a state. """
+        
+        x, y = self.stateX[state], self.stateY[state]
+        oppX, oppY = self.stateOppX[state], self.stateOppY[state]
+        own = self.posSteps[x, y - 1].tolist()
+        other = self.oppSteps[oppX, oppY - 1].tolist()
+        
+        decisions = []
+        weights = []
+        for i, p in enumerate(own):
+            for j, q in enumerate(other):
+                if p * q > 0.0:
+                    decisions.append([[x + 1, y + i - 1], [oppX + 1, oppY + j - 1]])
+                    weights.append(p * q)
+        return createAlias(decisions, weights)
+        
+        
+# --------------------------------- Analysis methods ----------------------------------------------
+        
+        
+    # outcome of the game from every state
+    def absorptionProbabilities(self, prob = 1.0):
+        """
+        Compute the outcome of the game from every state in the agent's model.
+        
+        Returns a [state, quantity] array: the probability of the agent winning, of a draw, of the opponent
+        winning, and the expected number of the remaining rounds. The states are solved backwards, the
+        nobody-steps loop is summed up as a geometric series.
+        
+        """
+        
+        self.compile(prob)
+        last = self.sizeY - 1
+        values = numpy.zeros((len(self.targets), 4))
+        values[:, 0] = (self.stateX == last) & ~(self.stateOppX == last)
+        values[:, 1] = (self.stateX == last) & (self.stateOppX == last)
+        values[:, 2] = ~(self.stateX == last) & (self.stateOppX == last)
+        
+        one = numpy.array([0.0, 0.0, 0.0, 1.0])
+        for states in reversed(self.stages):
+            total = numpy.einsum('ij,ijq->iq', self.transitions[states, :15], values[self.targets[states, :15]]) + one
+            repeat = self.transitions[states, 15][:, numpy.newaxis]
+            with numpy.errstate(invalid = 'ignore', divide = 'ignore'):
+                values[states] = numpy.where(repeat < 1.0, total / (1.0 - repeat), numpy.array([0.0, 0.0, 0.0, numpy.inf]))
+        return values
+        
+        
+    # expected number of visits of every state
+    def expectedVisits(self, prob = 1.0, start = None):
+        """
+        Compute the expected number of visits of every state in a game from the starting state.
+        
+        For the game over states this is the probability of ending the game there.
+        """
+        
+        self.compile(prob)
+        if start is None:
+            start = self.getStateIndex(0, self.sizeX / 2 + 1, 0, self.sizeX / 2 + 1)
+        visits = numpy.zeros(len(self.targets))
+        visits[start] = 1.0
+        
+        for states in self.stages:
+            repeat = self.transitions[states, 15]
+            with numpy.errstate(invalid = 'ignore', divide = 'ignore'):
+                visits[states] = numpy.where(repeat < 1.0, visits[states] / (1.0 - repeat), numpy.inf)
+            flow = self.transitions[states, :15] * numpy.where(repeat < 1.0, visits[states], 0.0)[:, numpy.newaxis]
+            numpy.add.at(visits, self.targets[states, :15], flow)
+        return visits
+        
+        
+    # distribution of the game's final states
+    def stationaryDistribution(self, prob = 1.0, start = None):
+        """
+        Compute the stationary distribution of the chain started from the starting state.
+        
+        Every game ends in an absorbing game over state, so this is the distribution of the final states.
+        """
+        
+        return numpy.where(self.final, self.expectedVisits(prob, start), 0.0)
+
+
+
+
+
+
+  
+
+# -----------------------------------------------------------------------------------------------------  
+# ------------------------------------------- Learner classes -----------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+# the registered learning methods, type of learning: learner (see registerLearner)
+learners = {}
+
+
+# register a learning method
+def registerLearner(typeOfLearning, learner):
+    """
+    Register a learner (a Learner instance) as a type of learning, or replace the registered one.
+    
+    The Boards and the BatchBoards resolve their learners when they are created: a learner registered
+    later is used by the ones created later. The built-in types are 0 - 6, see LEARNINGTYPE.
+    """
+    
+    learners[typeOfLearning] = learner
+    
+    
+# get a registered learning method
+def getLearner(typeOfLearning, registered = learners):
+    """ Returns the learner of the type of learning, from the registered ones or from the given dictionary. """
+    
+    try:
+        return registered[typeOfLearning]
+    except KeyError:
+        print 'There\'s no such learning method!\nRead the documentation for details!'
+        raise ValueError('There\'s no such learning method: ' + str(typeOfLearning))
+        
+        
+# get the registered types of learning
+def getLearnerTypes(registered = learners):
+    """ Returns the types of learning of the registered learners (or of the given dictionary), in order. """
+    
+    return sorted(registered)
+
+
+
+class Learner:
+    """
+    A learning method of the agents - it does not learn anything.
+    
+    The learners are stateless, they learn into the agent given to them, so one learner is shared by
+    every agent. The learners with different updates for the outcomes of a step compile them into a
+    table in __init__, indexed by [iCanStep][oppCanStep], so a step is one lookup instead of a chain
+    of tests. Subclass it, and register it with registerLearner to add a learning method.
+    
+    The BatchBoards and the OfflineTrainers learn from many steps at once with learnBatch. Its default
+    learns from the steps one by one, a learner can override it with a vectorized version. A subclass
+    changing learn or learnFromGame has to override learnBatch as well.
+    
+    """
+    
+    # learn from the actual step
+    def learn(self, agent, iCanStep, oppCanStep, myMove, oppMove, learningConstant):
+        """
+        Learning from the actual step of the agent.
+        
+        iCanStep is 1 if the agent could step, oppCanStep is 1 if the opponent could step. The first
+        element of myMove is the agent's step, the second one is its prediction, the first element of
+        oppMove is the opponent's step. The agent is still on its tile before the step.
+        
+        """
+        
+        pass
+        
+        
+    # learn from the finished game
+    def learnFromGame(self, agent):
+        """ Learning from the game the agent has finished. """
+        
+        pass
+        
+        
+    # learn from a batch of steps
+    def learnBatch(self, batch, steps, learningConstant):
+        """
+        Learning from many steps at once, on a BatchBoard (every step in its own lane) or in an
+        OfflineTrainer (the steps of a chunk, in one agent).
+        
+        The steps have the arrays of a TraceChunk: the tiles before the steps (x1, y1, x2, y2), the
+        decisions (move1, pred1, move2, pred2), who could step (canStep1, canStep2), and the finished
+        games (finished). The batch reads and changes player 1's matrices (0 - position, 1 - opponent's)
+        with getTiles, multiplyTiles and addToTiles, and gives the agents of the steps with getAgents.
+        This version learns from the steps one by one with learn and learnFromGame (see the batch's
+        learnSteps).
+        
+        """
+        
+        batch.learnSteps(self, steps, learningConstant)
+        
+        
+    # the outcomes of the steps
+    def getOutcomes(self, steps):
+        """ Returns the entries of the outcomes table for the step and for the prediction of every step, as two arrays. """
+        
+        outcomes = numpy.array(self.outcomes)[steps.canStep1.astype(int), steps.canStep2.astype(int)]
+        return outcomes[:, 0], outcomes[:, 1]
+        
+        
+
+class NullLearner(Learner):
+    """
+    Learning method v0
+    
+    Do not learn anything!
+    
+    """
+    
+    # learn from a batch of steps
+    def learnBatch(self, batch, steps, learningConstant):
+        pass
+        
+        
+
+class LameLearner(Learner):
+    """
+    Learning method v1
+    
+    lame learning: modify the probability matrix by increasing / decreasing the
+    corresponding probability by 10 %
+    
+    """
+    
+    # init the learner
+    def __init__(self):
+        # the multipliers of the step and of the prediction
+        self.outcomes = [[[0.9, 1.1], [0.9, 0.9]],
+                         [[1.1, 1.1], [1.1, 0.9]]]
+        
+        
+    # learn from the actual step
+    def learn(self, agent, iCanStep, oppCanStep, myMove, oppMove, learningConstant):
+        step, pred = self.outcomes[iCanStep][oppCanStep]
+        pos, opp = agent.position_matrix, agent.opponent_matrix
+        x, y = myMove[0]
+        pos.setMatrixItem(x, y, pos.getMatrixItem(x, y) * step)
+        x, y = myMove[1]
+        opp.setMatrixItem(x, y, opp.getMatrixItem(x, y) * pred)
+        pos.rescale(myMove[0][0])
+        opp.rescale(x)
+        
+        
+    # learn from a batch of steps
+    def learnBatch(self, batch, steps, learningConstant):
+        step, pred = self.getOutcomes(steps)
+        batch.multiplyTiles(steps, 0, steps.x1 + 1, steps.move1, step)
+        batch.multiplyTiles(steps, 1, steps.x2 + 1, steps.pred1, pred)
+        
+        
+
+class NeuralLearner(Learner):
+    """
+    Learning method v2
+    
+    neural learning: modify the probability matrix according to the backpropagation
+    learning rule -> w(k) = w(k-1) + alpha * error * SUM(x_i)
+    in this case:
+    x_i = predecessors probability
+    error = -1 if wrong, 1 in other case
+    alpha = learningConstant
+    temp = alpha * error * SUM(x_i)
+    
+    """
+    
+    # init the learner
+    def __init__(self):
+        # the errors of the step and of the prediction
+        self.outcomes = [[[-1, 1], [-1, -1]],
+                         [[1, 1], [1, -1]]]
+        
+        
+    # learn from the actual step
+    def learn(self, agent, iCanStep, oppCanStep, myMove, oppMove, learningConstant):
+        step, pred = self.outcomes[iCanStep][oppCanStep]
+        pos, opp = agent.position_matrix, agent.opponent_matrix
+        x, y = myMove[0]
+        pos.setMatrixItem(x, y, pos.getMatrixItem(x, y) + learningConstant * step * \
+                              (pos.getMatrixItem(x - 1, y - 1) + pos.getMatrixItem(x - 1, y) + pos.getMatrixItem(x - 1, y + 1)))
+        x, y = myMove[1]
+        opp.setMatrixItem(x, y, opp.getMatrixItem(x, y) + learningConstant * pred * \
+                              (opp.getMatrixItem(x - 1, y - 1) + opp.getMatrixItem(x - 1, y) + opp.getMatrixItem(x - 1, y + 1)))
+        pos.rescale(myMove[0][0])
+        opp.rescale(x)
+        
+        
+    # learn from a batch of steps
+    def learnBatch(self, batch, steps, learningConstant):
+        step, pred = self.getOutcomes(steps)
+        posSum = batch.getTiles(steps, 0, steps.x1, steps.move1[:, numpy.newaxis] + NEIGHBOURS).sum(axis = 1)
+        oppSum = batch.getTiles(steps, 1, steps.x2, steps.pred1[:, numpy.newaxis] + NEIGHBOURS).sum(axis = 1)
+        batch.addToTiles(steps, 0, steps.x1 + 1, steps.move1, learningConstant * step * posSum)
+        batch.addToTiles(steps, 1, steps.x2 + 1, steps.pred1, learningConstant * pred * oppSum)
+        
+        
+
+class PreviousNeuralLearner(NeuralLearner):
+    """
+    Learning method v3
+    
+    neural learning v2: modify the probability matrix according to the backpropagation
+    learning rule -> w(k) = w(k-1) + alpha * error * x_previous
+    in this case:
+    x_previous = predecessor's probability
+    error = -1 if wrong, 0 in other case
+    alpha = learningConstant
+    temp = alpha * error * x_previous
+    
+    """
+    
+    # learn from the actual step
+    def learn(self, agent, iCanStep, oppCanStep, myMove, oppMove, learningConstant):
+        step, pred = self.outcomes[iCanStep][oppCanStep]
+        pos, opp = agent.position_matrix, agent.opponent_matrix
+        x, y = myMove[0]
+        pos.setMatrixItem(x, y, pos.getMatrixItem(x, y) + learningConstant * step * pos.getMatrixItem(agent.x, agent.y))
+        x, y = myMove[1]
+        opp.setMatrixItem(x, y, opp.getMatrixItem(x, y) + learningConstant * pred * opp.getMatrixItem(agent.oppX, agent.oppY))
+        pos.rescale(myMove[0][0])
+        opp.rescale(x)
+        
+        
+    # learn from a batch of steps
+    def learnBatch(self, batch, steps, learningConstant):
+        step, pred = self.getOutcomes(steps)
+        posPrevious = batch.getTiles(steps, 0, steps.x1, steps.y1)
+        oppPrevious = batch.getTiles(steps, 1, steps.x2, steps.y2)
+        batch.addToTiles(steps, 0, steps.x1 + 1, steps.move1, learningConstant * step * posPrevious)
+        batch.addToTiles(steps, 1, steps.x2 + 1, steps.pred1, learningConstant * pred * oppPrevious)
+        
+        
+
+class AdaBoostLearner(Learner):
+    """
+    Learning method v4
+    
+    ADABoost weighting - Use a weight modification similar to ADABoost weight modification
+    To work appropriately, we have to invert the rule: If the step went well, inrease probability
+    if not, decrease probability. So we will remove the (-1) multiplicator from the equation.
+
+    ADABoost terminology:
+    h_t(x_i) - decision
+    y(i) - real outcome
+    D_t(i) - actual weight
+    D_t+1(i) - next weight
+    epsilon_t - weighted error rate
+    Z_t - normalization factor
+    I - indicator function
+    epsilon_t = SUM_i=1^m (D_t(i) * I(y(i) = h_t(x_i)))
+    alpha_t = (1 / 2) * ln((1 - epsilon_t) / epsilon_t)
+    Z_t = SUM_i (D_t(i) * exp(-1 * alpha_t * y_i * h_t(x_i)))
+    D_t+1(i) = (D_t(i) * exp(-1 * alpha_t * y_i * h_t(x_i))) / Z_t
+
+    implemented method:
+    - if my step was predicted:
+          epsilon = SUM_i=1^3 (w(i))
+    - if my prediction was wrong:
+          epsilon = w(my_pred) + w(opp_step)
+    - if epsilon < 0.5, add 0.5 to epsilon
+          epsilon = epsilon + 0.5
+
+    - instead of the y_i - h_t(x_i) pair, we only care about wrong elements:
+          indicator = +1
+
+    rescale with the same method as the other learning methods, instead of the division of Z_t
+
+    learning rule -> w(k+1) = w(k) * exp(indicator * (1/2) * ln ((1 - epsilon) / epsilon))
+    (the multiplication is an addition of the exponent in a LogProbMat, see scaleMatrixItem)
+    
+    """
+    
+    # init the learner
+    def __init__(self):
+        # learning from the step, and from the prediction
+        self.outcomes = [[[1, 0], [1, 1]],
+                         [[0, 0], [0, 1]]]
+        
+        
+    # learn from the actual step
+    def learn(self, agent, iCanStep, oppCanStep, myMove, oppMove, learningConstant):
+        step, pred = self.outcomes[iCanStep][oppCanStep]
+        pos, opp = agent.position_matrix, agent.opponent_matrix
+        if step:
+            # my step was predicted
+            x, y = agent.x + 1, agent.y
+            epsilon = pos.getMatrixItem(x, y - 1) + pos.getMatrixItem(x, y) + pos.getMatrixItem(x, y + 1)
+            pos.scaleMatrixItem(myMove[0][0], myMove[0][1], self.exponent(epsilon))
+        if pred:
+            # my prediction was wrong
+            epsilon = opp.getMatrixItem(myMove[1][0], myMove[1][1]) + opp.getMatrixItem(oppMove[0][0], oppMove[0][1])
+            opp.scaleMatrixItem(myMove[1][0], myMove[1][1], self.exponent(epsilon))
+        if step:
+            pos.rescale(myMove[0][0])
+        if pred:
+            opp.rescale(myMove[1][0])
+            
+            
+    # the exponent of the multiplier
+    def exponent(self, epsilon):
+        if epsilon < 0.5:
+            epsilon = 0.6
+        elif epsilon >= 1.0:
+            epsilon = 0.9
+        return (1.0/2.0) * math.log(((1.0 - epsilon) / epsilon))
+        
+        
+    # learn from a batch of steps
+    def learnBatch(self, batch, steps, learningConstant):
+        step, pred = self.getOutcomes(steps)
+        # my steps that were predicted
+        sel = step == 1
+        x = steps.x1[sel] + 1
+        epsilon = batch.getTiles(steps, 0, x, steps.y1[sel][:, numpy.newaxis] + NEIGHBOURS, sel).sum(axis = 1)
+        batch.multiplyTiles(steps, 0, x, steps.move1[sel], adaBoostFactor(epsilon), sel)
+        # my predictions that were wrong
+        sel = pred == 1
+        x = steps.x2[sel] + 1
+        epsilon = batch.getTiles(steps, 1, x, steps.pred1[sel], sel) + batch.getTiles(steps, 1, x, steps.move2[sel], sel)
+        batch.multiplyTiles(steps, 1, x, steps.pred1[sel], adaBoostFactor(epsilon), sel)
+        
+        
+
+class NaiveBayesLearner(Learner):
+    """
+    Learning method v5
+    
+    Naive Bayes method based method - Estimate the probabilities based on the observations. In the beginning we assume that
+    each line is a random variable which have 5 different value, and the probability of these values follows the universal
+    distribution. During the steps we observe the outcome of our decisions, and modify our assumption.
+
+    Naive Bayes terminology:
+      P = N_i / N
+      N_i - number of occurence of the i^th value
+      N   - number of the occurences of all values
+
+    Implemented method:
+    Initial state:
+      All of the N_i = 1
+      Compute the probabilities for all of the values.
+
+    After each step:
+      Compute the N_i, N values for the actual lines from the probabilities:
+          From every decimal, get the fractal values
+          Get the least common multiple to get the common denominator (N)
+          From common denominator, get the numerators (N_i)
+
+      If we can step:
+          increase the N_i for the value, where we stepped to.
+      If we predicted the opponent's step:
+          increase the N_i for the value, which we predicted.
+
+      If we couldn't step:
+          increase the N, but only for the value, where we stepped to.
+      If we missed the opponent's step:
+          increase the N, but only for the value, which we predicted.
+
+    """
+    
+    # init the learner
+    def __init__(self):
+        # increasing the step, and the prediction
+        self.outcomes = [[[0, 1], [0, 0]],
+                         [[1, 1], [1, 0]]]
+        
+        
+    # learn from the actual step
+    def learn(self, agent, iCanStep, oppCanStep, myMove, oppMove, learningConstant):
+        """
+        The naive Bayes learning without fractions (see BAYESFRACTIONS).
+        
+        Every float is a fraction N_i / N of two integers already (float.as_integer_ratio), they are
+        modified directly: an increase multiplies N_i, a decrease multiplies N by 1.1, both truncated to
+        integers like in the reference implementation. The neighbouring tiles of the fractions keep
+        their values there, so only the learned tiles are set here.
+        
+        """
+        
+        if BAYESFRACTIONS:
+            self.learnFractions(agent, iCanStep, oppCanStep, myMove)
+            return
+        
+        step, pred = self.outcomes[iCanStep][oppCanStep]
+        self.learnTile(agent.position_matrix, myMove[0], step)
+        self.learnTile(agent.opponent_matrix, myMove[1], pred)
+        
+        # rescale
+        agent.position_matrix.rescale(myMove[0][0])
+        agent.opponent_matrix.rescale(myMove[1][0])
+        
+        
+    # learn a tile from its fraction
+    def learnTile(self, matrix, tile, increase):
+        x, y = tile
+        count, total = matrix.getMatrixItem(x, y).as_integer_ratio()
+        if increase:
+            count = int(count * 1.1)
+        else:
+            total = int(total * 1.1)
+        matrix.setMatrixItem(x, y, float(count) / total)
+        
+        
+    # learn from a batch of steps
+    def learnBatch(self, batch, steps, learningConstant):
+        """ The naive Bayes learning of many steps: an increase of N_i or of N is a multiplication or a division by 1.1. """
+        
+        step, pred = self.getOutcomes(steps)
+        batch.multiplyTiles(steps, 0, steps.x1 + 1, steps.move1, numpy.where(step, 1.1, 1.0 / 1.1))
+        batch.multiplyTiles(steps, 1, steps.x2 + 1, steps.pred1, numpy.where(pred, 1.1, 1.0 / 1.1))
+        
+        
+    # the reference implementation
+    def learnFractions(self, agent, iCanStep, oppCanStep, myMove):
+        """ The naive Bayes learning with fractions. """
+        
+        # create lists
+        # create a list for the possible steps
+        steps = []
+        steps_index = []
+        # first element: actual step
+        steps.append(agent.getPosMatItem(myMove[0][0], myMove[0][1]))
+        steps_index.append(0)
+        # if existst, add the element on the left
+        if not agent.getPosMatItem(myMove[0][0], myMove[0][1] - 1) == 0.0:
+            steps.append(agent.getPosMatItem(myMove[0][0], myMove[0][1] - 1))
+            steps_index.append(-1)
+        # if exists, add the element on the right
+        if not agent.getPosMatItem(myMove[0][0], myMove[0][1] + 1) == 0.0:
+            steps.append(agent.getPosMatItem(myMove[0][0], myMove[0][1] + 1))
+            steps_index.append(+1)
+
+        # create a list for the possible preds
+        preds = []
+        preds_index = []
+        # first element: actual pred
+        preds.append(agent.getOppMatItem(myMove[1][0], myMove[1][1]))
+        preds_index.append(0)
+        # if existst, add the element on the left
+        if not agent.getOppMatItem(myMove[1][0], myMove[1][1] - 1) == 0.0:
+            preds.append(agent.getOppMatItem(myMove[1][0], myMove[1][1] - 1))
+            preds_index.append(-1)
+        # if exists, add the element on the right
+        if not agent.getOppMatItem(myMove[1][0], myMove[1][1] + 1) == 0.0:
+            preds.append(agent.getOppMatItem(myMove[1][0], myMove[1][1] + 1))
+            preds_index.append(+1)
+
+        # get the fractal values
+        # create two temporary list for steps and for pred
+        temp_step = []
+        temp_pred = []
+
+        # get the fractions, and put them into the temp. lists
+        for elem in steps:
+            temp_step.append(Fraction(elem))
+
+        for elem in preds:
+            temp_pred.append(Fraction(elem))
+
+        # get least common multiples
+        lcm_step = temp_step[0].denominator
+        if len(temp_step) == 3:
+            lcm_step = agent.lcm(lcm_step, agent.lcm(temp_step[1].denominator, temp_step[2].denominator))
+        elif len(temp_step) == 2:
+            lcm_step = agent.lcm(lcm_step, temp_step[1].denominator)
+
+        lcm_pred = temp_pred[0].denominator
+        if len(temp_pred) == 3:
+            lcm_pred = agent.lcm(lcm_pred, agent.lcm(temp_pred[1].denominator, temp_pred[2].denominator))
+        elif len(temp_pred) == 2:
+            lcm_pred = agent.lcm(lcm_pred, temp_pred[1].denominator)
+
+        # modify values according the outcome
+        if iCanStep == 1 and oppCanStep == 1:
+            # inc p1 step, dec p1 pred
+            temp_step[0] = Fraction(int(temp_step[0].numerator * 1.1), temp_step[0].denominator)
+            temp_pred[0] = Fraction(temp_pred[0].numerator, int(temp_pred[0].denominator * 1.1))
+
+        elif iCanStep == 1 and oppCanStep == 0:
+            # inc p1 step, inc p1 pred
+            temp_step[0] = Fraction(int(temp_step[0].numerator * 1.1), temp_step[0].denominator)
+            temp_pred[0] = Fraction(int(temp_pred[0].numerator * 1.1), temp_pred[0].denominator)
+
+        elif iCanStep == 0 and oppCanStep == 1:
+            # dec p1 step, dec p1 pred
+            temp_step[0] = Fraction(temp_step[0].numerator, int(temp_step[0].denominator * 1.1))
+            temp_pred[0] = Fraction(temp_pred[0].numerator, int(temp_pred[0].denominator * 1.1))
+
+        elif iCanStep == 0 and oppCanStep == 0:
+            # dec p1 step, inc p1 pred
+            temp_step[0] = Fraction(temp_step[0].numerator, int(temp_step[0].denominator * 1.1))
+            temp_pred[0] = Fraction(int(temp_pred[0].numerator * 1.1), temp_pred[0].denominator)
+
+
+        # convert fractions back
+        steps = []
+        for elem in temp_step:
+            steps.append((float(elem.numerator) * float(lcm_step)/float(elem.denominator))/float(lcm_step))
+
+        preds = []
+        for elem in temp_pred:
+            preds.append((float(elem.numerator) * float(lcm_pred)/float(elem.denominator))/float(lcm_pred))
+
+
+
+
+        # setposmatitems
+        for id, elem in enumerate(steps):
+            agent.setPosMatItem(myMove[0][0], myMove[0][1] + steps_index[id], elem)
+        # setoppmatitems
+        for id, elem in enumerate(preds):
+            agent.setOppMatItem(myMove[1][0], myMove[1][1] + preds_index[id], elem)
+
+        # rescale
+        actline = myMove[0][0]
+        agent.rescalePosMat(actline)
+        actline = myMove[1][0]
+        agent.rescaleOppMat(actline)
+        
+        
+
+class GradientLearner(Learner):
+    """
+    Gradient descent method.
+    
+    A model of the opponent is fitted to the opponent's observed steps after every step, the matrices
+    are stepped along the gradient of the winning probability after the games, see learnFromGame.
+    
+    The observations, the model and the number of games since the last gradient step are the state of
+    the learner in the agent (Agent.learnerStates), a dictionary created by the first observation.
+    
+    """
+    
+    # learn from the actual step
+    def learn(self, agent, iCanStep, oppCanStep, myMove, oppMove, learningConstant):
+        self.observeOpponent(agent, oppMove[0])
+        self.fitOpponentModel(agent, oppMove[0][0])
+        
+        
+    # learn from the finished game
+    def learnFromGame(self, agent):
+        """
+        Learning from the finished game along the gradient.
+        
+        After every GRADIENTBATCH games both matrices take GRADIENTITERATIONS steps along the gradient
+        of the winning probability, computed exactly by the Evaluator against the fitted model of the
+        opponent. The opponent's predictions are modelled by the position matrix before the update,
+        held constant. Every row is projected back onto the probability simplex after each step.
+        
+        """
+        
+        state = agent.learnerStates.get(self)
+        if state is None:
+            return
+        state['games'] = state['games'] + 1
+        if state['games'] < GRADIENTBATCH:
+            return
+        state['games'] = 0
+        
+        matrices = [numpy.array(agent.getPosMat(), dtype = numpy.float64), numpy.array(agent.getOppMat(), dtype = numpy.float64)]
+        size_y, size_x = matrices[0].shape[0], matrices[0].shape[1] - 2
+        predictions = matrices[0].copy()
+        
+        for i in range(GRADIENTITERATIONS):
+            gradients = Evaluator(matrices[0], matrices[1], state['model'], predictions, size_x, size_y,
+                                  AIPROBOFEXPLORE, SOPROBOFEXPLORE).gradient()
+            for matrix, gradient in zip(matrices, gradients):
+                # the first row is the starting tile, it is never learned
+                for x in range(1, size_y):
+                    support = matrix[x] > 0.0
+                    matrix[x, support] = projectSimplex(matrix[x, support] + GRADIENTSTEP * gradient[x, support])
+        agent.setPosMat(matrices[0])
+        agent.setOppMat(matrices[1])
+        
+        
+    # learn from a batch of steps
+    def learnBatch(self, batch, steps, learningConstant):
+        """
+        The opponent's steps of every agent are counted at once, the touched rows of its model are
+        fitted once, then the agent learns from the finished games.
+        """
+        
+        for agent, sel in batch.getAgents(steps):
+            x, y = steps.x2[sel], steps.y2[sel]
+            self.observeSteps(agent, x, y, steps.move2[sel])
+            for line in numpy.unique(x + 1):
+                self.fitOpponentModel(agent, line)
+            for i in range(int(steps.finished[sel].sum())):
+                self.learnFromGame(agent)
+        
+        
+    # get the state of the learner in the agent
+    def getState(self, agent):
+        """ Returns the learner's state in the agent, the observations are started if there are none. """
+        
+        state = agent.learnerStates.get(self)
+        if state is None:
+            state = self.resetObservations(agent)
+        return state
+        
+        
+    # count the opponent's step
+    def observeOpponent(self, agent, oppMove):
+        """
+        Store the opponent's step from its actual tile.
+        
+        The observations are indexed by [row, column - 1, step], the steps go to the column - 1, column,
+        column + 1 tiles of the next row. Every possible step starts with one observation, and the model
+        starts from the opponent's matrix.
+        """
+        
+        self.getState(agent)['observations'][agent.oppX, agent.oppY - 1, oppMove[1] - agent.oppY + 1] += 1.0
+        
+        
+    # count the opponent's steps
+    def observeSteps(self, agent, x, y, moves):
+        """ Store the opponent's steps from the tiles (x, y) to the columns of the moves, like observeOpponent. """
+        
+        observations = self.getState(agent)['observations']
+        index = numpy.ravel_multi_index((x, y - 1, moves - y + 1), observations.shape)
+        observations += numpy.bincount(index, minlength = observations.size).reshape(observations.shape)
+        
+        
+    # start the observations of the opponent
+    def resetObservations(self, agent):
+        """ Every possible step of the opponent starts with one observation, the model from the opponent's matrix. """
+        
+        model = numpy.array(agent.getOppMat(), dtype = numpy.float64)
+        size_x = model.shape[1] - 2
+        observations = numpy.concatenate([model[1:, i:i + size_x, numpy.newaxis] > 0.0 for i in range(3)],
+                                         axis = 2).astype(numpy.float64)
+        state = {'observations': observations, 'model': model, 'games': 0}
+        agent.learnerStates[self] = state
+        return state
+        
+        
+    # fit a row of the opponent's model to the observations
+    def fitOpponentModel(self, agent, line):
+        """
+        Fit a row of the opponent's model to the observed steps onto it.
+        
+        Finds the maximum likelihood row of the opponent's steps (every step is chosen from three tiles
+        proportionally to their values) by a few minorization-maximization iterations, starting from
+        the actual row.
+        
+        """
+        
+        state = self.getState(agent)
+        observed = state['observations'][line - 1]
+        size_x = len(observed)
+        row = state['model'][line]
+        support = row > 0.0
+        
+        # observations onto the tiles, and from the tiles
+        onto = numpy.zeros(size_x + 2)
+        for k in range(3):
+            onto[k:k + size_x] += observed[:, k]
+        start = observed.sum(axis = 1)
+        
+        for i in range(FITTINGITERATIONS):
+            summa = sum([row[k:k + size_x] for k in range(3)])
+            share = numpy.where(summa > 0.0, start / numpy.maximum(summa, MINFLOAT), 0.0)
+            denominator = numpy.zeros(size_x + 2)
+            for k in range(3):
+                denominator[k:k + size_x] += share
+            row = numpy.where(support, numpy.maximum(onto / numpy.maximum(denominator, MINFLOAT), MINFLOAT), 0.0)
+            row /= row.sum()
+        
+        state['model'][line] = row
+        
+        
+        
+registerLearner(0, NullLearner())
+registerLearner(1, LameLearner())
+registerLearner(2, NeuralLearner())
+registerLearner(3, PreviousNeuralLearner())
+registerLearner(4, AdaBoostLearner())
+registerLearner(5, NaiveBayesLearner())
+registerLearner(6, GradientLearner())
+
+
+
+
+# -----------------------------------------------------------------------------------------------------  
+# -------------------------------------------- Board class --------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+
+class Board:
+    """GameBoard - Plays the game."""
+    
+    
+    # init the game
+    def __init__(self, size_x = 5, size_y = 8, beta = 0.5, human = 0, seed = None, matrixMode = MATRIXMODE):
+        self.beta = beta
+        self.sizeX = size_x
+        self.sizeY = size_y
         self.round = 0
         self.gameOver = 0
-        self.player1 = Agent(0, self.sizeX / 2 + 1, 0, self.sizeX / 2 + 1, ProbMat(self.sizeX, self.sizeY), ProbMat(self.sizeX, self.sizeY))
-        self.player2 = Agent(0, self.sizeX / 2 + 1, 0, self.sizeX / 2 + 1, ProbMat(self.sizeX, self.sizeY), ProbMat(self.sizeX, self.sizeY))
+        # the players' matrices, see MATRIXMODE
+        if not matrixMode in range(3):
+            print 'There\'s no such matrix mode!\nRead the documentation for details!'
+            raise ValueError('There\'s no such matrix mode: ' + str(matrixMode))
+        matrix = [ProbMat, LazyProbMat, LogProbMat][matrixMode]
+        self.player1 = Agent(0, self.sizeX / 2 + 1, 0, self.sizeX / 2 + 1, matrix(self.sizeX, self.sizeY), matrix(self.sizeX, self.sizeY))
+        self.player2 = Agent(0, self.sizeX / 2 + 1, 0, self.sizeX / 2 + 1, matrix(self.sizeX, self.sizeY), matrix(self.sizeX, self.sizeY))
         self.human = human
+        # the trace recorder of the steps (see mensico_trace_v16), None if nothing is recorded
+        self.recorder = None
+        # the time of the phases of the steps (see enableStats), None if nothing is measured
+        self.stats = None
+        # the seed of the board, and the number of the actual game
+        self.seed = seed
+        self.game = 0
+        # the players draw from one stream, in a fixed order
+        self.random = UniformStream()
+        self.player1.setRandom(self.random)
+        self.player2.setRandom(self.random)
+        # the learning methods are resolved once, the ones registered later are not used
+        self.learners = dict(learners)
+        self.player1.setLearners(self.learners)
+        self.player2.setLearners(self.learners)
+        self.seedGame()
     
 
 # --------------------------------- Information methods ----------------------------------------------
@@ -969,6 +2031,25 @@ class Board:
     def getMatrices(self):
         return [self.player1.getPosMat(), self.player1.getOppMat(), self.player2.getPosMat(), self.player2.getOppMat()]
     
+    # returns the players' ProbMats - they follow the changes of the matrices, see Error
+    def getProbMats(self):
+        return [self.player1.position_matrix, self.player1.opponent_matrix, self.player2.position_matrix, self.player2.opponent_matrix]
+    
+    # exact outcome of the game between the current strategies
+    def evaluate(self):
+        """ Returns the probabilities of player 1 winning, a draw, player 2 winning and the expected length. """
+        
+        matrices = self.getMatrices()
+        return Evaluator(matrices[0], matrices[1], matrices[2], matrices[3], self.sizeX, self.sizeY).evaluate()
+        
+    # the time of the phases of the steps
+    def getStats(self):
+        """ Returns the phases measured since enableStats (see Stats.getSnapshot), None if nothing is measured. """
+        
+        if self.stats is None:
+            return None
+        return self.stats.getSnapshot()
+    
     
                
     # show some info about the game    
@@ -1030,20 +2111,20 @@ class Board:
               
     def avalaibleSteps(self, player):
         """ Returns the avalaible steps and predictions. """
-        posX = player.getOwnCoord()[0]
-        posY = player.getOwnCoord()[1]
+        posX = player.x
+        posY = player.y
         
-        oppX = player.getOppCoord()[0]
-        oppY = player.getOppCoord()[1]
+        oppX = player.oppX
+        oppY = player.oppY
         
         pos_list = []
         opp_list = []
 
-        for y in [posY - 1, posY, posY + 1]:
+        for y in (posY - 1, posY, posY + 1):
             if y < (self.sizeX + 1) and y > 0:
                 pos_list.append([posX + 1, y])
           
-        for y in [oppY - 1, oppY, oppY + 1]:
+        for y in (oppY - 1, oppY, oppY + 1):
             if y < self.sizeX + 1 and y > 0:
                 opp_list.append([oppX + 1, y])
 
@@ -1077,16 +2158,33 @@ class Board:
         # if it's an artificial opponent, it should decide on its own...
         elif self.human == 0:
             player2move = self.player2.decide(SOPROBOFEXPLORE)
-        playersmove = [1, 1]
+        
+        self.applyStep(player1move, player2move, learningType)
+        
+        
+    # play the decided step
+    def applyStep(self, player1move, player2move, learningType = 0):
+        """
+        Play a step with the given decisions.
+        
+        The collisions are detected, the players are moved, player 1 learns from the step, and the game
+        over is checked. Used by doOneStep, and by the trace replayer with the recorded decisions.
+        
+        """
         
         # let's see the results
+        canStep1 = canStep2 = 1
         if player2move[1] == player1move[0]:
-            playersmove[0] = 0 
+            canStep1 = 0
         if player1move[1] == player2move[0]:
-            playersmove[1] = 0     
+            canStep2 = 0
+        
+        # record the step before moving
+        if self.recorder is not None:
+            self.recorder.record(self, player1move, player2move, (canStep1, canStep2))
         
         # both player steps
-        if playersmove == [1, 1]:
+        if canStep1 and canStep2:
             self.player1.learn(1, 1, player1move, player2move, LEARNINGCONSTANT, learningType)
             self.player1.setOwnCoord(player1move[0][0], player1move[0][1])
             self.player1.setOppCoord(player2move[0][0], player2move[0][1])
@@ -1094,19 +2192,19 @@ class Board:
             self.player2.setOppCoord(player1move[0][0], player1move[0][1])
             
         # only the first player steps
-        elif playersmove == [1, 0]:
+        elif canStep1 and not canStep2:
             self.player1.learn(1, 0, player1move, player2move, LEARNINGCONSTANT, learningType)
             self.player1.setOwnCoord(player1move[0][0], player1move[0][1])
             self.player2.setOppCoord(player1move[0][0], player1move[0][1])
             
         # only the second player steps
-        elif playersmove == [0, 1]:
+        elif not canStep1 and canStep2:
             self.player1.learn(0, 1, player1move, player2move, LEARNINGCONSTANT, learningType)
             self.player1.setOppCoord(player2move[0][0], player2move[0][1])
             self.player2.setOwnCoord(player2move[0][0], player2move[0][1])
         
         # nobody steps    
-        elif playersmove == [0, 0]:
+        elif not canStep1 and not canStep2:
             self.player1.learn(0, 0, player1move, player2move, LEARNINGCONSTANT, learningType)
 
 
@@ -1115,19 +2213,25 @@ class Board:
        
        
         # Game Over?
+        finished1 = self.player1.x == self.sizeY - 1
+        finished2 = self.player2.x == self.sizeY - 1
         # player 1 wins!
-        if self.player1.getOwnCoord()[0] == self.sizeY - 1 and not self.player2.getOwnCoord()[0] == self.sizeY - 1:
+        if finished1 and not finished2:
             self.player1.incWins()
             self.gameOver = 1
             
         # player 2 wins!
-        elif not self.player1.getOwnCoord()[0] == self.sizeY - 1 and self.player2.getOwnCoord()[0] == self.sizeY - 1:
+        elif not finished1 and finished2:
             self.player2.incWins()
             self.gameOver = 1
 
         # Draw!
-        elif self.player1.getOwnCoord()[0] == self.sizeY - 1 and self.player2.getOwnCoord()[0] == self.sizeY - 1:
+        elif finished1 and finished2:
             self.gameOver = 1
+            
+        # learn from the whole game
+        if self.gameOver == 1:
+            self.player1.learnFromGame(learningType)
 
 
 
@@ -1139,21 +2243,628 @@ class Board:
         self.round = 0
         self.gameOver = 0
         
+        # next game, with its own random streams
+        self.game = self.game + 1
+        self.seedGame()
+        
         # set players to init positions
         self.player1.setOwnCoord(0, self.sizeX / 2 + 1)
         self.player1.setOppCoord(0, self.sizeX / 2 + 1)
         self.player2.setOwnCoord(0, self.sizeX / 2 + 1)
         self.player2.setOppCoord(0, self.sizeX / 2 + 1)
+        
+        
+    # measure the time of the phases of the steps
+    def enableStats(self):
+        """
+        Start measuring the steps, the decisions, the learning (by learning type and by who could step),
+        the rescaling and the sampling tables of the players' matrices. Returns the Stats, other phases
+        (e.g. the error measuring) can be added to it. Nothing is measured, and nothing is slower until
+        it is enabled.
+        """
+        
+        if self.stats is not None:
+            return self.stats
+        stats = self.stats = Stats()
+        stats.wrap(self, 'doOneStep', 'step')
+        stats.wrap(self.player1, 'decide', 'decide player 1')
+        stats.wrap(self.player2, 'decide', 'decide player 2')
+        stats.wrap(self.player1, 'learn', key = lambda iCanStep, oppCanStep, myMove, oppMove, learningConstant, typeOfLearning: \
+                   '%d (%d, %d)' % (typeOfLearning, iCanStep, oppCanStep))
+        stats.wrap(self.player1, 'learnFromGame')
+        for matrix in self.getProbMats():
+            stats.wrap(matrix, 'rescale')
+            stats.wrap(matrix, 'createSampler', 'sampler')
+        return stats
+        
+        
+    # stop measuring the phases of the steps
+    def disableStats(self):
+        if self.stats is not None:
+            self.stats.unwrap()
+            self.stats = None
+        
+        
+    # seed the random streams of the actual game
+    def seedGame(self):
+        """
+        If the board has a seed, the players draw from a new stream in every game, derived from the
+        seed of the board and the number of the game. So the random numbers of a game don't depend on
+        the process playing it, or on the random numbers used by the other games.
+        """
+        
+        if self.seed is None:
+            return
+        self.random.seed(deriveSeed(self.seed, self.game))
+
+
+
+
+
+
+
+# -----------------------------------------------------------------------------------------------------  
+# ----------------------------------------- BatchBoard class ------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class BatchBoard:
+    """
+    GameBoard for many games - Plays the games in lockstep.
+    
+    Every lane of the batch is an independent Board: a learner (player 1) plays game after game
+    against an opponent (player 2), and keeps what it learned between the games. The coordinates and
+    the matrices of every lane are stored in arrays, so the decisions, the collisions and the learning
+    of all lanes are computed at once (see Learner.learnBatch). The learning methods without a batch
+    version learn lane by lane, with an Agent for every lane.
+    
+    """
+    
+    # init the games
+    def __init__(self, lanes = 1000, size_x = 5, size_y = 8, beta = 0.5, seed = None):
+        self.beta = beta
+        self.sizeX = size_x
+        self.sizeY = size_y
+        self.numberOfLanes = lanes
+        self.lanes = numpy.arange(lanes)
+        self.random = numpy.random.RandomState(seed)
+        
+        # every lane gets its own copy of the players' matrices
+        template = ProbMat(self.sizeX, self.sizeY).getMatrix()
+        self.p1Pos = numpy.repeat(template[numpy.newaxis], lanes, axis = 0)
+        self.p1Opp = self.p1Pos.copy()
+        self.p2Pos = self.p1Pos.copy()
+        self.p2Opp = self.p1Pos.copy()
+        
+        # the coordinates of the players in every lane
+        self.p1X = numpy.zeros(lanes, dtype = int)
+        self.p1Y = numpy.zeros(lanes, dtype = int)
+        self.p2X = numpy.zeros(lanes, dtype = int)
+        self.p2Y = numpy.zeros(lanes, dtype = int)
+        self.rounds = numpy.zeros(lanes, dtype = int)
+        
+        # the scores of every lane
+        self.p1Wins = numpy.zeros(lanes, dtype = int)
+        self.p2Wins = numpy.zeros(lanes, dtype = int)
+        self.draws = numpy.zeros(lanes, dtype = int)
+        self.played = numpy.zeros(lanes, dtype = int)
+        
+        # the learning methods of the Boards created now, and the agents of the lanes learning one by one
+        self.learners = dict(learners)
+        self.agents = {}
+        
+        self.reset()
+        
+
+# setters, getters
+
+    # set a player's matrices in every lane
+    def setPlayerMatrices(self, player, pos_mat, opp_mat):
+        if player == 1:
+            self.p1Pos[...] = pos_mat
+            self.p1Opp[...] = opp_mat
+        else:
+            self.p2Pos[...] = pos_mat
+            self.p2Opp[...] = opp_mat
+    
+    # returns the players' matrices in a lane
+    def getMatrices(self, lane = 0):
+        return [self.p1Pos[lane], self.p1Opp[lane], self.p2Pos[lane], self.p2Opp[lane]]
+    
+    # get the total number of wins
+    def getWins(self):
+        return [int(self.p1Wins.sum()), int(self.p2Wins.sum()), int(self.draws.sum())]
+    
+    # get the agent of player 1 in a lane, for the learning methods learning in the agents
+    def getLaneAgent(self, lane):
+        if not lane in self.agents:
+            self.agents[lane] = Agent(0, 0, 0, 0, ProbMat(self.sizeX, self.sizeY), ProbMat(self.sizeX, self.sizeY))
+        return self.agents[lane]
+    
+# end of setters, getters
 
 
+    # Load a player's strategy from a file to every lane
+    def loadStrategy(self, player, filename):
+        """ Load probability matrices from a file to every lane. """
+        
+        agent = Agent(0, 0, 0, 0, ProbMat(self.sizeX, self.sizeY), ProbMat(self.sizeX, self.sizeY))
+        agent.loadStrategy(filename, 1)
+        self.setPlayerMatrices(player, agent.getPosMat(), agent.getOppMat())
+
 
+    # reset the game state of some (or all) lanes
+    def reset(self, lanes = None):
+        """ Reset the games in the given lanes. """
+        
+        if lanes is None:
+            lanes = self.lanes
+        
+        # set players to init positions
+        self.p1X[lanes] = 0
+        self.p1Y[lanes] = self.sizeX / 2 + 1
+        self.p2X[lanes] = 0
+        self.p2Y[lanes] = self.sizeX / 2 + 1
+        self.rounds[lanes] = 0
+    
+    
+    # reset the scores of every lane
+    def resetScores(self):
+        """ Set the scores to 0. """
+        
+        self.p1Wins[:] = 0
+        self.p2Wins[:] = 0
+        self.draws[:] = 0
+        self.played[:] = 0
+        
+        
+# --------------------------------- GamePlay methods ----------------------------------------------    
 
 
+    # where should the players step? Where would their opponents step?
+    def decide(self, matrices, lanes, x, y, prob, uniforms):
+        """
+        Make a decision in every given lane based on probabilities.
+        
+        Same as Agent.decide for one of the decisions: with probability prob the tile is chosen from
+        the stored probabilities, otherwise uniformly from the possible tiles. The first row of the
+        uniforms decides exploring, the second one chooses the tile. Returns the chosen columns.
+        
+        """
+        
+        # the probabilities of the reachable tiles
+        weights = matrices[lanes[:, numpy.newaxis], (x + 1)[:, numpy.newaxis], y[:, numpy.newaxis] + NEIGHBOURS]
+        # remove the impossible steps
+        possible = weights > 0.0
+        weights = numpy.where(possible, weights, 0.0)
+        # if we explore the gamespace, choose randomly
+        weights = numpy.where((uniforms[0] < prob)[:, numpy.newaxis], weights, possible)
+        
+        # weighted choice on the cumulated weights
+        cumulated = weights.cumsum(axis = 1)
+        index = (cumulated <= (uniforms[1] * cumulated[:, -1])[:, numpy.newaxis]).sum(axis = 1)
+        return y - 1 + index
+        
+        
+    # do one step in the given lanes
+    def doOneStep(self, learningType = 0, lanes = None):
+        """
+        Play one step in every given lane.
+        
+        The same step as Board.doOneStep: the players decide, the collisions are detected, player 1
+        learns from the outcome, then the players are moved. Finished games are scored and their lanes
+        are reset, so the next call starts a new game there. Returns the lanes where a game ended.
+        
+        """
+        
+        if lanes is None:
+            lanes = self.lanes
+        
+        x1 = self.p1X[lanes]
+        y1 = self.p1Y[lanes]
+        x2 = self.p2X[lanes]
+        y2 = self.p2Y[lanes]
+        
+        # let the players decide on their own...
+        uniforms = self.random.random_sample((8, len(lanes)))
+        move1 = self.decide(self.p1Pos, lanes, x1, y1, AIPROBOFEXPLORE, uniforms[0:2])
+        pred1 = self.decide(self.p1Opp, lanes, x2, y2, AIPROBOFEXPLORE, uniforms[2:4])
+        move2 = self.decide(self.p2Pos, lanes, x2, y2, SOPROBOFEXPLORE, uniforms[4:6])
+        pred2 = self.decide(self.p2Opp, lanes, x1, y1, SOPROBOFEXPLORE, uniforms[6:8])
+        
+        # let's see the results
+        iCanStep = pred2 != move1
+        oppCanStep = pred1 != move2
+        
+        # player 1 learns from the step
+        self.learn(lanes, iCanStep, oppCanStep, x1, y1, x2, y2, move1, pred1, move2, pred2, LEARNINGCONSTANT, learningType)
+        
+        # move the players who can step
+        self.p1X[lanes] = x1 + iCanStep
+        self.p1Y[lanes] = numpy.where(iCanStep, move1, y1)
+        self.p2X[lanes] = x2 + oppCanStep
+        self.p2Y[lanes] = numpy.where(oppCanStep, move2, y2)
+        
+        # next round!
+        self.rounds[lanes] += 1
+        
+        # Game Over?
+        p1Finished = self.p1X[lanes] == self.sizeY - 1
+        p2Finished = self.p2X[lanes] == self.sizeY - 1
+        self.p1Wins[lanes] += p1Finished & ~p2Finished
+        self.p2Wins[lanes] += p2Finished & ~p1Finished
+        self.draws[lanes] += p1Finished & p2Finished
+        
+        # start a new game where it's game over
+        over = lanes[p1Finished | p2Finished]
+        self.played[over] += 1
+        self.reset(over)
+        return over
+    
+    
+    # play a number of games in every lane
+    def play(self, numberOfGames, learningType = 0):
+        """ Play the given number of games in every lane. """
+        
+        target = self.played + numberOfGames
+        lanes = numpy.flatnonzero(self.played < target)
+        while len(lanes) > 0:
+            if len(self.doOneStep(learningType, lanes)) > 0:
+                lanes = numpy.flatnonzero(self.played < target)
+        
+        
+# --------------------------------- Learning method ----------------------------------------------
+
+
+    # learn from the actual step in every given lane
+    def learn(self, lanes, iCanStep, oppCanStep, x1, y1, x2, y2, move1, pred1, move2, pred2, learningConstant, typeOfLearning):
+        """
+        Learning from the actual step in every lane.
+        
+        Applies the learning method of Agent.learn to player 1 of every given lane at once, with the
+        learnBatch of the registered learner. iCanStep and oppCanStep are boolean arrays; the tiles of
+        the step and the prediction are in the rows after x1 and x2. The learners learn from the games
+        finished by the step too.
+        
+        """
+        
+        finished = (x1 + iCanStep == self.sizeY - 1) | (x2 + oppCanStep == self.sizeY - 1)
+        steps = BatchSteps(lanes, x1, y1, x2, y2, move1, pred1, move2, pred2, iCanStep, oppCanStep, finished)
+        getLearner(typeOfLearning, self.learners).learnBatch(self, steps, learningConstant)
+        
+        
+    # player 1's matrices
+    def getLearnedMatrices(self, matrix):
+        """ Returns player 1's matrices in every lane: 0 - position matrices, 1 - opponent's matrices. """
+        
+        if matrix == 0:
+            return self.p1Pos
+        return self.p1Opp
+        
+        
+    # get tiles of player 1's matrix
+    def getTiles(self, steps, matrix, rows, cols, sel = None):
+        """ Returns the tiles of the lanes of the (selected) steps, with more columns of every step if cols is 2D. """
+        
+        lanes = steps.lanes if sel is None else steps.lanes[sel]
+        if numpy.ndim(cols) == 2:
+            lanes, rows = lanes[:, numpy.newaxis], rows[:, numpy.newaxis]
+        return self.getLearnedMatrices(matrix)[lanes, rows, cols]
+        
+        
+    # multiply the given tiles, and rescale their rows
+    def multiplyTiles(self, steps, matrix, rows, cols, factors, sel = None):
+        if len(rows) == 0:
+            return
+        lanes = steps.lanes if sel is None else steps.lanes[sel]
+        matrices = self.getLearnedMatrices(matrix)
+        matrices[lanes, rows, cols] *= factors
+        self.rescaleRows(matrices, lanes, rows)
+        
+    # add to the given tiles, and rescale their rows
+    def addToTiles(self, steps, matrix, rows, cols, values, sel = None):
+        if len(rows) == 0:
+            return
+        lanes = steps.lanes if sel is None else steps.lanes[sel]
+        matrices = self.getLearnedMatrices(matrix)
+        matrices[lanes, rows, cols] += values
+        self.rescaleRows(matrices, lanes, rows)
+
+    # rescale one row in every given lane
+    def rescaleRows(self, matrices, lanes, rows):
+        temp = matrices[lanes, rows]
+        rescaleRows(temp)
+        matrices[lanes, rows] = temp
+        
+        
+    # the agents of the steps
+    def getAgents(self, steps):
+        """
+        Yields the agent of every step's lane, and the index of the step. The agent gets the matrices of
+        the lane, and they are copied back when the next one is asked for.
+        """
+        
+        for i, lane in enumerate(steps.lanes.tolist()):
+            agent = self.getLaneAgent(lane)
+            agent.setPosMat(self.p1Pos[lane])
+            agent.setOppMat(self.p1Opp[lane])
+            yield agent, slice(i, i + 1)
+            self.p1Pos[lane] = agent.getPosMat()
+            self.p1Opp[lane] = agent.getOppMat()
+            
+            
+    # learn from the steps lane by lane
+    def learnSteps(self, learner, steps, learningConstant):
+        """
+        Learning from the steps lane by lane with the learner (see registerLearner). The agent of the
+        lane gets the matrices of the lane, learns like on a Board (from the finished game too), and the
+        matrices are copied back.
+        
+        """
+        
+        for (agent, sel), iCan, oppCan, x, y, oppX, oppY, step, pred, oppStep, oppPred, finished in \
+            itertools.izip(self.getAgents(steps), steps.canStep1.tolist(), steps.canStep2.tolist(), steps.x1.tolist(), steps.y1.tolist(),
+                steps.x2.tolist(), steps.y2.tolist(), steps.move1.tolist(), steps.pred1.tolist(), steps.move2.tolist(),
+                steps.pred2.tolist(), steps.finished.tolist()):
+            agent.setOwnCoord(x, y)
+            agent.setOppCoord(oppX, oppY)
+            learner.learn(agent, int(iCan), int(oppCan), [[x + 1, step], [oppX + 1, pred]], [[oppX + 1, oppStep], [x + 1, oppPred]], learningConstant)
+            if finished:
+                learner.learnFromGame(agent)
+
+
+
+# -----------------------------------------------------------------------------------------------------  
+# ----------------------------------------- BatchSteps class ------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class BatchSteps:
+    """
+    The steps of a BatchBoard's lanes, player 1 learns from them with Learner.learnBatch.
+    
+    The attributes are the arrays of a TraceChunk (see mensico_trace_v16), with one element for each
+    lane: the tiles of the players before the step (x1, y1, x2, y2), the columns of the decisions (move1,
+    pred1, move2, pred2), who could step (canStep1, canStep2), whether the game is over after the step
+    (finished), and the lanes of the steps (lanes).
+    
+    """
+    
+    # store the steps
+    def __init__(self, lanes, x1, y1, x2, y2, move1, pred1, move2, pred2, canStep1, canStep2, finished):
+        self.lanes = lanes
+        self.x1, self.y1, self.x2, self.y2 = x1, y1, x2, y2
+        self.move1, self.pred1, self.move2, self.pred2 = move1, pred1, move2, pred2
+        self.canStep1, self.canStep2 = canStep1, canStep2
+        self.finished = finished
+
+
+
+# -----------------------------------------------------------------------------------------------------  
+# ------------------------------------------ Evaluator class ------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class Evaluator:
+    """
+    Computes the exact outcome of the game between two players who do not learn.
+    
+    The state of the game is the two players' tiles. In every state the players' steps and predictions
+    are independent, so player 1 steps to a tile with probability P(step) * (1 - P(predicted)) and
+    stays otherwise - and the same for player 2. The rows never decrease, so the states are solved
+    backwards from the last rows, the staying-in-place loop is summed up as a geometric series.
+    
+    """
+    
+    # init the evaluator with the four matrices of the players
+    def __init__(self, p1_pos, p1_opp, p2_pos, p2_opp, size_x = 5, size_y = 8, p1_prob = None, p2_prob = None):
+        self.sizeX = size_x
+        self.sizeY = size_y
+        self.p1Prob = AIPROBOFEXPLORE if p1_prob is None else p1_prob
+        self.p2Prob = SOPROBOFEXPLORE if p2_prob is None else p2_prob
+        self.p1Pos = numpy.asarray(p1_pos, dtype = numpy.float64)
+        self.p1Opp = numpy.asarray(p1_opp, dtype = numpy.float64)
+        self.p2Pos = numpy.asarray(p2_pos, dtype = numpy.float64)
+        self.p2Opp = numpy.asarray(p2_opp, dtype = numpy.float64)
+        self.values = None
+        
+        
+    # the outcomes of a player's steps from every tile
+    def moveProbabilities(self, steps, predictions):
+        """
+        Returns the probabilities of stepping to the three tiles, and of staying in place.
+        
+        The player can not step if the opponent predicted the step.
+        """
+        
+        move = steps * (1.0 - predictions)
+        stay = (steps * predictions).sum(axis = -1)
+        return move, stay
+        
+        
+    # the values of the neighbouring states
+    def windows(self, values, axis):
+        """ Returns the values of the column - 1, column, column + 1 states along the given column axis. """
+        
+        return numpy.concatenate([numpy.take(values, range(i, i + self.sizeX), axis = axis)[..., numpy.newaxis] \
+                                  for i in range(3)], axis = -1)
+    
+    
+    # solve every state of the game
+    def solve(self):
+        """
+        Compute the outcome of the game from every state.
+        
+        The values are indexed by [row 1, column 1, row 2, column 2, quantity], where the quantities are
+        the probability of player 1 winning, of a draw, of player 2 winning, and the expected number of
+        the remaining rounds. If the players can block each other forever, the probabilities are 0.0 and
+        the expected length is infinite.
+        
+        """
+        
+        last = self.sizeY - 1
+        cols = self.sizeX + 2
+        self.values = numpy.zeros((self.sizeY, cols, self.sizeY, cols, 4))
+        
+        # game over states
+        self.values[last, 1:-1, :last, 1:-1, 0] = 1.0
+        self.values[last, 1:-1, last, 1:-1, 1] = 1.0
+        self.values[:last, 1:-1, last, 1:-1, 2] = 1.0
+        
+        # probabilities of the steps and of the predictions
+        p1Steps = stepProbabilities(self.p1Pos, self.p1Prob)
+        p1Preds = stepProbabilities(self.p1Opp, self.p1Prob)
+        p2Steps = stepProbabilities(self.p2Pos, self.p2Prob)
+        p2Preds = stepProbabilities(self.p2Opp, self.p2Prob)
+        
+        # every round adds one to the length
+        one = numpy.array([0.0, 0.0, 0.0, 1.0])
+        
+        for x1 in range(last - 1, -1, -1):
+            # player 1 is predicted by player 2 from its own tile
+            p1Move, p1Stay = self.moveProbabilities(p1Steps[x1], p2Preds[x1])
+            for x2 in range(last - 1, -1, -1):
+                p2Move, p2Stay = self.moveProbabilities(p2Steps[x2], p1Preds[x2])
+                
+                # both players step
+                both = self.windows(self.windows(self.values[x1 + 1, :, x2 + 1], 0), 1)
+                total = numpy.einsum('ik,jl,ijqkl->ijq', p1Move, p2Move, both)
+                # only player 1 steps
+                first = self.windows(self.values[x1 + 1, :, x2, 1:-1], 0)
+                total += numpy.einsum('ik,j,ijqk->ijq', p1Move, p2Stay, first)
+                # only player 2 steps
+                second = self.windows(self.values[x1, 1:-1, x2 + 1], 1)
+                total += numpy.einsum('i,jl,ijql->ijq', p1Stay, p2Move, second)
+                
+                # nobody steps: the state repeats itself
+                repeat = (p1Stay[:, numpy.newaxis] * p2Stay[numpy.newaxis, :])[..., numpy.newaxis]
+                with numpy.errstate(invalid = 'ignore', divide = 'ignore'):
+                    block = (total + one) / (1.0 - repeat)
+                block = numpy.where(repeat < 1.0, block, numpy.array([0.0, 0.0, 0.0, numpy.inf]))
+                self.values[x1, 1:-1, x2, 1:-1] = block
+                
+        return self.values
+        
+        
+    # evaluate the game from a state
+    def evaluate(self, x1 = 0, y1 = None, x2 = 0, y2 = None):
+        """
+        Returns the probability of player 1 winning, of a draw, of player 2 winning and the expected
+        length of the game, starting from the given tiles (default: the starting tiles).
+        """
+        
+        if self.values is None:
+            self.solve()
+        if y1 is None:
+            y1 = self.sizeX / 2 + 1
+        if y2 is None:
+            y2 = self.sizeX / 2 + 1
+        return self.values[x1, y1, x2, y2].tolist()
+        
+        
+    # gradient of player 1's winning probability
+    def gradient(self):
+        """
+        Returns the derivatives of player 1's winning probability by every element of player 1's
+        position matrix and of player 1's opponent's matrix.
+        
+        The derivatives are propagated backwards through the solution of the game (reverse mode
+        differentiation): from the starting state along the transitions to every state, then from the
+        transitions to the step and prediction probabilities, then to the matrix elements through the
+        normalization of Agent.decide. Player 2's matrices are constants.
+        
+        """
+        
+        if self.values is None:
+            self.solve()
+        last = self.sizeY - 1
+        win = self.values[..., 0]
+        
+        p1Steps = stepProbabilities(self.p1Pos, self.p1Prob)
+        p1Preds = stepProbabilities(self.p1Opp, self.p1Prob)
+        p2Steps = stepProbabilities(self.p2Pos, self.p2Prob)
+        p2Preds = stepProbabilities(self.p2Opp, self.p2Prob)
+        
+        # the sensitivity of the result to the value of every state
+        adjoint = numpy.zeros(win.shape)
+        adjoint[0, self.sizeX / 2 + 1, 0, self.sizeX / 2 + 1] = 1.0
+        # the sensitivity of the result to the step and prediction probabilities
+        stepGradient = numpy.zeros(p1Steps.shape)
+        predGradient = numpy.zeros(p1Preds.shape)
+        
+        # the states are visited forwards, every state gets its sensitivity before it is visited
+        for x1 in range(last):
+            p1Move, p1Stay = self.moveProbabilities(p1Steps[x1], p2Preds[x1])
+            for x2 in range(last):
+                p2Move, p2Stay = self.moveProbabilities(p2Steps[x2], p1Preds[x2])
+                repeat = p1Stay[:, numpy.newaxis] * p2Stay[numpy.newaxis, :]
+                weight = numpy.where(repeat < 1.0, adjoint[x1, 1:-1, x2, 1:-1] / numpy.maximum(1.0 - repeat, MINFLOAT), 0.0)
+                
+                # the values of the state and of its successors
+                both = self.windows(self.windows(win[x1 + 1, :, x2 + 1], 0), 1)
+                first = self.windows(win[x1 + 1, :, x2, 1:-1], 0)
+                second = self.windows(win[x1, 1:-1, x2 + 1], 1)
+                same = win[x1, 1:-1, x2, 1:-1]
+                
+                # derivatives by player 1's steps: the step is taken or blocked
+                moveGradient = numpy.einsum('ij,jl,ijkl->ik', weight, p2Move, both) + \
+                               numpy.einsum('ij,j,ijk->ik', weight, p2Stay, first)
+                stayGradient = numpy.einsum('ij,jl,ijl->i', weight, p2Move, second) + \
+                               numpy.einsum('ij,j,ij->i', weight, p2Stay, same)
+                stepGradient[x1] += moveGradient * (1.0 - p2Preds[x1]) + stayGradient[:, numpy.newaxis] * p2Preds[x1]
+                
+                # derivatives by player 1's predictions: a predicted step of player 2 is blocked
+                moveGradient = numpy.einsum('ij,ik,ijkl->jl', weight, p1Move, both) + \
+                               numpy.einsum('ij,i,ijl->jl', weight, p1Stay, second)
+                stayGradient = numpy.einsum('ij,ik,ijk->j', weight, p1Move, first) + \
+                               numpy.einsum('ij,i,ij->j', weight, p1Stay, same)
+                predGradient[x2] += p2Steps[x2] * (stayGradient[:, numpy.newaxis] - moveGradient)
+                
+                # propagate the sensitivity to the successor states
+                for k in range(3):
+                    for l in range(3):
+                        adjoint[x1 + 1, k:k + self.sizeX, x2 + 1, l:l + self.sizeX] += weight * numpy.outer(p1Move[:, k], p2Move[:, l])
+                    adjoint[x1 + 1, k:k + self.sizeX, x2, 1:-1] += weight * numpy.outer(p1Move[:, k], p2Stay)
+                    adjoint[x1, 1:-1, x2 + 1, k:k + self.sizeX] += weight * numpy.outer(p1Stay, p2Move[:, k])
+        
+        return [self.matrixGradient(self.p1Pos, stepGradient, self.p1Prob),
+                self.matrixGradient(self.p1Opp, predGradient, self.p1Prob)]
+        
+        
+    # from the derivatives by the step probabilities to the derivatives by the matrix elements
+    def matrixGradient(self, matrix, gradients, prob):
+        """
+        Returns the derivatives by the elements of the matrix.
+        
+        The steps are the normalized elements of the next row, mixed with uniform exploring, see
+        stepProbabilities. The gradients are indexed like the step probabilities.
+        
+        """
+        
+        result = numpy.zeros(matrix.shape)
+        for x in range(self.sizeY - 1):
+            weights = numpy.concatenate([matrix[x + 1, i:i + self.sizeX, numpy.newaxis] for i in range(3)], axis = 1)
+            possible = weights > 0.0
+            weights = numpy.where(possible, weights, 0.0)
+            summa = numpy.maximum(weights.sum(axis = 1, keepdims = True), MINFLOAT)
+            mean = (gradients[x] * weights).sum(axis = 1, keepdims = True) / summa
+            elements = numpy.where(possible, prob * (gradients[x] - mean) / summa, 0.0)
+            for k in range(3):
+                result[x + 1, k:k + self.sizeX] += elements[:, k]
+        return result
+
 
 
 # stores and calculates error
 class Error:
-    """ Stores and calculates error between two MensIco player. """
+    """
+    Stores and calculates error between two MensIco player.
+    
+    The matrices can be given as ProbMats, then the error of every row is stored together with the
+    version stamps of the rows it was computed from, and only the modified rows are computed again.
+    Plain matrices are computed from scratch every time.
+    
+    """
 
     # init 
     def __init__(self, P_Pos = None, P_Opp = None, Q_Pos = None, Q_Opp = None, typeOfError = 0):
@@ -1163,6 +2874,9 @@ class Error:
         self.Q_Opp = Q_Opp
         self.value = None
         self.typeOfError = typeOfError
+        # the inverted rows of Q_Opp, and the errors of the rows, with the versions of their rows
+        self.inverted = {}
+        self.contributions = {}
 
 # setters, getters
 
@@ -1176,49 +2890,102 @@ class Error:
         return self.typeOfError
         
     def setTypeOfError(self, value):
-        if value >= 0 and value <= 2 and type(value) == type(1):
+        if value >= 0 and value <= 4 and type(value) == type(1):
             self.typeOfError = value
 
+# row handling methods
+
+    # the rows and the version stamps of a matrix
+    def getRows(self, matrix):
+        """ Returns the rows of a ProbMat or a plain matrix, and the versions of the rows (None if unknown). """
+        
+        if isinstance(matrix, ProbMat):
+            return matrix.getMatrix(), matrix.versions
+        return matrix, None
+        
+        
+    # a row of the opponent's prediction matrix, inverted
+    def getInvertedRow(self, rows, versions, x):
+        """
+        Returns the x-th row of Q_Opp inverted: every non-zero value is replaced by 1.0 / value, then
+        the row is rescaled back to sum = 1.0, because we want to do the opposite of the opponent's
+        prediction.
+        """
+        
+        if versions is not None and x in self.inverted and self.inverted[x][0] == versions[x]:
+            return self.inverted[x][1]
+        
+        # create a copy of the opponent's pred matrix's actual line
+        temp = toList(rows[x])
+        for i in range(0, len(temp)):
+            if not temp[i] == 0.0:
+                temp[i] = 1.0 / temp[i]
+        
+        # rescale it back to sum = 1.0                
+        temp_summa = sum(temp)
+        for i in range(0, len(temp)):
+            temp[i] = temp[i] / temp_summa
+        
+        if versions is not None:
+            self.inverted[x] = (versions[x], temp)
+        return temp
+        
+        
+    # sum up the errors of the rows
+    def sumRows(self, rowError, invert = 1, first = 1):
+        """
+        Returns the sum of the rowError of the rows of P_Opp and Q_Pos, and of the rows of P_Pos and
+        the (inverted) Q_Opp from the first row, divided by 2.
+        
+        The error of a row is computed again only if one of its rows has a new version since the
+        last call.
+        
+        """
+        
+        P_Pos, P_Pos_versions = self.getRows(self.P_Pos)
+        P_Opp, P_Opp_versions = self.getRows(self.P_Opp)
+        Q_Pos, Q_Pos_versions = self.getRows(self.Q_Pos)
+        Q_Opp, Q_Opp_versions = self.getRows(self.Q_Opp)
+        
+        pairs = [[P_Opp, P_Opp_versions, Q_Pos, Q_Pos_versions, 0, 0],
+                 [P_Pos, P_Pos_versions, Q_Opp, Q_Opp_versions, invert, first]]
+        
+        error = 0.0
+        for pair, (P, P_versions, Q, Q_versions, inverse, start) in enumerate(pairs):
+            for x in range(start, min(len(P), len(Q))):
+                key = (rowError.__name__, pair, x)
+                if P_versions is None or Q_versions is None:
+                    versions = None
+                else:
+                    versions = (P_versions[x], Q_versions[x])
+                    if key in self.contributions and self.contributions[key][0] == versions:
+                        error += self.contributions[key][1]
+                        continue
+                
+                if inverse:
+                    value = rowError(toList(P[x]), self.getInvertedRow(Q, Q_versions, x))
+                else:
+                    value = rowError(toList(P[x]), toList(Q[x]))
+                if versions is not None:
+                    self.contributions[key] = (versions, value)
+                error += value
+        
+        return error / 2.0
+
 # error calculation methods
 
     # measure the difference between the optimal and actual probabilities
     def getRMSE(self):
         """ Calculate RMSE between the optimal and actual probabilities. """
         
-        rmse = 0.0
+        return self.sumRows(self.rowRMSE)
         
-        # difference of the prediction's probability and the opponent's step's probability
-        for p1, p2 in itertools.izip(self.P_Opp, self.Q_Pos):
-            for elem1, elem2 in itertools.izip(p1, p2):
-                rmse += math.sqrt((elem2 - elem1)**2)
-        
-        # help variable
-        act = 0
-        # difference of the step's probability and the opponent's prediction's probability
-        for p1, p2 in itertools.izip(self.P_Pos, self.Q_Opp):
-            # if it's not the first row:
-            if not act == 0:
-                # create a copy of the opponent's pred matrix's actual line
-                temp = p2[:]
-                # get the 1.0 - value, because we want to do the opposite
-                # of the opponent's prediction
-                for i in range(0, len(temp)):
-                    if not temp[i] == 0.0:
-                        temp[i] = 1.0 / temp[i]
-                
-                # rescale it back to sum = 1.0                
-                temp_summa = sum(temp)
-                for i in range(0, len(temp)):
-                    temp[i] = temp[i] / temp_summa
-                
-                # get the differences
-                for elem1, elem2 in itertools.izip(p1, temp):
-                    rmse += math.sqrt((elem2 - elem1)**2)
-                    
-            # we're not in the first row anymore!    
-            act += 1
-            
-        return rmse / 2.0
+    # the RMSE of a row
+    def rowRMSE(self, p, q):
+        rmse = 0.0
+        for elem1, elem2 in itertools.izip(p, q):
+            rmse += math.sqrt((elem2 - elem1)**2)
+        return rmse
 
 
 
@@ -1229,43 +2996,15 @@ class Error:
     def getKLDiv(self):
         """ Calculate the Kullback-Leibler divergence between the optimal and actual probabilities. """
         
-        kldiv = 0.0
+        return self.sumRows(self.rowKLDiv)
         
-        # difference of the prediction's probability and the opponent's step's probability
-        for p1, p2 in itertools.izip(self.P_Opp, self.Q_Pos):
-            for elem1, elem2 in itertools.izip(p1, p2):
-                if not elem2 == 0.0 and not elem1 == 0.0:
-                    kldiv += elem1 * math.log(elem1 / elem2)
-        
-        # help variable
-        act = 0
-        # difference of the step's probability and the opponent's prediction's probability
-        for p1, p2 in itertools.izip(self.P_Pos, self.Q_Opp):
-            # if it's not the first row:
-            if not act == 0:
-                # create a copy of the opponent's pred matrix's actual line
-                temp = p2[:]
-                # get the 1.0 - value, because we want to do the opposite
-                # of the opponent's prediction
-                for i in range(0, len(temp)):
-                    if not temp[i] == 0.0:
-                        temp[i] = 1.0 / temp[i]
-                
-                # rescale it back to sum = 1.0                
-                temp_summa = sum(temp)
-                for i in range(0, len(temp)):
-                    temp[i] = temp[i] / temp_summa
-                
-                # get the differences
-                for elem1, elem2 in itertools.izip(p1, temp):
-                    if not elem2 == 0.0 and not elem1 == 0.0:
-                        kldiv += elem1 * math.log(elem1 / elem2)
-
-                    
-            # we're not in the first row anymore!    
-            act += 1
-            
-        return kldiv / 2.0        
+    # the Kullback-Leibler divergence of a row
+    def rowKLDiv(self, p, q):
+        kldiv = 0.0
+        for elem1, elem2 in itertools.izip(p, q):
+            if not elem2 == 0.0 and not elem1 == 0.0:
+                kldiv += elem1 * math.log(elem1 / elem2)
+        return kldiv
         
         
         
@@ -1276,42 +3015,15 @@ class Error:
     def getChiSquareDiv(self):
         """ Calculate the Chi square divergence between the optimal and actual probabilities. """
         
-        chiSquareDiv = 0.0
+        return self.sumRows(self.rowChiSquareDiv)
         
-        # difference of the prediction's probability and the opponent's step's probability
-        for p1, p2 in itertools.izip(self.P_Opp, self.Q_Pos):
-            for elem1, elem2 in itertools.izip(p1, p2):
-                if not elem2 == 0.0:
-                    chiSquareDiv += ((elem1 - elem2)**2) / elem2
-        
-        # help variable
-        act = 0
-        # difference of the step's probability and the opponent's prediction's probability
-        for p1, p2 in itertools.izip(self.P_Pos, self.Q_Opp):
-            # if it's not the first row:
-            if not act == 0:
-                # create a copy of the opponent's pred matrix's actual line
-                temp = p2[:]
-                # get the 1.0 - value, because we want to do the opposite
-                # of the opponent's prediction
-                for i in range(0, len(temp)):
-                    if not temp[i] == 0.0:
-                        temp[i] = 1.0 / temp[i]
-                
-                # rescale it back to sum = 1.0                
-                temp_summa = sum(temp)
-                for i in range(0, len(temp)):
-                    temp[i] = temp[i] / temp_summa
-                
-                # get the differences
-                for elem1, elem2 in itertools.izip(p1, temp):
-                    if not elem2 == 0.0:
-                        chiSquareDiv += ((elem1 - elem2)**2) / elem2
-                    
-            # we're not in the first row anymore!    
-            act += 1
-            
-        return chiSquareDiv / 2.0    
+    # the Chi square divergence of a row
+    def rowChiSquareDiv(self, p, q):
+        chiSquareDiv = 0.0
+        for elem1, elem2 in itertools.izip(p, q):
+            if not elem2 == 0.0:
+                chiSquareDiv += ((elem1 - elem2)**2) / elem2
+        return chiSquareDiv
 
     # Calculate the greatest difference between the opponent's and the player's matrices.
     #   a) (max_i(P_Opp(i)) - Q_Pos(i)) + (max_i(Q_Pos(i)) - P_Opp(i)) - because we want to minimize the difference
@@ -1319,21 +3031,53 @@ class Error:
     def getGreatestDifference(self):
         """ Returns the greatest difference between the two player's matrices. """
         
-        error = 0.0  
-        
         # calculate the difference between maximum value of the player's maximum value
-        # and the opponent's value on the same tile and vice versa 
-        for P_line, Q_line in itertools.izip(self.P_Opp, self.Q_Pos):
-            error += float((max(P_line) - Q_line[P_line.index(max(P_line))]) + (max(Q_line) - P_line[Q_line.index(max(Q_line))]))
-
-        # calculate the inverse of the difference between maximum value of the player's maximum value
-        # and the opponent's value on the same tile and vice versa
-        for P_line, Q_line in itertools.izip(self.P_Pos, self.Q_Opp):
-            temp = float((max(P_line) - Q_line[P_line.index(max(P_line))]) + (max(Q_line) - P_line[Q_line.index(max(Q_line))]))
-            if not temp == 0:
-                error += temp
-            
-        return error / 2.0
+        # and the opponent's value on the same tile and vice versa, on every row
+        return self.sumRows(self.rowGreatestDifference, invert = 0, first = 0)
+        
+    # the greatest difference of a row
+    def rowGreatestDifference(self, P_line, Q_line):
+        return float((max(P_line) - Q_line[P_line.index(max(P_line))]) + (max(Q_line) - P_line[Q_line.index(max(Q_line))]))
+        
+    # calculate every error at once
+    def getAllErrors(self):
+        """
+        Returns the RMSE, the Kullback-Leibler divergence, the Chi square divergence and the greatest
+        difference in a list (see ERRORNAMES).
+        
+        All of them are computed in one pass over the whole matrices, the inverted Q_Opp is normalized
+        only once for all of them.
+        
+        """
+        
+        P_Pos = numpy.asarray(self.getRows(self.P_Pos)[0], dtype = numpy.float64)
+        P_Opp = numpy.asarray(self.getRows(self.P_Opp)[0], dtype = numpy.float64)
+        Q_Pos = numpy.asarray(self.getRows(self.Q_Pos)[0], dtype = numpy.float64)
+        Q_Opp = numpy.asarray(self.getRows(self.Q_Opp)[0], dtype = numpy.float64)
+        
+        # invert the opponent's prediction, and rescale it back to sum = 1.0 - except the first row
+        with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+            inverted = numpy.where(Q_Opp[1:] != 0.0, 1.0 / Q_Opp[1:], 0.0)
+            inverted /= inverted.sum(axis = 1, keepdims = True)
+        
+        # the compared rows: the predictions with the opponent's steps, the steps with the inverted
+        # predictions of the opponent
+        p = numpy.concatenate([P_Opp, P_Pos[1:]])
+        q = numpy.concatenate([Q_Pos, inverted])
+        with numpy.errstate(divide = 'ignore', invalid = 'ignore'):
+            rmse = numpy.abs(q - p).sum()
+            kldiv = numpy.where((p != 0.0) & (q != 0.0), p * numpy.log(p / q), 0.0).sum()
+            chiSquareDiv = numpy.where(q != 0.0, (p - q)**2 / q, 0.0).sum()
+        
+        # the greatest difference compares the opponent's predictions without inverting, on every row
+        p = numpy.concatenate([P_Opp, P_Pos])
+        q = numpy.concatenate([Q_Pos, Q_Opp])
+        rows = numpy.arange(len(p))
+        pMax, qMax = p.argmax(axis = 1), q.argmax(axis = 1)
+        difference = ((p[rows, pMax] - q[rows, pMax]) + (q[rows, qMax] - p[rows, qMax])).sum()
+        
+        return [float(rmse) / 2.0, float(kldiv) / 2.0, float(chiSquareDiv) / 2.0, float(difference) / 2.0]
+        
         
     # calculates the error value
     def calculateError(self):
@@ -1345,6 +3089,7 @@ class Error:
         1 - Kullback - Leibler Divergence
         2 - Chi-Squared Divergence.
         3 - Greatest Difference
+        4 - all of them, in a list (see getAllErrors)
         """
         if self.typeOfError == 0:
             self.value = self.getRMSE()
@@ -1354,6 +3099,8 @@ class Error:
             self.value = self.getChiSquareDiv()
         elif self.typeOfError == 3:
             self.value = self.getGreatestDifference()
+        elif self.typeOfError == 4:
+            self.value = self.getAllErrors()
         else:
             print 'Error calculation error!'
             raise
@@ -27,7 +27,9 @@ from tkFileDialog import *
 from tkMessageBox import *
 from fractions import Fraction
 from data.tabs import *
-from data.mensico_engine_v15 import *
+from data.mensico_engine_v16 import *
+from data.mensico_sim_v16 import runTest
+from data.mensico_trace_v16 import TraceRecorder, TRACEEXTENSION
 import itertools
 
 
@@ -198,6 +200,9 @@ class GameWindow(Tk):
         Tk.__init__(self)
         # create the game field
         self.game = BoardInGUI(human = 1)
+        # record the games, the learner can be trained from them offline
+        self.recorder = TraceRecorder()
+        self.recorder.attach(self.game)
         
         # try to use pygame sounds
         try:
@@ -290,13 +295,16 @@ class GameWindow(Tk):
         Label(self, text = '\n\nLearner').pack(side = TOP, padx = 5, pady = 5)
 
         # load strategy button
-        self.loadButton = Button(self, text = 'Load', command = lambda: self.game.player1.loadStrategy(askopenfilename(filetypes = [('MensIco Strategy Files','*.mstr')])))
+        self.loadButton = Button(self, text = 'Load', command = lambda: self.game.player1.loadStrategy(askopenfilename(filetypes = [('MensIco Strategy Files','*.mstr'), ('MensIco Binary Strategy Files','*.mbin')])))
         self.loadButton.pack(side = TOP, padx = 5, pady = 5)
 
         # save strategy button
-        self.saveButton = Button(self, text = 'Save', command = lambda: self.game.player1.saveStrategy(asksaveasfilename(filetypes = [('MensIco Strategy Files','*.mstr')])))
+        self.saveButton = Button(self, text = 'Save', command = lambda: self.game.player1.saveStrategy(asksaveasfilename(filetypes = [('MensIco Strategy Files','*.mstr'), ('MensIco Binary Strategy Files','*.mbin')])))
         self.saveButton.pack(side = TOP, padx = 5, pady = 5)
 
+        # save trace button
+        Button(self, text = 'Save Trace', command = lambda: self.saveTrace(asksaveasfilename(filetypes = [('MensIco Trace Files','*' + TRACEEXTENSION)]))).pack(side = TOP, padx = 5, pady = 5)
+
         # quit button
         Button(self, text = 'Quit', command = self.closeAll).pack(side = BOTTOM, padx = 5, pady = 5)
         self.protocol('WM_DELETE_WINDOW', self.closeAll)
@@ -323,6 +331,12 @@ class GameWindow(Tk):
         self.destroy()
         self.parent.quit()
 
+    # save the recorded games
+    def saveTrace(self, filename):
+        """ Save the games played in the window to a trace file. """
+        if filename:
+            self.recorder.save(filename)
+
         
         
 # --------------------------- Drawing Methods -------------------------------------
@@ -668,7 +682,7 @@ class TestWindow(Tk):
         self.selectedLearner = IntVar(master = self)
         self.selectedLearner.set(0)
         # list of the learners for radiobuttons
-        self.options = ['NULL learner', 'Dummy learner', 'Neural learner v1', 'Neural learner v2', 'ADABoost learner', 'Naive Bayes learner']
+        self.options = ['NULL learner', 'Dummy learner', 'Neural learner v1', 'Neural learner v2', 'ADABoost learner', 'Naive Bayes learner', 'Gradient learner']
 
         # create setup area
         # create a separate frame for the setup
@@ -682,6 +696,11 @@ class TestWindow(Tk):
         self.numberOfGames = Scale(self.setupFrame, length = 250, orient = HORIZONTAL, label ='Number of games to play:',\
             troughcolor ='dark grey', sliderlength = 20, showvalue = 1, from_ = 0, to = 10000, tickinterval = 5000)
         self.numberOfGames.pack(padx = 5, pady = 5)
+        
+        # measure the time of the phases of the test, the result is printed to the standard output
+        self.collectStats = IntVar(master = self)
+        self.collectStats.set(0)
+        Checkbutton(self.setupFrame, text = 'Collect stats', variable = self.collectStats).pack(side = TOP, padx = 5, pady = 5)
              
         # create buttons
         # test button
@@ -692,7 +711,7 @@ class TestWindow(Tk):
         Label(self, text = 'Opponent').pack(side = TOP, padx = 5)
         
         # Load opponent strategy button
-        self.loadButton = Button(self, text = 'Load', command = lambda: self.game.player2.loadStrategy(askopenfilename(filetypes = [('MensIco Strategy Files','*.mstr')])))
+        self.loadButton = Button(self, text = 'Load', command = lambda: self.game.player2.loadStrategy(askopenfilename(filetypes = [('MensIco Strategy Files','*.mstr'), ('MensIco Binary Strategy Files','*.mbin')])))
         self.loadButton.pack(side = TOP, padx = 5)
         
         # Caption
@@ -758,11 +777,9 @@ class TestWindow(Tk):
         # get the learner type and the number of games to play
         numGam = self.numberOfGames.get()
         ltype = self.selectedLearner.get()
-        matrices = self.game.getMatrices()
-        # logging variables
+        matrices = self.game.getProbMats()
+        # logging variables - the error follows the changed rows only, so it is sampled after every game
         self.error = Error(matrices[0], matrices[1], matrices[2], matrices[3], 1) 
-        self.error_list = []
-        self.wins = []
 
 
         self.progress = Toplevel(self)
@@ -771,29 +788,18 @@ class TestWindow(Tk):
         bar.pack(padx = 5, pady = 5)        
         amount = 100.0 / float(numGam / 100)
         
+        # update the progress bar
+        def progress(i):
+            bar.step(amount)
+            self.progress.update_idletasks()
+        
         # run the test numberOfGames times
-        for i in range(numGam):
-            while not self.game.isGameOver():
-                self.game.doOneStep(ltype)
-            # log the error value and the win ratio
-            if i < 150:
-                self.error.calculateError()
-                self.error_list.append([i, self.error.getError()])
-                if not float(self.game.player1.getWins() + self.game.player2.getWins()) == 0.0:
-                    self.wins.append([i, float(self.game.player1.getWins())/float(self.game.player1.getWins() + self.game.player2.getWins())])
-                else:
-                    self.wins.append([i, 0.0])
-            elif i % 60 == 0:
-                self.error.calculateError()
-                self.error_list.append([i, self.error.getError()])
-                if not float(self.game.player1.getWins() + self.game.player2.getWins()) == 0.0:
-                    self.wins.append([i, float(self.game.player1.getWins())/float(self.game.player1.getWins() + self.game.player2.getWins())])
-                else:
-                    self.wins.append([i, 0.0])
-            self.game.reset()
-            if i % 100 == 0:
-                bar.step(amount)
-                self.progress.update_idletasks()           
+        if self.collectStats.get():
+            self.game.enableStats()
+        self.error_list, self.wins = runTest(self.game, numGam, ltype, self.error, progress = progress, sampleEvery = 1)
+        if self.game.stats is not None:
+            self.game.stats.dump()
+            self.game.disableStats()
         
         self.progress.destroy()
         
@@ -884,7 +890,7 @@ class TestWindow(Tk):
             command = lambda: self.game.player1.logOppMat(asksaveasfilename(filetypes = [('Comma Separated Values File','*.csv')]))).pack(side = LEFT, pady = 5)
          
         # save strategy button
-        Button(tab_probability_plots, text = 'Save Strategy', command = lambda: self.game.player1.saveStrategy(asksaveasfilename(filetypes = [('MensIco Strategy Files','*.mstr')]))).pack(side = TOP, padx = 5)
+        Button(tab_probability_plots, text = 'Save Strategy', command = lambda: self.game.player1.saveStrategy(asksaveasfilename(filetypes = [('MensIco Strategy Files','*.mstr'), ('MensIco Binary Strategy Files','*.mbin')]))).pack(side = TOP, padx = 5)
         
 
         
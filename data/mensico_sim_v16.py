@@ -0,0 +1,199 @@
+# -*- coding:Utf-8 -*-
+## ----- mensico_sim_v16.py -----
+##
+##  The program runs the MensIco tests without a graphical user interface.
+##
+##
+##  Functions:
+##      - runTest
+##          Plays the games of a test, and samples the error and the win ratio.
+##
+##      - main
+##          Command line interface of the tester.
+##
+##
+## Copyright (C) 2012, Fülöp, András, fulibacsi@gmail.com
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <http://www.gnu.org/licenses/>.
+##
+
+
+import sys
+import argparse
+from data.mensico_engine_v16 import *
+from data.mensico_trace_v16 import TraceRecorder
+
+
+# the error and the win ratio is logged after each of the first SAMPLEALL games...
+SAMPLEALL = 150
+# ...then after every SAMPLEEVERY-th game
+SAMPLEEVERY = 60
+
+# how often the progress callback is called (in games)
+PROGRESSEVERY = 100
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ------------------------------------------- Test function -------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+# play the games of a test
+def runTest(game, numberOfGames, typeOfLearning, error, logFile = None, progress = None, sampleEvery = SAMPLEEVERY):
+    """
+    Play numberOfGames games on the board with the selected learning method.
+
+    After each of the first SAMPLEALL games, then after every sampleEvery-th game the error value and
+    the win ratio of player 1 is sampled. If the error is measured on the players' ProbMats (see
+    Board.getProbMats), only the modified rows are measured again, so it can be sampled after every
+    game. The samples are returned as two lists of [iteration, value]
+    pairs, and if a logFile is given, they are streamed into it as well. The progress function is
+    called with the number of the actual game in every PROGRESSEVERY games. If the board measures its
+    phases (see Board.enableStats), the error measuring and the progress are measured as well.
+
+    """
+
+    error_list = []
+    wins = []
+
+    if game.stats is not None:
+        game.stats.wrap(error, 'calculateError', 'error')
+        if progress is not None:
+            progress = game.stats.timed(progress, 'progress')
+
+    for i in range(numberOfGames):
+        while not game.isGameOver():
+            game.doOneStep(typeOfLearning)
+        # log the error value and the win ratio
+        if i < SAMPLEALL or i % sampleEvery == 0:
+            error.calculateError()
+            error_list.append([i, error.getError()])
+            if not float(game.player1.getWins() + game.player2.getWins()) == 0.0:
+                wins.append([i, float(game.player1.getWins())/float(game.player1.getWins() + game.player2.getWins())])
+            else:
+                wins.append([i, 0.0])
+            if logFile is not None:
+                logFile.write(str(i) + '; ' + formatError(error_list[-1][1]) + '; ' + str(wins[-1][1]) + '\n')
+        game.reset()
+        if i % PROGRESSEVERY == 0:
+            if logFile is not None:
+                logFile.flush()
+            if progress is not None:
+                progress(i)
+
+    if game.stats is not None:
+        game.stats.unwrap(error)
+    return error_list, wins
+
+
+# format an error value for the log
+def formatError(value):
+    """ Returns the error value as a string, the errors of type 4 separated by '; '. """
+
+    if isinstance(value, list):
+        return '; '.join([str(elem) for elem in value])
+    return str(value)
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ------------------------------------------- Main function -------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+# parse the command line
+def parseArguments(args):
+    """ Parse the command line arguments. """
+
+    parser = argparse.ArgumentParser(description = VERSION + ' headless tester')
+    parser.add_argument('-l', '--learner', type = int, default = LEARNINGTYPE,
+                        help = 'type of learning, one of the registered ones (default: %(default)s)')
+    parser.add_argument('-o', '--opponent', default = None,
+                        help = 'strategy file of the opponent (default: initial strategy)')
+    parser.add_argument('-n', '--games', type = int, default = 1000,
+                        help = 'number of games to play (default: %(default)s)')
+    parser.add_argument('-e', '--error', type = int, default = ERRORTYPE, choices = range(5),
+                        help = 'type of error measuring (default: %(default)s)')
+    parser.add_argument('--sample-every', type = int, default = SAMPLEEVERY,
+                        help = 'sample the error after every n-th game after the first %d games (default: %%(default)s)' % SAMPLEALL)
+    parser.add_argument('-s', '--seed', type = int, default = None,
+                        help = 'seed of the random generator (default: random)')
+    parser.add_argument('-f', '--output', default = '-',
+                        help = 'file for the error and win ratio series (default: standard output)')
+    parser.add_argument('--learner-strategy', default = None,
+                        help = 'strategy file of the learner to start from')
+    parser.add_argument('--trace', default = None,
+                        help = 'record the steps of the games to this trace file')
+    parser.add_argument('--save', default = None,
+                        help = 'save the learned strategy to this file (.mstr or .mbin)')
+    parser.add_argument('--stats', action = 'store_true',
+                        help = 'measure the time of the phases of the games, and show it at the end')
+    parser.add_argument('-m', '--matrices', type = int, default = MATRIXMODE, choices = range(3),
+                        help = 'storage of the matrices: 0 - probabilities, 1 - lazy normalization, 2 - logarithms ' \
+                               '(default: %(default)s)')
+    return parser.parse_args(args)
+
+
+# main function
+def main(args = None):
+    """ Run a test from the command line. """
+
+    options = parseArguments(sys.argv[1:] if args is None else args)
+
+    # set up the game
+    game = Board(seed = options.seed, matrixMode = options.matrices)
+    getLearner(options.learner, game.learners)
+    if options.opponent is not None:
+        game.player2.loadStrategy(options.opponent, 1)
+    if options.learner_strategy is not None:
+        game.player1.loadStrategy(options.learner_strategy, 1)
+    matrices = game.getProbMats()
+    error = Error(matrices[0], matrices[1], matrices[2], matrices[3], options.error)
+    if options.trace is not None:
+        recorder = TraceRecorder()
+        recorder.attach(game)
+    if options.stats:
+        game.enableStats()
+
+    # open the output
+    if options.output == '-':
+        logFile = sys.stdout
+    else:
+        try:
+            logFile = open(options.output, 'w')
+        except:
+            print >> sys.stderr, "Can't write to", options.output, "!"
+            raise
+    if options.error == 4:
+        logFile.write("iteration; " + '; '.join(ERRORNAMES) + "; win ratio\n")
+    else:
+        logFile.write("iteration; error; win ratio\n")
+
+    # run the test
+    runTest(game, options.games, options.learner, error, logFile, sampleEvery = options.sample_every)
+
+    if not logFile is sys.stdout:
+        logFile.close()
+
+    # show the results
+    print >> sys.stderr, 'AI wins: ' + str(game.player1.getWins()) + '\nOpp wins: ' + str(game.player2.getWins())
+    if options.stats:
+        game.stats.dump(sys.stderr)
+    if options.save is not None:
+        game.player1.saveStrategy(options.save, options.learner)
+    if options.trace is not None:
+        recorder.save(options.trace)
+
+
@@ -0,0 +1,141 @@
+# -*- coding:Utf-8 -*-
+## ----- mensico_stats_v16.py -----
+##
+##  The program measures where the time of the games goes.
+##
+##
+##  The methods of the measured objects are replaced by timed wrappers on the objects themselves (as
+##  instance attributes, or in a subclass of their own for the objects with __slots__), so nothing is
+##  measured and nothing is slower until a Stats is attached, and the original methods are back after
+##  it is detached. The times are inclusive: the time of a learning step contains the time of its
+##  rescaling as well.
+##
+##
+##  Classes:
+##      - Stats
+##          Counts the calls and sums the time of the phases of the games.
+##
+##
+## Copyright (C) 2012, Fülöp, András, fulibacsi@gmail.com
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <http://www.gnu.org/licenses/>.
+##
+
+
+import sys
+from timeit import default_timer
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# -------------------------------------------- Stats class --------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class Stats:
+    """ Counts the calls and sums the time of the phases. """
+
+    # init the counters
+    def __init__(self):
+        self.calls = {}
+        self.times = {}
+        # the wrapped [object, method name, original class] lists, the class is None if the method is
+        # an instance attribute
+        self.wrapped = []
+
+
+    # add a call of a phase
+    def add(self, phase, seconds):
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        self.times[phase] = self.times.get(phase, 0.0) + seconds
+
+
+    # a timed version of a function
+    def timed(self, function, phase, key = None):
+        """
+        Returns the function wrapped: every call is added to the phase. If key is given, every call is
+        added to the 'phase key(arguments)' phase as well, e.g. to the branch of a method it called. The
+        key gets the arguments of the call, the keyword arguments by their names too.
+        """
+
+        add = self.add
+        def wrapper(*args, **kwargs):
+            start = default_timer()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                seconds = default_timer() - start
+                add(phase, seconds)
+                if key is not None:
+                    add(phase + ' ' + key(*args, **kwargs), seconds)
+        return wrapper
+
+
+    # measure a method of an object
+    def wrap(self, obj, name, phase = None, key = None):
+        """
+        Replace the method of the object by its timed version (see timed), the phase is the name by
+        default. An object without instance attributes (with __slots__) gets a subclass of its class
+        with the timed method.
+        """
+
+        if phase is None:
+            phase = name
+        function = self.timed(getattr(obj, name), phase, key)
+        if hasattr(obj, '__dict__'):
+            setattr(obj, name, function)
+            self.wrapped.append([obj, name, None])
+        else:
+            original = obj.__class__
+            obj.__class__ = type(original.__name__, (original,), {'__module__': original.__module__, '__slots__': (), name: staticmethod(function)})
+            self.wrapped.append([obj, name, original])
+
+
+    # stop measuring
+    def unwrap(self, obj = None):
+        """ Restore the methods of the object (default: of every object), the latest wrapped first. """
+
+        for wrapped in reversed(self.wrapped[:]):
+            if obj is None or wrapped[0] is obj:
+                if wrapped[2] is None:
+                    delattr(wrapped[0], wrapped[1])
+                else:
+                    wrapped[0].__class__ = wrapped[2]
+                self.wrapped.remove(wrapped)
+
+
+# getters
+
+    # get the counters
+    def getSnapshot(self):
+        """ Returns the phases in a dictionary: phase: [number of calls, total time in seconds]. """
+
+        return dict([[phase, [self.calls[phase], self.times[phase]]] for phase in self.calls])
+
+# end of getters
+
+
+    # reset the counters
+    def reset(self):
+        self.calls = {}
+        self.times = {}
+
+
+    # write out the counters
+    def dump(self, outfile = sys.stdout):
+        """ Write the phases into a table, ordered by the total time. """
+
+        outfile.write('%-32s %10s %12s %12s\n' % ('phase', 'calls', 'total (s)', 'per call (us)'))
+        for phase, (calls, seconds) in sorted(self.getSnapshot().items(), key = lambda item: -item[1][1]):
+            outfile.write('%-32s %10d %12.4f %12.2f\n' % (phase, calls, seconds, 1e6 * seconds / calls))
@@ -0,0 +1,604 @@
+# -*- coding:Utf-8 -*-
+## ----- mensico_strategy_v16.py -----
+##
+##  The program reads and writes the strategy files of the MensIco players.
+##
+##
+##  Formats:
+##      - .mstr
+##          Text format: the rows of the matrices, one per line, the elements separated by ', '.
+##
+##      - .mbin
+##          Binary format: a header with the board size and the learner's data, then the two
+##          matrices as raw little-endian arrays. It is loaded with mmap, without copying.
+##
+##      - .mlib
+##          Archive of binary strategies, with an index of their names and hashes at the front.
+##          A strategy of an archive is referred as archive.mlib#name.
+##
+##
+##  Classes:
+##      - Strategy
+##          Stores the two matrices of a player, and the metadata of the strategy.
+##
+##      - StrategyArchive
+##          Reads and appends the strategies of an archive.
+##
+##      - StrategyCache
+##          Keeps the recently read strategies in the memory.
+##
+##
+## Copyright (C) 2012, Fülöp, András, fulibacsi@gmail.com
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <http://www.gnu.org/licenses/>.
+##
+
+
+import os
+import glob
+import mmap
+import struct
+import hashlib
+import numpy
+from collections import OrderedDict
+
+
+# extensions of the strategy files
+TEXTEXTENSION = '.mstr'
+BINARYEXTENSION = '.mbin'
+ARCHIVEEXTENSION = '.mlib'
+
+# separator of the archive and the strategy's name
+ARCHIVESEPARATOR = '#'
+
+# binary format: magic bytes and version
+MAGIC = 'MSTB'
+FORMATVERSION = 1
+
+# binary format: header
+#    magic, format version, size of the header, size x, size y, data type of the arrays ('f8' / 'f4'),
+#    type of learning (-1 if unknown), number of wins, name of the strategy
+# the header is padded to HEADERSIZE bytes, then the position and the opponent's matrix follow
+HEADER = struct.Struct('<4sHHHH2shI32s')
+HEADERSIZE = 64
+
+# the longest name of a strategy in the binary format and in the archives, in bytes
+NAMESIZE = 32
+
+# data types of the arrays in the binary format
+DTYPES = {'f8': numpy.dtype('<f8'), 'f4': numpy.dtype('<f4')}
+
+# archive format: magic bytes and version
+ARCHIVEMAGIC = 'MSTA'
+ARCHIVEVERSION = 1
+
+# archive format: header - magic, format version, size of the index blocks, offset of the first block
+# the first index block follows the header, the strategies are stored in the binary format after it
+ARCHIVEHEADER = struct.Struct('<4sHHQ')
+
+# archive format: index blocks - offset of the next block (0 if it is the last one), number of entries,
+# then the entries: name, SHA-1 hash of the matrices, offset and length of the strategy
+# if the last block is full, a new block is appended to the end of the file and linked
+BLOCKHEADER = struct.Struct('<QI4x')
+ENTRY = struct.Struct('<32s20sQI')
+INDEXBLOCKSIZE = 256
+
+# memory limit of the strategy cache, in bytes of the matrices
+CACHEBYTES = 64 * 1024 * 1024
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ------------------------------------------ Strategy class -------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class Strategy:
+    """ The position and the opponent's matrix of a player, and the metadata of the strategy. """
+
+    # init the strategy
+    def __init__(self, pos_mat, opp_mat, learner = -1, wins = 0, name = ''):
+        self.posMat = pos_mat
+        self.oppMat = opp_mat
+        self.learner = learner
+        self.wins = wins
+        self.name = name
+
+
+# getters
+
+    # get the position matrix
+    def getPosMat(self):
+        return self.posMat
+
+    # get the opponent's matrix
+    def getOppMat(self):
+        return self.oppMat
+
+    # get the type of learning which learned the strategy (-1 if unknown)
+    def getLearner(self):
+        return self.learner
+
+    # get the number of wins of the strategy's player
+    def getWins(self):
+        return self.wins
+
+    # get the name of the strategy
+    def getName(self):
+        return self.name
+
+# end of getters
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ------------------------------------------- File functions ------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+# read a text strategy file
+def readText(filename):
+    """ Read a strategy from a .mstr file. """
+
+    infile = open(filename, 'r')
+    problist = infile.readlines()
+    infile.close()
+    temp = [[], []]
+    current = -1
+    actlist = temp[current]
+    for line in problist:
+        if line[0] == '#':
+            current += 1
+            actlist = temp[current]
+        else:
+            actlist.append(map(float, line.rstrip().split(', ')))
+
+    return Strategy(numpy.array(temp[0]), numpy.array(temp[1]), name = strategyName(filename))
+
+
+# write a text strategy file
+def writeText(filename, strategy):
+    """
+    Write a strategy to a .mstr file.
+
+    The elements are written with repr, so they are read back exactly. The metadata is not stored.
+    """
+
+    outfile = open(filename, 'w')
+    for caption, matrix in [["# player move\n", strategy.getPosMat()], ["# player pred\n", strategy.getOppMat()]]:
+        outfile.write(caption)
+        for line in numpy.asarray(matrix, dtype = numpy.float64).tolist():
+            outfile.write(', '.join([repr(elem) for elem in line]) + '\n')
+    outfile.close()
+
+
+# read a binary strategy file
+def readBinary(filename):
+    """
+    Read a strategy from a .mbin file.
+
+    The file is mapped into the memory, the matrices are read-only arrays on the mapped file, nothing
+    is copied. The mapping is closed when both arrays are freed.
+
+    """
+
+    infile = open(filename, 'rb')
+    try:
+        mapped = mmap.mmap(infile.fileno(), 0, access = mmap.ACCESS_READ)
+    finally:
+        infile.close()
+    return unpackBinary(mapped, 0, len(mapped), filename)
+
+
+# write a binary strategy file
+def writeBinary(filename, strategy):
+    """ Write a strategy to a .mbin file, in the data type of its position matrix (float32 or float64). """
+
+    data = packBinary(strategy)
+    outfile = open(filename, 'wb')
+    outfile.write(data)
+    outfile.close()
+
+
+# a strategy in the binary format
+def packBinary(strategy):
+    """ Returns the strategy in the binary format, as a string. The name is cut to NAMESIZE characters. """
+
+    pos_mat = numpy.asarray(strategy.getPosMat())
+    if pos_mat.dtype == numpy.float32:
+        dtype = 'f4'
+    else:
+        dtype = 'f8'
+    pos_mat = numpy.ascontiguousarray(pos_mat, dtype = DTYPES[dtype])
+    opp_mat = numpy.ascontiguousarray(strategy.getOppMat(), dtype = DTYPES[dtype])
+    size_y, size_x = pos_mat.shape[0], pos_mat.shape[1] - 2
+
+    header = HEADER.pack(MAGIC, FORMATVERSION, HEADERSIZE, size_x, size_y, dtype, strategy.getLearner(),
+                         strategy.getWins(), strategy.getName()[:NAMESIZE])
+    return header.ljust(HEADERSIZE, '\0') + pos_mat.tostring() + opp_mat.tostring()
+
+
+# check the name of a strategy for the archives
+def checkName(name):
+    """ The names are the keys of the archives, stored in NAMESIZE bytes, a longer name is an error (it would be cut). """
+
+    if len(name) > NAMESIZE:
+        print 'The name of the strategy is longer than ' + str(NAMESIZE) + ' characters:', name
+        raise ValueError('The name of the strategy is longer than ' + str(NAMESIZE) + ' characters: ' + name)
+
+
+# a strategy from a buffer in the binary format
+def unpackBinary(buffer, offset, length, filename):
+    """
+    Returns the strategy stored in the buffer (a string or a mapped file) from the offset. The
+    matrices are read-only arrays on the buffer. The filename is used in the error messages.
+    """
+
+    if length < HEADERSIZE:
+        print 'Not a strategy file:', filename
+        raise IOError('Not a strategy file: ' + filename)
+    magic, version, headerSize, size_x, size_y, dtype, learner, wins, name = HEADER.unpack_from(buffer, offset)
+    if not magic == MAGIC or not version == FORMATVERSION or not dtype in DTYPES:
+        print 'Not a strategy file, or unknown version:', filename
+        raise IOError('Not a strategy file, or unknown version: ' + filename)
+
+    dtype = DTYPES[dtype]
+    shape = (size_y, size_x + 2)
+    count = size_y * (size_x + 2)
+    if length < headerSize + 2 * count * dtype.itemsize:
+        print 'Truncated strategy file:', filename
+        raise IOError('Truncated strategy file: ' + filename)
+
+    pos_mat = numpy.frombuffer(buffer, dtype, count, offset + headerSize).reshape(shape)
+    opp_mat = numpy.frombuffer(buffer, dtype, count, offset + headerSize + count * dtype.itemsize).reshape(shape)
+    return Strategy(pos_mat, opp_mat, learner, wins, name.rstrip('\0'))
+
+
+# the name of a strategy file's strategy
+def strategyName(filename):
+    """ Returns the name of the file without the directory and the extension. """
+
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+# read a strategy file of any format
+def readStrategy(filename):
+    """ Read a strategy, the format is selected by the extension - archive.mlib#name reads from an archive. """
+
+    if ARCHIVEEXTENSION + ARCHIVESEPARATOR in filename:
+        archivename, name = filename.rsplit(ARCHIVESEPARATOR, 1)
+        archive = StrategyArchive(archivename)
+        try:
+            return archive.get(name)
+        finally:
+            archive.close()
+    if filename.endswith(BINARYEXTENSION):
+        return readBinary(filename)
+    return readText(filename)
+
+
+# write a strategy file of any format
+def writeStrategy(filename, strategy):
+    """ Write a strategy, the format is selected by the extension. """
+
+    if filename.endswith(BINARYEXTENSION):
+        writeBinary(filename, strategy)
+    else:
+        writeText(filename, strategy)
+
+
+# convert a strategy file to an other format
+def convertStrategy(source, target):
+    """ Convert a strategy file to the format of the target's extension. """
+
+    writeStrategy(target, readStrategy(source))
+
+
+# load a library of strategies
+def loadLibrary(paths):
+    """
+    Load the strategies of the given files, archives and directories (every .mstr and .mbin file in
+    them).
+
+    Returns a dictionary of the strategies by file name (archive.mlib#name for the strategies of an
+    archive). The binary strategies are only mapped, so loading a library of binary strategies costs
+    only the reading of the files.
+
+    """
+
+    library = {}
+    for path in paths:
+        if path.endswith(ARCHIVEEXTENSION):
+            archive = StrategyArchive(path)
+            for strategy in archive.iterStrategies():
+                library[path + ARCHIVESEPARATOR + strategy.getName()] = strategy
+            archive.close()
+            continue
+        if os.path.isdir(path):
+            filenames = sorted(glob.glob(os.path.join(path, '*' + TEXTEXTENSION)) + \
+                               glob.glob(os.path.join(path, '*' + BINARYEXTENSION)))
+        else:
+            filenames = [path]
+        for filename in filenames:
+            library[filename] = readStrategy(filename)
+    return library
+
+
+# pack strategy files into an archive
+def packArchive(filenames, archivename):
+    """ Append the strategies of the files to the archive (it is created if it does not exist). """
+
+    archive = StrategyArchive(archivename, 1)
+    try:
+        for filename in filenames:
+            archive.append(readStrategy(filename))
+    finally:
+        archive.close()
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# --------------------------------------- StrategyArchive class ---------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class StrategyArchive:
+    """
+    An archive of strategies.
+
+    The index is read when the archive is opened, so a strategy is found by its name or by the hex
+    SHA-1 hash of its matrices without reading the others. The strategies are read from the mapped
+    file without copying. Appending writes the strategy to the end of the file, and its entry to the
+    free place of the last index block, nothing is rewritten. The names are unique in an archive, and
+    at most NAMESIZE characters long.
+
+    """
+
+    # open an archive
+    def __init__(self, filename, writable = 0):
+        """ Open the archive for reading, or for reading and appending (created if it does not exist). """
+
+        self.filename = filename
+        self.writable = writable
+        if writable and not os.path.exists(filename):
+            self.create()
+        if writable:
+            self.file = open(filename, 'r+b')
+        else:
+            self.file = open(filename, 'rb')
+        self.mapped = None
+        self.readIndex()
+
+
+    # create an empty archive
+    def create(self):
+        """ Write the header and the first, empty index block of a new archive. """
+
+        outfile = open(self.filename, 'wb')
+        outfile.write(ARCHIVEHEADER.pack(ARCHIVEMAGIC, ARCHIVEVERSION, INDEXBLOCKSIZE, ARCHIVEHEADER.size))
+        outfile.write(self.emptyBlock(INDEXBLOCKSIZE))
+        outfile.close()
+
+
+    # an empty index block
+    def emptyBlock(self, capacity):
+        return BLOCKHEADER.pack(0, 0) + '\0' * (capacity * ENTRY.size)
+
+
+    # read the index of the archive
+    def readIndex(self):
+        """ Read the header and every index block of the archive. """
+
+        self.file.seek(0)
+        magic, version, self.blockSize, block = ARCHIVEHEADER.unpack(self.file.read(ARCHIVEHEADER.size))
+        if not magic == ARCHIVEMAGIC or not version == ARCHIVEVERSION:
+            print 'Not a strategy archive, or unknown version:', self.filename
+            raise IOError('Not a strategy archive, or unknown version: ' + self.filename)
+
+        # the entries in the order of appending, and the positions of the entries by name and by hash
+        self.entries = []
+        self.names = {}
+        self.hashes = {}
+        while True:
+            self.file.seek(block)
+            following, count = BLOCKHEADER.unpack(self.file.read(BLOCKHEADER.size))
+            data = self.file.read(count * ENTRY.size)
+            for i in range(count):
+                self.addEntry(ENTRY.unpack_from(data, i * ENTRY.size))
+            self.lastBlock, self.lastCount = block, count
+            if following == 0:
+                break
+            block = following
+
+
+    # store an entry of the index
+    def addEntry(self, entry):
+        name, digest, offset, length = entry
+        name = name.rstrip('\0')
+        self.names[name] = len(self.entries)
+        self.hashes[digest.encode('hex')] = len(self.entries)
+        self.entries.append([name, digest, offset, length])
+
+
+# getters
+
+    # get the names of the strategies, in the order of appending
+    def getNames(self):
+        return [entry[0] for entry in self.entries]
+
+    # get the number of strategies
+    def getCount(self):
+        return len(self.entries)
+
+    # get a strategy by its name or by the hex hash of its matrices
+    def get(self, key):
+        if key in self.names:
+            return self.readEntry(self.entries[self.names[key]])
+        if key in self.hashes:
+            return self.readEntry(self.entries[self.hashes[key]])
+        print 'No such strategy in', self.filename, ':', key
+        raise KeyError(key)
+
+    # get the hex hash of a strategy
+    def getHash(self, name):
+        return self.entries[self.names[name]][1].encode('hex')
+
+# end of getters
+
+
+    # iterate over the strategies
+    def iterStrategies(self):
+        """ Yield every strategy, in the order of the file. """
+
+        for entry in sorted(self.entries, key = lambda entry: entry[2]):
+            yield self.readEntry(entry)
+
+
+    # read the strategy of an entry
+    def readEntry(self, entry):
+        """ Returns the strategy of an index entry, its matrices are arrays on the mapped file. """
+
+        if self.mapped is None:
+            self.mapped = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        name, digest, offset, length = entry
+        strategy = unpackBinary(self.mapped, offset, length, self.filename + ARCHIVESEPARATOR + name)
+        strategy.name = name
+        return strategy
+
+
+    # append a strategy to the archive
+    def append(self, strategy, name = None):
+        """ Append a strategy (by default with its own name, it must be new in the archive), returns the hex hash of its matrices. """
+
+        if not self.writable:
+            print 'The archive is opened for reading only:', self.filename
+            raise IOError('The archive is opened for reading only: ' + self.filename)
+        if name is None:
+            name = strategy.getName()
+        if name in self.names:
+            print 'The strategy is already in the archive:', self.filename + ARCHIVESEPARATOR + name
+            raise ValueError('The strategy is already in the archive: ' + self.filename + ARCHIVESEPARATOR + name)
+        checkName(name)
+        data = packBinary(Strategy(strategy.getPosMat(), strategy.getOppMat(), strategy.getLearner(), strategy.getWins(), name))
+        digest = hashlib.sha1(data[HEADERSIZE:]).digest()
+
+        # write the strategy to the end of the file
+        self.file.seek(0, os.SEEK_END)
+        offset = self.file.tell()
+        self.file.write(data)
+
+        # link a new index block if the last one is full
+        if self.lastCount == self.blockSize:
+            block = self.file.tell()
+            self.file.write(self.emptyBlock(self.blockSize))
+            self.file.seek(self.lastBlock)
+            self.file.write(struct.pack('<Q', block))
+            self.lastBlock, self.lastCount = block, 0
+
+        # write the entry, then the number of entries of the block
+        entry = (name, digest, offset, len(data))
+        self.file.seek(self.lastBlock + BLOCKHEADER.size + self.lastCount * ENTRY.size)
+        self.file.write(ENTRY.pack(*entry))
+        self.lastCount += 1
+        self.file.seek(self.lastBlock + 8)
+        self.file.write(struct.pack('<I', self.lastCount))
+        self.file.flush()
+
+        self.addEntry(entry)
+        # the mapping does not cover the appended data
+        self.mapped = None
+        return digest.encode('hex')
+
+
+    # close the archive
+    def close(self):
+        """ Close the file of the archive - the strategies read from it stay valid. """
+
+        self.file.close()
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ---------------------------------------- StrategyCache class ----------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class StrategyCache:
+    """
+    Keeps the recently read strategies, until their matrices reach the memory limit.
+
+    A strategy is stored by the path, modification time and size of its file, so a modified file is
+    read again. The matrices of the stored strategies are read-only, whoever modifies them has to
+    copy them first (see ProbMat.shareMatrix). If the limit is reached, the least recently used
+    strategies are dropped.
+
+    """
+
+    # init the cache
+    def __init__(self, limit = CACHEBYTES):
+        self.limit = limit
+        self.strategies = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+
+    # get a strategy
+    def get(self, filename):
+        """ Returns the strategy of the file (or archive.mlib#name), read from the file only if needed. """
+
+        path, member = filename, ''
+        if ARCHIVEEXTENSION + ARCHIVESEPARATOR in filename:
+            path, member = filename.rsplit(ARCHIVESEPARATOR, 1)
+        stat = os.stat(path)
+        key = (os.path.abspath(path), member, stat.st_mtime, stat.st_size)
+
+        if key in self.strategies:
+            # the most recently used strategy goes to the end
+            strategy = self.strategies.pop(key)
+            self.strategies[key] = strategy
+            self.hits += 1
+            return strategy
+
+        self.misses += 1
+        strategy = readStrategy(filename)
+        for matrix in [strategy.getPosMat(), strategy.getOppMat()]:
+            matrix.flags.writeable = False
+        self.strategies[key] = strategy
+        self.size += self.strategySize(strategy)
+        while self.size > self.limit and len(self.strategies) > 1:
+            self.size -= self.strategySize(self.strategies.popitem(last = False)[1])
+        return strategy
+
+
+    # the memory used by a strategy
+    def strategySize(self, strategy):
+        return strategy.getPosMat().nbytes + strategy.getOppMat().nbytes
+
+
+    # drop every strategy
+    def clear(self):
+        self.strategies.clear()
+        self.size = 0
+
+
+# the strategy cache of the process
+strategyCache = StrategyCache()
+
+
+# read a strategy through the cache
+def readCachedStrategy(filename):
+    """ Returns the strategy of the file from the cache of the process. Its matrices are read-only! """
+
+    return strategyCache.get(filename)
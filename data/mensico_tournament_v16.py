@@ -0,0 +1,228 @@
+# -*- coding:Utf-8 -*-
+## ----- mensico_tournament_v16.py -----
+##
+##  The program plays tournaments: every learning method against every opponent of a strategy library.
+##
+##
+##  Functions:
+##      - runTournament
+##          Plays the (learner, opponent, seed) jobs of a tournament on a process pool.
+##
+##      - main
+##          Command line interface of the tournament.
+##
+##
+## Copyright (C) 2012, Fülöp, András, fulibacsi@gmail.com
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <http://www.gnu.org/licenses/>.
+##
+
+
+import os
+import sys
+import glob
+import argparse
+import multiprocessing
+from data.mensico_engine_v16 import *
+from data.mensico_strategy_v16 import readCachedStrategy, StrategyArchive, TEXTEXTENSION, BINARYEXTENSION, ARCHIVEEXTENSION, ARCHIVESEPARATOR
+
+
+# directory of the opponents' strategy files
+OPPONENTDIR = 'static opponents'
+
+# learning methods playing in the tournament by default (None: every registered one)
+LEARNERS = None
+
+# columns of the results table
+COLUMNS = ['learner', 'opponent', 'seed', 'games', 'AI wins', 'Opp wins', 'draws', 'win ratio', 'error']
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ------------------------------------------- Job functions -------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+# get an opponent's strategy, load it only once per process
+def loadOpponent(filename):
+    """ Returns the position and the opponent's matrix from the strategy file (read-only, cached). """
+
+    strategy = readCachedStrategy(filename)
+    return [strategy.getPosMat(), strategy.getOppMat()]
+
+
+# play one job of the tournament
+def playJob(job):
+    """
+    Play the games of one (learner, opponent, seed) job.
+
+    The job is a [learner, opponent, seed, numberOfGames, typeOfError] list. Returns a row of the
+    results table. The opponent is the path of its strategy file as given (archive.mlib#name for the
+    strategies of an archive), the seed and the row are keyed by it, so the opponents with the same
+    file name in different directories are told apart.
+
+    """
+
+    learner, opponent, seed, numberOfGames, typeOfError = job
+
+    # set up the game, its random streams depend only on the job
+    game = Board(seed = deriveSeed(seed, learner, opponent))
+    pos_mat, opp_mat = loadOpponent(opponent)
+    game.player2.position_matrix.shareMatrix(pos_mat)
+    game.player2.opponent_matrix.shareMatrix(opp_mat)
+
+    # play the games
+    for i in range(numberOfGames):
+        while not game.isGameOver():
+            game.doOneStep(learner)
+        game.reset()
+
+    # measure the error of the learner
+    matrices = game.getProbMats()
+    error = Error(matrices[0], matrices[1], matrices[2], matrices[3], typeOfError)
+    error.calculateError()
+
+    p1Wins = game.player1.getWins()
+    p2Wins = game.player2.getWins()
+    if p1Wins + p2Wins == 0:
+        ratio = 0.0
+    else:
+        ratio = float(p1Wins) / float(p1Wins + p2Wins)
+    # the error of type 4 is a list of every error
+    errors = error.getError()
+    if not isinstance(errors, list):
+        errors = [float(errors)]
+    return [learner, opponent, seed, numberOfGames, p1Wins, p2Wins,
+            numberOfGames - p1Wins - p2Wins, ratio] + errors
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ---------------------------------------- Tournament functions ---------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+# play every learner against every opponent with every seed
+def runTournament(learners, opponents, seeds, numberOfGames, typeOfError = ERRORTYPE, processes = None):
+    """
+    Play a tournament on a process pool.
+
+    Every (learner, opponent, seed) job plays numberOfGames games on its own board, with random
+    streams derived from the job and the number of the game. The jobs are distributed between the
+    processes of the pool, every process loads an opponent only once; the results don't depend on
+    the number of processes, or on the order of the jobs. Returns the results table: one row for each
+    job, ordered by learner, opponent and seed.
+
+    """
+
+    jobs = [[learner, opponent, seed, numberOfGames, typeOfError]
+            for learner in learners for opponent in opponents for seed in seeds]
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        results = list(pool.imap_unordered(playJob, jobs))
+    finally:
+        pool.close()
+        pool.join()
+
+    results.sort(key = lambda row: (row[0], row[1], row[2]))
+    return results
+
+
+# save the results table
+def writeResults(results, outfile, typeOfError = ERRORTYPE):
+    """ Write the results table in csv format. """
+
+    if typeOfError == 4:
+        outfile.write('; '.join(COLUMNS[:-1] + ERRORNAMES) + '\n')
+    else:
+        outfile.write('; '.join(COLUMNS) + '\n')
+    for row in results:
+        outfile.write('; '.join([str(value) for value in row]) + '\n')
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ------------------------------------------- Main function -------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+# parse the command line
+def parseArguments(args):
+    """ Parse the command line arguments. """
+
+    parser = argparse.ArgumentParser(description = VERSION + ' tournament')
+    parser.add_argument('-l', '--learners', type = int, nargs = '+', default = LEARNERS,
+                        help = 'types of learning, registered ones (default: every registered one)')
+    parser.add_argument('-o', '--opponents', nargs = '+', default = [OPPONENTDIR],
+                        help = 'strategy files, archives or directories of the opponents (default: %(default)s)')
+    parser.add_argument('-s', '--seeds', type = int, nargs = '+', default = [0],
+                        help = 'seeds of the random generator, one job for each (default: %(default)s)')
+    parser.add_argument('-n', '--games', type = int, default = 1000,
+                        help = 'number of games to play in every job (default: %(default)s)')
+    parser.add_argument('-e', '--error', type = int, default = ERRORTYPE, choices = range(5),
+                        help = 'type of error measuring (default: %(default)s)')
+    parser.add_argument('-p', '--processes', type = int, default = None,
+                        help = 'number of processes (default: number of cores)')
+    parser.add_argument('-f', '--output', default = '-',
+                        help = 'file for the results table (default: standard output)')
+    return parser.parse_args(args)
+
+
+# collect the strategy files
+def findOpponents(paths):
+    """ Returns the strategy files of the given files, archives and directories. """
+
+    opponents = []
+    for path in paths:
+        if path.endswith(ARCHIVEEXTENSION):
+            archive = StrategyArchive(path)
+            opponents.extend([path + ARCHIVESEPARATOR + name for name in sorted(set(archive.getNames()))])
+            archive.close()
+        elif os.path.isdir(path):
+            opponents.extend(sorted(glob.glob(os.path.join(path, '*' + TEXTEXTENSION)) + \
+                                    glob.glob(os.path.join(path, '*' + BINARYEXTENSION))))
+        else:
+            opponents.append(path)
+    return opponents
+
+
+# main function
+def main(args = None):
+    """ Run a tournament from the command line. """
+
+    options = parseArguments(sys.argv[1:] if args is None else args)
+    learners = getLearnerTypes() if options.learners is None else options.learners
+    for learner in learners:
+        getLearner(learner)
+
+    opponents = findOpponents(options.opponents)
+    if len(opponents) == 0:
+        print >> sys.stderr, 'No opponents found!'
+        return
+
+    results = runTournament(learners, opponents, options.seeds, options.games, options.error, options.processes)
+
+    if options.output == '-':
+        writeResults(results, sys.stdout, options.error)
+    else:
+        try:
+            outfile = open(options.output, 'w')
+        except:
+            print >> sys.stderr, "Can't write to", options.output, "!"
+            raise
+        writeResults(results, outfile, options.error)
+        outfile.close()
+
+
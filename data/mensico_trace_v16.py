@@ -0,0 +1,511 @@
+# -*- coding:Utf-8 -*-
+## ----- mensico_trace_v16.py -----
+##
+##  The program records the steps of the games into a compact binary trace, and replays them.
+##
+##
+##  Every step is stored in 2 bytes: the steps and the predictions of the players as column offsets
+##  (-1, 0, +1 from the actual column, stored as 0, 1, 2), and the collision outcome (who could step).
+##  The rows always increase by one, and the games start from the starting tiles, so the coordinates
+##  are restored by replaying the steps. The index of the first step of every game is stored as well,
+##  so any game can be replayed without replaying the previous ones.
+##
+##      bits 0-1: player 1's step       bits 2-3: player 1's prediction
+##      bits 4-5: player 2's step       bits 6-7: player 2's prediction
+##      bit 8:    player 1 could step   bit 9:    player 2 could step
+##
+##
+##  Classes:
+##      - TraceRecorder
+##          Records the steps of a Board, saves and loads the traces.
+##
+##      - TraceReplayer
+##          Restores the games of a trace, and plays them again on a Board.
+##
+##      - TraceChunk
+##          The decoded steps of a part of a trace, in arrays.
+##
+##      - StepCounter
+##          Counts the steps and the predictions of a player in traces, the empirical matrices.
+##
+##
+##  Functions:
+##      - iterChunks
+##          Decodes the steps of a trace chunk by chunk.
+##
+##
+## Copyright (C) 2012, Fülöp, András, fulibacsi@gmail.com
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <http://www.gnu.org/licenses/>.
+##
+
+
+import sys
+import struct
+from array import array
+import numpy
+
+
+# extension of the trace files
+TRACEEXTENSION = '.mtrc'
+
+# trace file: magic bytes and version
+MAGIC = 'MTRC'
+FORMATVERSION = 1
+
+# number of steps decoded at once
+CHUNKSIZE = 65536
+
+# trace file: header - magic, format version, size x, size y, number of games, number of steps
+# the header is followed by the index of the games (4 byte unsigned integers, enough for 4 * 10^9 steps),
+# then by the steps (2 byte unsigned integers), both little-endian
+HEADER = struct.Struct('<4sHHHII')
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# --------------------------------------- TraceRecorder class -----------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class TraceRecorder:
+    """
+    Records the steps of the games played on a Board.
+
+    Attach it with attach(board), then every step of Board.doOneStep (and of Board.applyStep) is
+    appended to the trace.
+
+    """
+
+    # init an empty trace
+    def __init__(self, size_x = 5, size_y = 8):
+        self.sizeX = size_x
+        self.sizeY = size_y
+        # the index of the first step of every game, and the steps
+        self.games = array('I')
+        self.steps = array('H')
+
+
+    # record the steps of a board
+    def attach(self, board):
+        """ Start recording the steps of the board. """
+
+        self.sizeX = board.sizeX
+        self.sizeY = board.sizeY
+        board.recorder = self
+
+
+    # stop recording the steps of a board
+    def detach(self, board):
+        board.recorder = None
+
+
+    # record a step
+    def record(self, board, player1move, player2move, playersmove):
+        """ Append a step of the board, called before the players are moved. """
+
+        if board.round == 0:
+            self.games.append(len(self.steps))
+        y1 = board.player1.y
+        y2 = board.player2.y
+        self.steps.append((player1move[0][1] - y1 + 1) | (player1move[1][1] - y2 + 1) << 2 | \
+                          (player2move[0][1] - y2 + 1) << 4 | (player2move[1][1] - y1 + 1) << 6 | \
+                          playersmove[0] << 8 | playersmove[1] << 9)
+
+
+# getters
+
+    # get the number of recorded games (the last one may be unfinished)
+    def getNumberOfGames(self):
+        return len(self.games)
+
+    # get the number of recorded steps
+    def getNumberOfSteps(self):
+        return len(self.steps)
+
+    # get the steps of a game
+    def getGameSteps(self, game):
+        if game + 1 < len(self.games):
+            return self.steps[self.games[game]:self.games[game + 1]]
+        return self.steps[self.games[game]:]
+
+# end of getters
+
+
+    # save the trace
+    def save(self, filename):
+        """ Save the trace to a binary file. """
+
+        games = array('I', self.games)
+        steps = array('H', self.steps)
+        if sys.byteorder == 'big':
+            games.byteswap()
+            steps.byteswap()
+        try:
+            outfile = open(filename, 'wb')
+        except:
+            print "Can't write to", filename, "!"
+            raise
+        outfile.write(HEADER.pack(MAGIC, FORMATVERSION, self.sizeX, self.sizeY, len(games), len(steps)))
+        games.tofile(outfile)
+        steps.tofile(outfile)
+        outfile.close()
+
+
+    # load a trace
+    def load(self, filename, mapped = 0):
+        """
+        Load a trace from a binary file, replacing the recorded steps.
+
+        If mapped, the games and the steps are read-only arrays mapped from the file: they are read
+        only when they are used, so traces larger than the memory can be decoded (see iterChunks), but
+        no more steps can be recorded.
+
+        """
+
+        infile = open(filename, 'rb')
+        try:
+            magic, version, self.sizeX, self.sizeY, numberOfGames, numberOfSteps = HEADER.unpack(infile.read(HEADER.size))
+            if not magic == MAGIC or not version == FORMATVERSION:
+                print 'Not a trace file, or unknown version:', filename
+                raise IOError('Not a trace file, or unknown version: ' + filename)
+            if mapped:
+                self.games = mapArray(filename, '<u4', HEADER.size, numberOfGames)
+                self.steps = mapArray(filename, '<u2', HEADER.size + 4 * numberOfGames, numberOfSteps)
+                return
+            games = array('I')
+            games.fromfile(infile, numberOfGames)
+            steps = array('H')
+            steps.fromfile(infile, numberOfSteps)
+        finally:
+            infile.close()
+        if sys.byteorder == 'big':
+            games.byteswap()
+            steps.byteswap()
+        self.games = games
+        self.steps = steps
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# --------------------------------------- TraceReplayer class -----------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class TraceReplayer:
+    """ Restores the recorded games of a trace. """
+
+    # init the replayer
+    def __init__(self, trace):
+        self.trace = trace
+        self.start = trace.sizeX / 2 + 1
+        self.last = trace.sizeY - 1
+
+
+    # restore a game
+    def restoreGame(self, game):
+        """
+        Returns the steps of a game: a [step, player 1's tile, player 2's tile, player 1's decision,
+        player 2's decision, players' move] list for every step, where the tiles are the ones before
+        the step, the decisions are [step, prediction] lists like the result of Agent.decide, and the
+        players' move tells who could step, like in Board.doOneStep.
+        """
+
+        x1, y1, x2, y2 = 0, self.start, 0, self.start
+        result = []
+        for step, code in enumerate(self.trace.getGameSteps(game)):
+            player1move = [[x1 + 1, y1 + (code & 3) - 1], [x2 + 1, y2 + (code >> 2 & 3) - 1]]
+            player2move = [[x2 + 1, y2 + (code >> 4 & 3) - 1], [x1 + 1, y1 + (code >> 6 & 3) - 1]]
+            playersmove = [code >> 8 & 1, code >> 9 & 1]
+            result.append([step, [x1, y1], [x2, y2], player1move, player2move, playersmove])
+            if playersmove[0] == 1:
+                x1, y1 = player1move[0]
+            if playersmove[1] == 1:
+                x2, y2 = player2move[0]
+        return result
+
+
+    # the result of a game
+    def getResult(self, game):
+        """ Returns 1 if player 1 won the game, 2 if player 2 won, 0 if it's a draw, None if it's unfinished. """
+
+        step, tile1, tile2, player1move, player2move, playersmove = self.restoreGame(game)[-1]
+        end1 = playersmove[0] == 1 and player1move[0][0] == self.last
+        end2 = playersmove[1] == 1 and player2move[0][0] == self.last
+        if end1 and end2:
+            return 0
+        elif end1:
+            return 1
+        elif end2:
+            return 2
+        return None
+
+
+    # play the recorded games again
+    def replay(self, board, learningType = 0, first = 0, last = None):
+        """
+        Play the recorded games from first to last (default: to the end) again on the board, with the
+        recorded decisions.
+
+        Player 1 learns from the steps with the selected learning method, so the learner's matrices
+        are reconstructed without the random decisions of the original run - if the board starts from
+        the same matrices as the original one.
+
+        """
+
+        if last is None:
+            last = self.trace.getNumberOfGames()
+        for game in range(first, last):
+            board.reset()
+            for step, tile1, tile2, player1move, player2move, playersmove in self.restoreGame(game):
+                board.applyStep(player1move, player2move, learningType)
+            if board.isGameOver():
+                board.reset()
+
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ----------------------------------------- TraceChunk class ------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class TraceChunk:
+    """
+    The decoded steps of a part of a trace.
+
+    Every attribute is an array with one element for each step: the tiles of the players before the
+    step (x1, y1, x2, y2), the columns of the decisions (move1, pred1: player 1's step and prediction,
+    move2, pred2: player 2's), who could step (canStep1, canStep2), and whether the game is over after
+    the step (finished). The steps and the predictions are in the rows after x1 and x2.
+
+    """
+
+    # decode the steps
+    def __init__(self, codes, starts, tiles, size_x = 5, size_y = 8):
+        """
+        Decode the codes of the steps. starts are the indexes of the first steps of the games in the
+        chunk, tiles are the [x1, y1, x2, y2] tiles of the players before the first step, if it
+        continues a game of the previous chunk.
+        """
+
+        codes = numpy.asarray(codes).astype(numpy.int32)
+        count = len(codes)
+        start = size_x / 2 + 1
+        if tiles is None:
+            tiles = [0, start, 0, start]
+
+        # the row and the column steps of the players: x1, y1, x2, y2
+        offsets = (codes >> numpy.array([[0], [2], [4], [6]]) & 3) - 1
+        moved = codes >> numpy.array([[8], [9]]) & 1
+        steps = numpy.empty((4, count), dtype = numpy.int32)
+        steps[0::2] = moved
+        steps[1::2] = offsets[0::2] * moved
+
+        # the tiles are the sums of the previous steps of the game: the sum of the previous steps of the
+        # chunk, minus the sum before the start of the game, plus the tile at the start of the game
+        summa = numpy.cumsum(steps, axis = 1) - steps
+        starts = numpy.asarray(starts, dtype = int)
+        initial = numpy.array([[0], [start], [0], [start]], dtype = numpy.int32)
+        bases = numpy.concatenate([numpy.array(tiles, dtype = numpy.int32)[:, numpy.newaxis], initial - summa[:, starts]], axis = 1)
+        lengths = numpy.diff(numpy.concatenate([[0], starts, [count]]))
+        self.x1, self.y1, self.x2, self.y2 = summa + numpy.repeat(bases, lengths, axis = 1)
+
+        self.canStep1 = moved[0].astype(bool)
+        self.canStep2 = moved[1].astype(bool)
+        self.move1 = self.y1 + offsets[0]
+        self.pred1 = self.y2 + offsets[1]
+        self.move2 = self.y2 + offsets[2]
+        self.pred2 = self.y1 + offsets[3]
+
+        self.finished = (self.x1 + moved[0] == size_y - 1) | (self.x2 + moved[1] == size_y - 1)
+
+
+# getters
+
+    # get the number of steps
+    def getNumberOfSteps(self):
+        return len(self.x1)
+
+    # get the number of finished games
+    def getNumberOfGames(self):
+        return int(self.finished.sum())
+
+    # get the tiles of the players after the last step
+    def getLastTiles(self):
+        if self.getNumberOfSteps() == 0:
+            return None
+        return [int(self.x1[-1] + self.canStep1[-1]), int(self.move1[-1] if self.canStep1[-1] else self.y1[-1]),
+                int(self.x2[-1] + self.canStep2[-1]), int(self.move2[-1] if self.canStep2[-1] else self.y2[-1])]
+
+# end of getters
+
+
+
+# map an array of a file
+def mapArray(filename, dtype, offset, length):
+    """ Returns a read-only array of length elements mapped from the file at the offset. """
+
+    if length == 0:
+        return numpy.zeros(0, dtype = dtype)
+    return numpy.memmap(filename, dtype = dtype, mode = 'r', offset = offset, shape = (length,))
+
+
+# the recorded values as a numpy array
+def asArray(values, dtype):
+    """ Returns the games or the steps of a trace as a numpy array, without copying. """
+
+    if isinstance(values, numpy.ndarray):
+        return values
+    if len(values) == 0:
+        return numpy.zeros(0, dtype = dtype)
+    return numpy.frombuffer(values, dtype = dtype)
+
+
+# decode a trace chunk by chunk
+def iterChunks(trace, chunkSize = CHUNKSIZE, first = 0, last = None):
+    """
+    Generates the steps of the games of the trace from first to last (default: to the end) in
+    TraceChunks of at most chunkSize steps. Only one chunk is decoded at once, so a mapped trace (see
+    TraceRecorder.load) is decoded in bounded memory.
+    """
+
+    if last is None:
+        last = trace.getNumberOfGames()
+    if first >= last:
+        return
+    games = asArray(trace.games, numpy.uint32)
+    steps = asArray(trace.steps, numpy.uint16)
+    begin = int(games[first])
+    if last < len(games):
+        end = int(games[last])
+    else:
+        end = len(steps)
+    starts = games[first:last]
+
+    tiles = None
+    for offset in range(begin, end, chunkSize):
+        stop = min(offset + chunkSize, end)
+        index = starts[numpy.searchsorted(starts, offset):numpy.searchsorted(starts, stop)] - offset
+        chunk = TraceChunk(steps[offset:stop], index, tiles, trace.sizeX, trace.sizeY)
+        tiles = chunk.getLastTiles()
+        yield chunk
+
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ----------------------------------------- StepCounter class -----------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class StepCounter:
+    """
+    Counts the steps and the predictions of a player in the recorded games.
+
+    The counts are indexed by [row, column - 1, step] like the observations of the gradient learner:
+    from the tile (row, column) the step goes to the column - 1, column, column + 1 tiles of the next
+    row. The steps are counted from the player's tile, the predictions from the opponent's tile. The
+    traces are counted chunk by chunk, the memory used doesn't depend on their length.
+
+    """
+
+    # init the counter
+    def __init__(self, size_x = 5, size_y = 8, player = 2):
+        self.sizeX = size_x
+        self.sizeY = size_y
+        self.player = player
+        self.steps = numpy.zeros((size_y - 1, size_x, 3), dtype = numpy.int64)
+        self.predictions = numpy.zeros((size_y - 1, size_x, 3), dtype = numpy.int64)
+
+
+    # count the steps of a chunk
+    def countChunk(self, chunk):
+        """ Add the steps and the predictions of the player in the chunk to the counts. """
+
+        if self.player == 1:
+            own, opp = [chunk.x1, chunk.y1, chunk.move1], [chunk.x2, chunk.y2, chunk.pred1]
+        else:
+            own, opp = [chunk.x2, chunk.y2, chunk.move2], [chunk.x1, chunk.y1, chunk.pred2]
+        for counts, (x, y, column) in [[self.steps, own], [self.predictions, opp]]:
+            index = numpy.ravel_multi_index((x, y - 1, column - y + 1), counts.shape)
+            counts += numpy.bincount(index, minlength = counts.size).reshape(counts.shape)
+
+
+    # count the steps of a trace
+    def countTrace(self, trace, chunkSize = CHUNKSIZE, first = 0, last = None):
+        """ Add the steps and the predictions of the player in the games of the trace to the counts. """
+
+        if not trace.sizeX == self.sizeX or not trace.sizeY == self.sizeY:
+            print 'The size of the trace is different:', trace.sizeX, trace.sizeY
+            raise ValueError('The size of the trace is different!')
+        for chunk in iterChunks(trace, chunkSize, first, last):
+            self.countChunk(chunk)
+
+
+# getters
+
+    # get the counts of the steps
+    def getStepCounts(self):
+        return self.steps
+
+    # get the counts of the predictions
+    def getPredictionCounts(self):
+        return self.predictions
+
+    # get the number of counted steps
+    def getNumberOfSteps(self):
+        return int(self.steps.sum())
+
+# end of getters
+
+
+    # the counts onto the tiles
+    def getCounts(self):
+        """
+        Returns the number of steps and of predictions onto every tile, in two matrices of the shape
+        of the players' matrices (the first row is the starting tile, the first and the last column
+        are the walls).
+        """
+
+        result = []
+        for counts in [self.steps, self.predictions]:
+            matrix = numpy.zeros((self.sizeY, self.sizeX + 2), dtype = numpy.int64)
+            for k in range(3):
+                matrix[1:, k:k + self.sizeX] += counts[:, :, k]
+            matrix[0, self.sizeX / 2 + 1] = counts[0].sum()
+            result.append(matrix)
+        return result
+
+
+    # the empirical matrices
+    def getMatrices(self, initial, prior = 0.0):
+        """
+        Returns the empirical position and prediction matrices of the player: the counts onto the tiles
+        of every row divided by the total count of the row, as Error uses them.
+
+        prior is added to the counts of every tile of the board, these are the non-zero tiles of the
+        initial matrix (e.g. the starting matrix of a player). The rows without any count are the rows
+        of the initial matrix.
+
+        """
+
+        initial = numpy.asarray(initial, dtype = numpy.float64)
+        result = []
+        for counts in self.getCounts():
+            matrix = numpy.where(initial > 0.0, counts + prior, 0.0)
+            summa = matrix.sum(axis = 1)[:, numpy.newaxis]
+            with numpy.errstate(invalid = 'ignore', divide = 'ignore'):
+                result.append(numpy.where(summa > 0.0, matrix / summa, initial))
+        return result
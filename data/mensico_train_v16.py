@@ -0,0 +1,263 @@
+# -*- coding:Utf-8 -*-
+## ----- mensico_train_v16.py -----
+##
+##  The program trains the learners offline, from the recorded game traces.
+##
+##
+##  The steps of the traces are decoded in chunks (see mensico_trace_v16.iterChunks), and player 1
+##  learns from every step of a chunk at once: the changes of all the steps are computed from the
+##  matrices at the start of the chunk, summed up tile by tile, and every touched row is rescaled only
+##  once per chunk. The result is close to the replay of the games for small chunks, and it is much
+##  faster for large ones.
+##
+##
+##  Classes:
+##      - OfflineTrainer
+##          Trains an Agent from traces with the selected learning method.
+##
+##  Functions:
+##      - main
+##          Command line interface of the trainer.
+##
+##
+## Copyright (C) 2012, Fülöp, András, fulibacsi@gmail.com
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <http://www.gnu.org/licenses/>.
+##
+
+
+import sys
+import argparse
+import numpy
+from data.mensico_engine_v16 import *
+from data.mensico_trace_v16 import TraceRecorder, StepCounter, iterChunks
+
+
+# number of steps learned at once
+TRAINCHUNK = 256
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# --------------------------------------- OfflineTrainer class ----------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+class OfflineTrainer:
+    """
+    Trains player 1 of the recorded games offline.
+
+    The learning methods are the ones of Agent.learn, applied to a chunk of steps at once by the
+    learner's learnBatch (see Learner.learnBatch). Within a chunk every change is computed from the
+    matrices at the start of the chunk: the additive changes (2, 3) are summed, the multiplicative
+    ones (1, 4, 5) are multiplied tile by tile, then the touched rows are rescaled. The gradient
+    learner (6) counts the opponent's steps of the chunk, fits the touched rows of its model once, and
+    learns from the finished games as usual. The learners without a batch version learn from the steps
+    one by one, like on a Board.
+
+    """
+
+    # init the trainer
+    def __init__(self, agent, typeOfLearning = LEARNINGTYPE, learningConstant = LEARNINGCONSTANT, chunkSize = TRAINCHUNK):
+        self.agent = agent
+        self.typeOfLearning = typeOfLearning
+        self.learningConstant = learningConstant
+        self.chunkSize = chunkSize
+        self.steps = 0
+        self.games = 0
+        # the matrices of the agent while training, and their tiles on the board
+        self.matrices = None
+        self.support = None
+
+
+# getters
+
+    # get the number of learned steps
+    def getNumberOfSteps(self):
+        return self.steps
+
+    # get the number of learned (finished) games
+    def getNumberOfGames(self):
+        return self.games
+
+# end of getters
+
+
+    # learn from the games of a trace
+    def train(self, trace, first = 0, last = None):
+        """ Learn from the games of the trace from first to last (default: to the end). """
+
+        learner = getLearner(self.typeOfLearning, self.agent.getLearners())
+
+        # the matrices are learned in float arrays, and set back at the end
+        self.matrices = [numpy.array(self.agent.getPosMat(), dtype = numpy.float64),
+                         numpy.array(self.agent.getOppMat(), dtype = numpy.float64)]
+        self.support = [self.matrices[0] > 0.0, self.matrices[1] > 0.0]
+
+        for chunk in iterChunks(trace, self.chunkSize, first, last):
+            self.learnChunk(learner, chunk)
+            self.steps = self.steps + chunk.getNumberOfSteps()
+            self.games = self.games + chunk.getNumberOfGames()
+
+        self.agent.setPosMat(self.matrices[0])
+        self.agent.setOppMat(self.matrices[1])
+
+
+    # learn from a chunk of steps
+    def learnChunk(self, learner, chunk):
+        """ Learning from every step of the chunk at once with the learner's batch version. """
+
+        learner.learnBatch(self, chunk, self.learningConstant)
+
+
+    # the agents of the steps
+    def getAgents(self, steps):
+        """ Yields the agent and the index of every step, the agent gets the matrices, and they are copied back at the end. """
+
+        self.agent.setPosMat(self.matrices[0])
+        self.agent.setOppMat(self.matrices[1])
+        yield self.agent, slice(None)
+        self.matrices[0][...] = self.agent.getPosMat()
+        self.matrices[1][...] = self.agent.getOppMat()
+
+
+    # learn from the steps of a chunk one by one
+    def learnSteps(self, learner, steps, learningConstant):
+        """ Learning from every step of the chunk in the agent, and from the finished games, like on a Board. """
+
+        for agent, sel in self.getAgents(steps):
+            for x1, y1, x2, y2, move1, pred1, move2, pred2, canStep1, canStep2, finished in \
+                zip(steps.x1.tolist(), steps.y1.tolist(), steps.x2.tolist(), steps.y2.tolist(), steps.move1.tolist(), steps.pred1.tolist(),
+                    steps.move2.tolist(), steps.pred2.tolist(), steps.canStep1.tolist(), steps.canStep2.tolist(), steps.finished.tolist()):
+                agent.setOwnCoord(x1, y1)
+                agent.setOppCoord(x2, y2)
+                learner.learn(agent, int(canStep1), int(canStep2), [[x1 + 1, move1], [x2 + 1, pred1]],
+                              [[x2 + 1, move2], [x1 + 1, pred2]], learningConstant)
+                if finished:
+                    learner.learnFromGame(agent)
+
+
+    # get tiles of the agent's matrix
+    def getTiles(self, steps, matrix, rows, cols, sel = None):
+        """ Returns the tiles of the matrix (0 - position, 1 - opponent's), with more columns of every step if cols is 2D. """
+
+        if numpy.ndim(cols) == 2:
+            rows = rows[:, numpy.newaxis]
+        return self.matrices[matrix][rows, cols]
+
+
+    # multiply the given tiles, and rescale their rows
+    def multiplyTiles(self, steps, matrix, rows, cols, factors, sel = None):
+        """ Multiply the tiles by the product of their factors (summed as logarithms), then rescale the rows. """
+
+        if len(rows) == 0:
+            return
+        matrix, support = self.matrices[matrix], self.support[matrix]
+        exponents = self.sumTiles(matrix, rows, cols, numpy.log(factors))
+        touched = numpy.unique(rows)
+        # the greatest exponent of every row is subtracted, the rescaling doesn't change
+        exponents = exponents[touched] - exponents[touched].max(axis = 1)[:, numpy.newaxis]
+        matrix[touched] = matrix[touched] * numpy.exp(exponents)
+        self.rescaleTouched(matrix, support, touched)
+
+
+    # add to the given tiles, and rescale their rows
+    def addToTiles(self, steps, matrix, rows, cols, values, sel = None):
+        """ Add the sum of their values to the tiles, then rescale the rows. """
+
+        if len(rows) == 0:
+            return
+        matrix, support = self.matrices[matrix], self.support[matrix]
+        matrix += self.sumTiles(matrix, rows, cols, values)
+        self.rescaleTouched(matrix, support, numpy.unique(rows))
+
+
+    # sum the values of every tile
+    def sumTiles(self, matrix, rows, cols, values):
+        index = numpy.ravel_multi_index((rows, cols), matrix.shape)
+        return numpy.bincount(index, weights = values, minlength = matrix.size).reshape(matrix.shape)
+
+
+    # rescale the touched rows
+    def rescaleTouched(self, matrix, support, touched):
+        """ Rescale the rows, the tiles of the board that became zero stay on the board. """
+
+        temp = matrix[touched]
+        temp[support[touched] & (temp == 0.0)] = MINFLOAT
+        rescaleRows(temp)
+        matrix[touched] = temp
+
+
+
+# -----------------------------------------------------------------------------------------------------
+# ------------------------------------------- Main function -------------------------------------------
+# -----------------------------------------------------------------------------------------------------
+
+
+# parse the command line
+def parseArguments(args):
+    """ Parse the command line arguments. """
+
+    parser = argparse.ArgumentParser(description = VERSION + ' offline trainer')
+    parser.add_argument('traces', nargs = '+',
+                        help = 'trace files of the recorded games, player 1 learns')
+    parser.add_argument('-l', '--learner', type = int, default = LEARNINGTYPE,
+                        help = 'type of learning, one of the registered ones (default: %(default)s)')
+    parser.add_argument('-c', '--chunk', type = int, default = TRAINCHUNK,
+                        help = 'number of steps learned at once (default: %(default)s)')
+    parser.add_argument('--learner-strategy', default = None,
+                        help = 'strategy file of the learner to start from')
+    parser.add_argument('-o', '--opponent', default = None,
+                        help = 'strategy file of the opponent, to measure the error of the learner (default: the ' \
+                               'empirical matrices of player 2 in the traces)')
+    parser.add_argument('-e', '--error', type = int, default = ERRORTYPE, choices = range(5),
+                        help = 'type of error measuring (default: %(default)s)')
+    parser.add_argument('--save', default = None,
+                        help = 'save the learned strategy to this file (.mstr or .mbin)')
+    return parser.parse_args(args)
+
+
+# main function
+def main(args = None):
+    """ Train a learner from the command line. """
+
+    options = parseArguments(sys.argv[1:] if args is None else args)
+
+    # set up the players
+    game = Board()
+    if options.learner_strategy is not None:
+        game.player1.loadStrategy(options.learner_strategy, 1)
+    if options.opponent is not None:
+        game.player2.loadStrategy(options.opponent, 1)
+
+    # learn from the traces, and count the steps of the opponent
+    trainer = OfflineTrainer(game.player1, options.learner, chunkSize = options.chunk)
+    counter = StepCounter(game.sizeX, game.sizeY)
+    trace = TraceRecorder()
+    for filename in options.traces:
+        trace.load(filename, mapped = 1)
+        trainer.train(trace)
+        counter.countTrace(trace)
+    print >> sys.stderr, 'Learned steps: ' + str(trainer.getNumberOfSteps()) + '\nLearned games: ' + str(trainer.getNumberOfGames())
+
+    # measure the error of the learner
+    matrices = game.getProbMats()
+    if options.opponent is None:
+        matrices[2:] = counter.getMatrices(ProbMat(game.sizeX, game.sizeY).getMatrix())
+    error = Error(matrices[0], matrices[1], matrices[2], matrices[3], options.error)
+    error.calculateError()
+    print >> sys.stderr, 'Error: ' + str(error.getError())
+
+    if options.save is not None:
+        game.player1.saveStrategy(options.save, options.learner)
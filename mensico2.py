@@ -8,20 +8,24 @@
 ##  How to run:
 ##      python mensico2_v1.5.py 
 ##
+##      To run tests without the graphical interface, see mensico_sim.py.
+##
 ##
 ##  Dependencies:
-##      python-2.7.2, python-tk
+##      python-2.7.2, python-tk, python-numpy
 ##
 ##  Optional dependencies:
 ##      pygame
 ##
 ##
 ##  Install dependencies in debian distributions:
-##      sudo apt-get install python2.7 python-tk python-pygame
+##      sudo apt-get install python2.7 python-tk python-numpy python-pygame
 ##
 ##  Install dependencies in Windows:
 ##      - download python 2.7 (for 32bit) from here:
 ##          http://python.org/ftp/python/2.7.2/python-2.7.2.msi
+##      - download numpy from here:
+##          http://sourceforge.net/projects/numpy/files/NumPy/
 ##      - download pygame from here (optional):
 ##          http://pygame.org/ftp/pygame-1.9.2a0.win32-py2.7.msi
 ##      - install the downloaded programs in the same order
@@ -0,0 +1,46 @@
+# -*- coding:Utf-8 -*-
+## ----- mensico_bench.py -----
+##
+##  The program measures the speed of the MensIco engine.
+##
+##
+##  How to run:
+##      python mensico_bench.py -f baseline.json
+##      python mensico_bench.py -f actual.json -c baseline.json
+##
+##      The results are written to the json file; with -c they are compared to an earlier run, and the
+##      exit status is 1 if any of them is slower than the baseline by more than the threshold.
+##      Run 'python mensico_bench.py --help' for the list of the options.
+##
+##
+##  Dependencies:
+##      python-2.7.2, python-numpy
+##
+##
+## Copyright (C) 2012, Fülöp, András, fulibacsi@gmail.com
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <http://www.gnu.org/licenses/>.
+##
+
+
+
+import sys
+from data.mensico_bench_v16 import main
+
+
+
+# start of the program
+if __name__ == '__main__':
+    sys.exit(main())
+    
@@ -0,0 +1,43 @@
+# -*- coding:Utf-8 -*-
+## ----- mensico_sim.py -----
+##
+##  The program tests the learning methods of MensIco without a graphical user interface.
+##
+##
+##  How to run:
+##      python mensico_sim.py -l 2 -o "static opponents/gauss.mstr" -n 10000 -e 1 -s 42 -f gauss.csv
+##
+##      The error and win ratio series is written to the output file as the games are played.
+##      Run 'python mensico_sim.py --help' for the list of the options.
+##
+##
+##  Dependencies:
+##      python-2.7.2, python-numpy
+##
+##
+## Copyright (C) 2012, Fülöp, András, fulibacsi@gmail.com
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <http://www.gnu.org/licenses/>.
+##
+
+
+
+from data.mensico_sim_v16 import main
+
+
+
+# start of the program
+if __name__ == '__main__':
+    main()
+    
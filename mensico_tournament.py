@@ -0,0 +1,43 @@
+# -*- coding:Utf-8 -*-
+## ----- mensico_tournament.py -----
+##
+##  The program plays every learning method of MensIco against a library of opponents.
+##
+##
+##  How to run:
+##      python mensico_tournament.py -l 0 1 2 3 4 5 -o "static opponents" -s 1 2 3 -n 10000 -f results.csv
+##
+##      The jobs are played on every core of the machine, the results are merged into one table.
+##      Run 'python mensico_tournament.py --help' for the list of the options.
+##
+##
+##  Dependencies:
+##      python-2.7.2, python-numpy
+##
+##
+## Copyright (C) 2012, Fülöp, András, fulibacsi@gmail.com
+##
+## This program is free software: you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published by
+## the Free Software Foundation, either version 3 of the License, or
+## (at your option) any later version.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+## You should have received a copy of the GNU General Public License
+## along with this program.  If not, see <http://www.gnu.org/licenses/>.
+##
+
+
+
+from data.mensico_tournament_v16 import main
+
+
+
+# start of the program
+if __name__ == '__main__':
+    main()
+    